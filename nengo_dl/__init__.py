@@ -40,9 +40,11 @@ from nengo_dl import (  # noqa: F401
 
 # import into top-level namespace
 from nengo_dl.simulator import Simulator  # noqa: F401
+from nengo_dl.plan_cache import PlanCache  # noqa: F401
+from nengo_dl.serving import BatchServer  # noqa: F401
 from nengo_dl.tensor_node import (  # noqa: F401
     TensorNode, tensor_layer, reshaped)
-from nengo_dl.utils import configure_trainable  # noqa: F401
+from nengo_dl.utils import configure_trainable, time_vectorized  # noqa: F401
 from nengo_dl.neurons import SoftLIFRate  # noqa: F401
 
 # fix tensorflow bugs
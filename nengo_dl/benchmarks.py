@@ -221,6 +221,418 @@ def compare_backends(raw=False):
     plt.show()
 
 
+def compare_reset(d_range=(16, 32, 64, 128), reps=5):
+    """Compare the time required to reset the simulator (reinitializing the
+    existing graph) versus rebuilding the graph, as a function of the
+    model size.
+
+    Parameters
+    ----------
+    d_range : list of int
+        dimensionality of the benchmark models
+    reps : int
+        number of times to repeat each reset (times are averaged)
+    """
+
+    data = np.zeros((len(d_range), 2))
+    for i, dimensions in enumerate(d_range):
+        net, p = cconv(dimensions, 32, nengo.RectifiedLinear())
+        with nengo_dl.Simulator(net, unroll_simulation=10) as sim:
+            n_ops = len(sim.tensor_graph.graph.get_operations())
+
+            for j, rebuild in enumerate((False, True)):
+                start = time.time()
+                for _ in range(reps):
+                    sim.reset(rebuild=rebuild)
+                data[i, j] = (time.time() - start) / reps
+
+        print("dimensions: %d, graph ops: %d, reset: %.4fs, rebuild: %.4fs" %
+              ((dimensions, n_ops) + tuple(data[i])))
+
+    plt.figure()
+    plt.plot(d_range, data)
+    plt.xlabel("dimensions")
+    plt.ylabel("seconds")
+    plt.legend(["reset", "rebuild"])
+    plt.show()
+
+
+def compare_probe_reads(n_chunks=1000, chunk_steps=10):
+    """Compare the cost of reading probe data in between simulation runs,
+    using the probe buffers versus concatenating a list of chunks (the
+    previous approach).
+
+    Parameters
+    ----------
+    n_chunks : int
+        number of times to run the simulation (and read the probe data)
+    chunk_steps : int
+        number of simulation steps per run
+    """
+
+    net, p = integrator(32, 32, nengo.RectifiedLinear())
+
+    read_times = np.zeros((n_chunks, 2))
+    with nengo_dl.Simulator(net, unroll_simulation=chunk_steps) as sim:
+        chunks = []
+        list_data = nengo_dl.simulator.ProbeDict({p: chunks}, {p: None})
+
+        for i in range(n_chunks):
+            sim.run_steps(chunk_steps)
+            chunks.append(sim.model.params[p].data[-chunk_steps:])
+
+            start = time.time()
+            sim.data[p]
+            read_times[i, 0] = time.time() - start
+
+            start = time.time()
+            list_data[p]
+            read_times[i, 1] = time.time() - start
+
+    print("total read time: buffer %.4fs, list %.4fs" %
+          tuple(np.sum(read_times, axis=0)))
+
+    plt.figure()
+    plt.plot(np.arange(1, n_chunks + 1) * chunk_steps, read_times)
+    plt.xlabel("simulation steps")
+    plt.ylabel("read time (seconds)")
+    plt.legend(["buffer", "list"])
+    plt.show()
+
+
+def compare_train_prefetch(prefetch_range=(0, 1, 4), n_epochs=5):
+    """Compare the training speed with different amounts of input
+    prefetching.
+
+    Parameters
+    ----------
+    prefetch_range : list of int
+        values of the ``prefetch`` argument to :meth:`.Simulator.train`
+    n_epochs : int
+        number of training epochs
+    """
+
+    minibatch_size = 16
+    n_steps = 50
+    n_batches = 64
+
+    net, p = integrator(16, 32, nengo.RectifiedLinear())
+    inp = net.all_nodes[0]
+
+    inputs = {inp: np.random.uniform(
+        -1, 1, size=(minibatch_size * n_batches, n_steps, inp.size_out))}
+    targets = {p: np.random.uniform(
+        -1, 1, size=(minibatch_size * n_batches, n_steps, p.size_in))}
+
+    with nengo_dl.Simulator(net, minibatch_size=minibatch_size,
+                            unroll_simulation=10) as sim:
+        opt = tf.train.GradientDescentOptimizer(1e-3)
+
+        # run once first so that the graph construction time isn't included
+        sim.train(inputs, targets, opt, n_epochs=1)
+
+        for prefetch in prefetch_range:
+            start = time.time()
+            sim.train(inputs, targets, opt, n_epochs=n_epochs,
+                      prefetch=prefetch)
+            elapsed = time.time() - start
+            print("prefetch: %d, %.2f steps/s" % (
+                prefetch, n_epochs * n_batches * n_steps / elapsed))
+
+
+def compare_train_truncation(truncation_range=(None, 1000, 100),
+                             n_steps=10000, n_epochs=1):
+    """Compare the training speed and memory usage of full backpropagation
+    through time and truncated backpropagation with different window lengths.
+
+    Parameters
+    ----------
+    truncation_range : list of int
+        values of the ``truncation`` argument to :meth:`.Simulator.train`
+        (None means full backpropagation through time)
+    n_steps : int
+        length of each training sequence
+    n_epochs : int
+        number of training epochs
+    """
+
+    minibatch_size = 8
+    n_batches = 4
+
+    net, p = integrator(16, 32, nengo.RectifiedLinear())
+    inp = net.all_nodes[0]
+
+    inputs = {inp: np.random.uniform(
+        -1, 1, size=(minibatch_size * n_batches, n_steps, inp.size_out))}
+    targets = {p: np.random.uniform(
+        -1, 1, size=(minibatch_size * n_batches, n_steps, p.size_in))}
+
+    for truncation in truncation_range:
+        # note: we use a new simulator each time, so that the memory usage
+        # statistics are not affected by the previous runs
+        with nengo_dl.Simulator(net, minibatch_size=minibatch_size,
+                                unroll_simulation=10) as sim:
+            opt = tf.train.GradientDescentOptimizer(1e-3)
+
+            start = time.time()
+            try:
+                sim.train(inputs, targets, opt, n_epochs=n_epochs,
+                          truncation=truncation)
+            except tf.errors.ResourceExhaustedError:
+                print("truncation: %s, out of memory" % truncation)
+                continue
+            elapsed = time.time() - start
+
+            try:
+                with sim.tensor_graph.graph.as_default():
+                    peak = sim.sess.run(
+                        tf.contrib.memory_stats.MaxBytesInUse()) / 1024 ** 2
+                peak = "%.2f MB" % peak
+            except (AttributeError, tf.errors.OpError):
+                # memory statistics are not available on all devices
+                peak = "unknown"
+
+            print("truncation: %s, %.2f samples/s, peak memory: %s" % (
+                truncation, n_epochs * n_batches * minibatch_size / elapsed,
+                peak))
+
+
+def compare_precision(dimensions=64, neurons_per_d=32, n_steps=1000,
+                      device=None):
+    """Compare the simulation speed and accuracy of full (float32) and mixed
+    (float16) precision on each benchmark network.
+
+    Parameters
+    ----------
+    dimensions : int
+        dimensionality of the benchmark networks
+    neurons_per_d : int
+        number of neurons per dimension
+    n_steps : int
+        number of simulation timesteps
+    device : None or ``"/cpu:0"`` or ``"/gpu:[0-n]"``
+        device on which to run the simulations
+    """
+
+    for bench in (pes, integrator, cconv):
+        net, p = bench(dimensions, neurons_per_d, nengo.RectifiedLinear())
+        model = nengo.builder.Model()
+        model.build(net)
+
+        data = {}
+        for dtype in (tf.float32, tf.float16):
+            with nengo_dl.Simulator(None, model=model, dtype=dtype,
+                                    unroll_simulation=25,
+                                    device=device) as sim:
+                # run once first so that the startup time isn't included
+                sim.run_steps(25)
+                sim.soft_reset(include_probes=True)
+
+                start = time.time()
+                sim.run_steps(n_steps)
+                elapsed = time.time() - start
+
+                data[dtype] = sim.data[p].astype(np.float32)
+
+            print("%s, %s: %.2f steps/s" % (bench.__name__, dtype.name,
+                                            n_steps / elapsed))
+
+        print("%s: rmse %.4f" % (bench.__name__, np.sqrt(np.mean(
+            (data[tf.float16] - data[tf.float32]) ** 2))))
+
+
+def compare_jit(dimensions=64, neurons_per_d=32, n_steps=1000):
+    """Compare the simulation speed and compilation time with and without
+    XLA compilation of the simulation step on each benchmark network.
+
+    Parameters
+    ----------
+    dimensions : int
+        dimensionality of the benchmark networks
+    neurons_per_d : int
+        number of neurons per dimension
+    n_steps : int
+        number of simulation timesteps
+    """
+
+    for bench in (pes, integrator, cconv):
+        net, p = bench(dimensions, neurons_per_d, nengo.RectifiedLinear())
+        model = nengo.builder.Model()
+        model.build(net)
+
+        for jit in (False, True):
+            with nengo_dl.Simulator(None, model=model, jit=jit,
+                                    unroll_simulation=25,
+                                    device="/cpu:0") as sim:
+                # note: compilation happens the first time the graph is run
+                start = time.time()
+                sim.run_steps(25)
+                compile_time = time.time() - start
+
+                start = time.time()
+                sim.run_steps(n_steps)
+                elapsed = time.time() - start
+
+            print("%s, jit=%s: %.2f steps/s (first run %.2fs)" % (
+                bench.__name__, jit, n_steps / elapsed, compile_time))
+
+
+def compare_inference(dimensions=64, neurons_per_d=32, n_steps=1000,
+                      minibatch_size=16, device=None):
+    """Compare the simulation speed and memory usage of the standard
+    (training-capable) graph and the frozen inference-only graph (see
+    :meth:`.Simulator.freeze`) on each benchmark network.
+
+    Parameters
+    ----------
+    dimensions : int
+        dimensionality of the benchmark networks
+    neurons_per_d : int
+        number of neurons per dimension
+    n_steps : int
+        number of simulation timesteps
+    minibatch_size : int
+        number of simultaneous simulations
+    device : None or ``"/cpu:0"`` or ``"/gpu:[0-n]"``
+        device on which to run the simulations
+    """
+
+    for bench in (pes, integrator, cconv):
+        net, p = bench(dimensions, neurons_per_d, nengo.RectifiedLinear())
+        model = nengo.builder.Model()
+        model.build(net)
+
+        for frozen in (False, True):
+            # note: we use a new simulator each time, so that the memory usage
+            # statistics are not affected by the previous runs
+            with nengo_dl.Simulator(None, model=model, unroll_simulation=25,
+                                    minibatch_size=minibatch_size,
+                                    device=device) as sim:
+                if frozen:
+                    sim.freeze()
+
+                # run once first so that the startup time isn't included
+                sim.run_steps(25)
+                sim.soft_reset(include_probes=True)
+
+                start = time.time()
+                sim.run_steps(n_steps)
+                elapsed = time.time() - start
+
+                try:
+                    with sim.tensor_graph.graph.as_default():
+                        peak = sim.sess.run(
+                            tf.contrib.memory_stats.MaxBytesInUse())
+                    peak = "%.2f MB" % (peak / 1024 ** 2)
+                except (AttributeError, tf.errors.OpError):
+                    # memory statistics are not available on all devices
+                    peak = "unknown"
+
+            print("%s, frozen=%s: %.2f steps/s, peak memory: %s" % (
+                bench.__name__, frozen, n_steps / elapsed, peak))
+
+
+def compare_step_latency(dimensions=4, neurons_per_d=32, n_steps=1000,
+                         device="/cpu:0"):
+    """Compare the time taken to execute individual timesteps with
+    :meth:`.Simulator.step` and with :meth:`.Simulator.stepper` (e.g., for
+    real-time control).
+
+    Parameters
+    ----------
+    dimensions : int
+        dimensionality of the benchmark networks
+    neurons_per_d : int
+        number of neurons per dimension
+    n_steps : int
+        number of simulation timesteps
+    device : None or ``"/cpu:0"`` or ``"/gpu:[0-n]"``
+        device on which to run the simulations
+    """
+
+    for bench in (integrator, cconv):
+        net, p = bench(dimensions, neurons_per_d, nengo.RectifiedLinear())
+
+        with nengo_dl.Simulator(net, device=device) as sim:
+            stepper = sim.stepper(probes=[p])
+
+            # run once first so that the startup time isn't included
+            sim.step()
+            stepper.step()
+
+            times = {}
+            for name, step in (("step", sim.step), ("stepper", stepper.step)):
+                elapsed = np.zeros(n_steps)
+                for i in range(n_steps):
+                    start = time.time()
+                    step()
+                    elapsed[i] = time.time() - start
+                times[name] = elapsed * 1e6
+
+        print("%s: %s" % (bench.__name__, ", ".join(
+            "%s %.1f us/step (p99 %.1f us)" % (
+                name, np.mean(t), np.percentile(t, 99))
+            for name, t in sorted(times.items()))))
+
+
+def compare_planner(n_range=(25, 50, 100, 200)):
+    """Measure how the time taken by :func:`.graph_optimizer.tree_planner`
+    scales with the number of operators in the model.
+
+    Two kinds of networks are tested: structured networks (``EnsembleArrays``,
+    in which most of the operators can be merged) and random networks
+    (ensembles of different sizes with random connections, which result in
+    many unmergeable operator groups).
+
+    Parameters
+    ----------
+    n_range : list of int
+        the number of ensembles in each network
+    """
+
+    def ensemble_array(n):
+        with nengo.Network(seed=0) as net:
+            inp = nengo.Node(np.zeros(n))
+            a = nengo.networks.EnsembleArray(10, n)
+            b = nengo.networks.EnsembleArray(10, n)
+            nengo.Connection(inp, a.input)
+            nengo.Connection(a.output, b.input, synapse=0.01)
+            nengo.Probe(b.output)
+        return net
+
+    def random_network(n):
+        rng = np.random.RandomState(0)
+        neuron_types = (nengo.LIF(), nengo.RectifiedLinear())
+        synapses = (0.005, 0.01, 0.1)
+        with nengo.Network(seed=0) as net:
+            ens = [nengo.Ensemble(rng.randint(5, 50), rng.randint(1, 4),
+                                  neuron_type=neuron_types[rng.randint(2)])
+                   for _ in range(n)]
+            for _ in range(2 * n):
+                pre, post = rng.choice(ens, 2)
+                nengo.Connection(pre, post, synapse=synapses[rng.randint(3)],
+                                 transform=np.ones((post.dimensions,
+                                                    pre.dimensions)))
+        return net
+
+    for bench in (ensemble_array, random_network):
+        for n in n_range:
+            model = nengo.builder.Model()
+            model.build(bench(n))
+
+            # note: building the TensorGraph runs the planner (along with
+            # the other graph optimization steps), so we can read the
+            # planning time from the build stats
+            stats = nengo_dl.utils.BuildStats()
+            nengo_dl.tensor_graph.TensorGraph(
+                model, 0.001, 1, tf.float32, 1, None, build_stats=stats)
+            planner_stats = stats.phases["tree_planner"]
+
+            print("%s, %d ensembles: %d operators, %d groups, %.3f s" % (
+                bench.__name__, n, planner_stats["n_ops_in"],
+                planner_stats["n_ops_out"], planner_stats["time"]))
+
+
 def profiling():
     """Run profiler on one of the benchmarks."""
 
@@ -229,7 +641,10 @@ def profiling():
     net, p = pes(128, 32, nengo.RectifiedLinear())
     with nengo_dl.Simulator(net, tensorboard=False, unroll_simulation=50,
                             device="/gpu:0") as sim:
-        sim.run_steps(150, profile=True)
+        report = sim.run_steps(150, profile=True)
+
+    print(report)
+    report.to_csv("%s/nengo_dl_profile.csv" % DATA_DIR)
 
 
 if __name__ == "__main__":
@@ -12,10 +12,9 @@ class Builder(object):
     build process."""
 
     builders = {}
-    op_builds = {}
 
     @classmethod
-    def pre_build(cls, ops, signals, rng):
+    def pre_build(cls, ops, signals, rng, op_builds):
         """Setup step for build classes, in which they compute any of the
         values that are constant across simulation timesteps.
 
@@ -28,6 +27,17 @@ class Builder(object):
             ``tf.Tensor`` (updated by operations)
         rng : :class:`~numpy:numpy.random.RandomState`
             random number generator instance
+        op_builds : dict of {tuple of \
+                             :class:`~nengo:nengo.builder.Operator`: \
+                             :class:`.OpBuilder`}
+            the build classes for the graph being constructed (the new
+            build class for ``ops`` will be added to this dict)
+
+        Notes
+        -----
+        The build classes are stored separately for each graph (rather than
+        on this class), because graphs with different minibatch sizes are
+        built from the same operator groups.
         """
 
         logger.debug("===================")
@@ -47,10 +57,10 @@ class Builder(object):
         if BuildClass.pass_rng:
             kwargs["rng"] = rng
 
-        cls.op_builds[ops] = BuildClass(ops, signals, **kwargs)
+        op_builds[ops] = BuildClass(ops, signals, **kwargs)
 
     @classmethod
-    def build(cls, ops, signals):
+    def build(cls, ops, signals, op_builds):
         """Build the computations implementing a single simulator timestep.
 
         Parameters
@@ -60,16 +70,21 @@ class Builder(object):
         signals : :class:`.signals.SignalDict`
             mapping from :class:`~nengo:nengo.builder.Signal` to
             ``tf.Tensor`` (updated by operations)
+        op_builds : dict of {tuple of \
+                             :class:`~nengo:nengo.builder.Operator`: \
+                             :class:`.OpBuilder`}
+            the build classes for the graph being constructed (see
+            :meth:`.pre_build`)
         """
 
         logger.debug("===================")
         logger.debug("BUILD %s", ops)
 
-        if ops not in cls.op_builds:
+        if ops not in op_builds:
             raise BuildError("Operators build has not been initialized "
                              "(missed pre-build step)")
 
-        output = cls.op_builds[ops].build_step(signals)
+        output = op_builds[ops].build_step(signals)
 
         if isinstance(output, (tf.Tensor, tf.Variable)):
             output = [output]
@@ -145,3 +160,17 @@ class OpBuilder(object):  # pragma: no cover
             used
         """
         raise BuildError("OpBuilders must implement a `build_step` function")
+
+    def reseed(self, rng):
+        """Reinitialize any random number generation in this build class,
+        without rebuilding the graph (only relevant for classes with
+        ``pass_rng=True``).
+
+        Parameters
+        ----------
+        rng : :class:`~numpy:numpy.random.RandomState`
+            random number generator instance (this should be consumed in
+            the same way as it is in the constructor, so that the result is
+            the same as building a new instance)
+        """
+        raise BuildError("%s does not support reseeding" % type(self).__name__)
@@ -237,130 +237,256 @@ def tree_planner(op_list, max_depth=3):
     -------
     list of tuple of :class:`~nengo:nengo.builder.Operator`
         operators combined into mergeable groups and in execution order
+        (the operators within each group are in the same order as in
+        ``op_list``)
+
+    Notes
+    -----
+    The number of available operators in each merge group is stored in an
+    array that is updated incrementally as groups are selected, so the last
+    step of the search (choosing the largest group) is a single ``argmax``,
+    and the other steps only need to consider the nonempty groups.
     """
 
-    def shortest_plan(selected, successors_of, predecessors_of, cache,
-                      max_depth, available):
+    def select(i):
+        """Schedule the available operators in group ``i``, and update the
+        available operators accordingly."""
+
+        group = available[i]
+        available[i] = set()
+        sizes[i] = 0
+        n_edges[i] = 0
+        for op in group:
+            for op2 in successors_of[op]:
+                predecessors_of[op2] -= 1
+
+                if predecessors_of[op2] == 0:
+                    available[group_of[op2]].add(op2)
+                    sizes[group_of[op2]] += 1
+                    n_edges[group_of[op2]] += len(successors_of[op2])
+
+        return group
+
+    def unselect(i, group):
+        """Undo the changes made by ``select(i)``."""
+
+        for op in group:
+            for op2 in successors_of[op]:
+                predecessors_of[op2] += 1
+
+                if predecessors_of[op2] == 1:
+                    available[group_of[op2]].remove(op2)
+                    sizes[group_of[op2]] -= 1
+                    n_edges[group_of[op2]] -= len(successors_of[op2])
+        available[i] = group
+        sizes[i] = len(group)
+        n_edges[i] = sum(len(successors_of[op]) for op in group)
+
+    def largest_group():
+        """Find the group with the most available operators (the first one,
+        if there are several)."""
+
+        i = int(np.argmax(sizes))
+        if sizes[i] == 0:
+            raise BuildError("Cycle detected during graph optimization")
+        return i
+
+    def final_length(i, n_remaining, sizes_list, order):
+        """Compute the length of the best plan that selects group ``i`` and
+        then one more group (the last step of the search).
+
+        Only the size of the largest group after selecting group ``i`` is
+        needed for this, which is either the size of a group whose
+        availability isn't changed by group ``i`` (the first one in
+        ``order``, the groups sorted by decreasing size) or the new size of
+        one of the affected groups.
+        """
+
+        # find the groups that gain available operators
+        gains = {}
+        successors = [op2 for op in available[i] for op2 in successors_of[op]]
+        for op2 in successors:
+            predecessors_of[op2] -= 1
+            if predecessors_of[op2] == 0:
+                g = group_of[op2]
+                gains[g] = gains.get(g, 0) + 1
+        for op2 in successors:
+            predecessors_of[op2] += 1
+
+        largest = 0
+        for j in order:
+            if j != i and j not in gains:
+                largest = sizes_list[j]
+                break
+        for g, n in gains.items():
+            largest = max(largest, n if g == i else sizes_list[g] + n)
+
+        if largest == 0:
+            raise BuildError("Cycle detected during graph optimization")
+
+        return n_remaining - largest + 1
+
+    def shortest_final_plan(n_remaining):
+        """Find the shortest plan with two more steps (the last two steps of
+        the search).
+
+        The groups are checked in order of a lower bound on the plan length
+        (after selecting group ``i``, the largest group can't be bigger than
+        the largest other group plus the number of successors of group
+        ``i``), so that we can stop once the bound exceeds the shortest plan
+        found so far.
+        """
+
+        nonempty = np.flatnonzero(sizes)
+        if len(nonempty) == 0:
+            raise BuildError("Cycle detected during graph optimization")
+
+        group_sizes = sizes[nonempty]
+        order = np.argsort(-group_sizes, kind="mergesort")
+        largest = np.where(
+            np.arange(len(nonempty)) == order[0], group_sizes[order[1]] if
+            len(order) > 1 else 0, group_sizes[order[0]])
+        new_lens = n_remaining - group_sizes
+        bounds = np.where(new_lens == 0, 1,
+                          new_lens - largest - n_edges[nonempty] + 2)
+
+        sizes_list = sizes.tolist()
+        order = nonempty[order].tolist()
+        new_lens = new_lens.tolist()
+        bounds = bounds.tolist()
+        nonempty = nonempty.tolist()
+
+        shortest = (None, None)
+        for j in sorted(range(len(nonempty)), key=bounds.__getitem__):
+            if shortest[0] is not None and bounds[j] > shortest[1]:
+                break
+
+            i = nonempty[j]
+            if new_lens[j] == 0:
+                # we've reached the end, so there are no remaining operators
+                # after selecting this group
+                length = 1
+            else:
+                length = final_length(i, new_lens[j], sizes_list, order) + 1
+
+            # note: if several groups result in the same length, we select
+            # the first one
+            if (shortest[0] is None or length < shortest[1] or
+                    (length == shortest[1] and i < shortest[0])):
+                shortest = (i, length)
+
+        return shortest
+
+    def shortest_plan(selected, n_remaining, depth, cache):
         """Recursively check what the shortest plan is after selecting each
-        available group."""
-
-        shortest = (None, len(successors_of) + 1)
-        nonempty_available = [x for x in enumerate(available) if len(x[1]) > 0]
-        n_remaining = len(successors_of) - len(selected)
-        for i, group in nonempty_available:
-            new_len = n_remaining - len(group)
-
-            if max_depth == 1 or new_len == 0:
-                # we've reached the end, so just return the number
-                # of remaining operators after selecting this group
-                result, length = [], new_len
+        available group.
+
+        Returns the first group in the shortest plan, and the length of that
+        plan (the number of groups selected plus the number of operators
+        remaining after ``depth`` steps).
+        """
+
+        if depth == 2:
+            shortest = shortest_final_plan(n_remaining)
+            cache[depth][selected] = shortest[1]
+            return shortest
+
+        shortest = (None, None)
+        for i in np.flatnonzero(sizes).tolist():
+            new_len = n_remaining - sizes[i]
+
+            if new_len == 0:
+                # we've reached the end, so there are no remaining operators
+                # after selecting this group
+                length = 0
             else:
-                # update the selected ops after adding group
-                new_selected = selected | group
+                new_selected = selected | available[i]
 
                 try:
                     # check if we've already computed the shortest path
                     # for the selected ops and depth
-                    result, length = cache[max_depth - 1][new_selected]
-
+                    length = cache[depth - 1][new_selected]
                 except KeyError:
-                    # update the list of available items after selecting
-                    # this group
-                    available[i] = set()
-                    successors = [x for op in group for x in successors_of[op]]
-                    for op in successors:
-                        predecessors_of[op] -= 1
-
-                        if predecessors_of[op] == 0:
-                            available[mergeable_cache[op]].add(op)
-
-                    # recursively find the best plan on the remaining
-                    # operators
-                    result, length = shortest_plan(
-                        new_selected, successors_of, predecessors_of, cache,
-                        max_depth - 1, available)
-
-                    # return the available list to its original state for
-                    # the next group (note: this is faster than copying
-                    # the list)
-                    for op in successors:
-                        predecessors_of[op] += 1
-
-                        if predecessors_of[op] == 1:
-                            available[mergeable_cache[op]].remove(op)
-                    available[i] = group
-
-            if length + 1 < shortest[1]:
+                    group = select(i)
+                    length = shortest_plan(new_selected, new_len, depth - 1,
+                                           cache)[1]
+                    unselect(i, group)
+
+            if shortest[0] is None or length + 1 < shortest[1]:
                 # new shortest path found
-                shortest = ([tuple(group)] + result, length + 1)
+                shortest = (i, length + 1)
 
         if shortest[0] is None:
             raise BuildError("Cycle detected during graph optimization")
 
-        cache[max_depth][selected] = shortest
+        cache[depth][selected] = shortest[1]
 
         return shortest
 
     # compute operator dependency graph
-    successors_of = operator_dependency_graph(op_list)
+    dependency_graph = operator_dependency_graph(op_list)
 
     # convert operators to integer indices (to save memory and make
     # lookup faster)
-    op_codes = {op: np.uint32(i) for i, op in enumerate(op_list)}
-    successors_of = {op_codes[k]: set(op_codes[x] for x in v)
-                     for k, v in successors_of.items()}
+    op_codes = {op: i for i, op in enumerate(op_list)}
+    successors_of = [None for _ in op_list]
+    for k, v in dependency_graph.items():
+        successors_of[op_codes[k]] = sorted(op_codes[x] for x in v)
 
     # track the number of incoming edges to each operator
-    predecessors_of = {}
-    for op in successors_of:
-        predecessors_of[op] = 0
-    for op, dests in successors_of.items():
-        for op2 in dests:
-            predecessors_of[op2] += 1
+    predecessors_of = [0 for _ in op_list]
+    for dests in successors_of:
+        for op in dests:
+            predecessors_of[op] += 1
 
     # precompute which operators are theoretically mergeable (this doesn't mean
     # we can actually merge these ops, since they may be dependent on one
-    # another)
-    mergeable_cache = [None for _ in op_list]
+    # another).  note: operators can only be merged if they have the same
+    # builder and number of signals, so we only need to check the groups
+    # with matching properties (in the order they were created)
+    group_of = [None for _ in op_list]
     groups = []
+    candidates = defaultdict(list)
     for j, op in enumerate(op_list):
-        for i, g in enumerate(groups):
-            if mergeable(op, g):
-                mergeable_cache[j] = i
-                g.append(op)
+        key = (builder.Builder.builders.get(type(op), None), len(op.sets),
+               len(op.incs), len(op.reads), len(op.updates))
+        for i in candidates[key]:
+            if mergeable(op, groups[i]):
+                group_of[j] = i
+                groups[i].append(op)
                 break
         else:
-            mergeable_cache[j] = len(groups)
+            group_of[j] = len(groups)
+            candidates[key].append(len(groups))
             groups.append([op])
-    groups = [[op_codes[x] for x in g] for g in groups]
 
     # find the ops that could be scheduled next in each merge group
-    available = [set(op for op in g if predecessors_of[op] == 0)
-                 for g in groups]
+    available = [set() for _ in groups]
+    for op, n in enumerate(predecessors_of):
+        if n == 0:
+            available[group_of[op]].add(op)
+    sizes = np.array([len(x) for x in available], dtype=np.int64)
 
-    plan = []
-    while len(successors_of) > 0:
-        # find the best plan of the given depth
-        short_plan, _ = shortest_plan(
-            frozenset(), successors_of, predecessors_of,
-            [{} for _ in range(max_depth + 1)], max_depth, available)
+    # the number of outgoing edges from the available ops in each group
+    n_edges = np.array([sum(len(successors_of[op]) for op in x)
+                        for x in available], dtype=np.int64)
 
-        # select the first item in that plan (i.e., the best group to select
-        # after looking ahead for max_depth steps)
-        selected = short_plan[0]
-        plan.append(selected)
+    plan = []
+    n_remaining = len(op_list)
+    while n_remaining > 0:
+        # find the best plan of the given depth, and select the first item
+        # in that plan (i.e., the best group to select after looking ahead
+        # for max_depth steps)
+        if max_depth == 1:
+            i = largest_group()
+        else:
+            i, _ = shortest_plan(frozenset(), n_remaining, max_depth,
+                                 [{} for _ in range(max_depth + 1)])
 
         # update the operator availability
-        available[mergeable_cache[next(iter(selected))]] = set()
-        for op in selected:
-            for op2 in successors_of[op]:
-                predecessors_of[op2] -= 1
-
-                if predecessors_of[op2] == 0:
-                    available[mergeable_cache[op2]].add(op2)
-
-            del predecessors_of[op]
-            del successors_of[op]
+        selected = select(i)
+        plan.append(tuple(sorted(selected)))
+        n_remaining -= len(selected)
 
     # convert indices back to operators
     plan = [tuple(op_list[x] for x in g) for g in plan]
@@ -1055,7 +1181,8 @@ def noop_order_signals(plan, **kwargs):
     return all_signals, plan
 
 
-def create_signals(sigs, plan, float_type, minibatch_size):
+def create_signals(sigs, plan, float_type, minibatch_size,
+                   trainable_float_type=None):
     """Groups signal data together into larger arrays, and represent each
     individual signal as a slice into that array.
 
@@ -1070,6 +1197,10 @@ def create_signals(sigs, plan, float_type, minibatch_size):
         floating point precision to use for signals
     minibatch_size : int
         number of items in each minibatch
+    trainable_float_type : ``np.float32`` or ``np.float64``, optional
+        floating point precision to use for trainable signals (if None, uses
+        ``float_type``); this allows trainable parameters to be stored at a
+        higher precision than the rest of the simulation
 
     Returns
     -------
@@ -1120,7 +1251,8 @@ def create_signals(sigs, plan, float_type, minibatch_size):
 
         # convert to appropriate dtype
         if np.issubdtype(sig.dtype, np.float):
-            dtype = float_type
+            dtype = (trainable_float_type if sig.trainable and
+                     trainable_float_type is not None else float_type)
         elif np.issubdtype(sig.dtype, np.integer):
             dtype = np.int32
         else:
@@ -0,0 +1,296 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from nengo_dl import DATA_DIR, version
+
+logger = logging.getLogger(__name__)
+
+
+class PlanCache(object):
+    """Stores the optimized execution plan and signal ordering for a model on
+    disk, so that the graph optimization steps can be skipped the next time
+    the same model is simulated.
+
+    Cache entries are keyed on a structural hash of the model operators (the
+    operator types and the shape/layout of the signals they access), so
+    models that are rebuilt from the same network definition (e.g., in a new
+    process) will map to the same entry.  The ``nengo_dl`` version is also
+    part of the key, so plans computed by a different release (whose planner
+    or signal ordering may have changed) will not be reused.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        directory in which the cached plans will be stored (if None, defaults
+        to ``<nengo_dl>/data/plan_cache``)
+    limit : int, optional
+        maximum total size (in bytes) of the cached files; when this is
+        exceeded the least recently used entries are removed
+
+    Attributes
+    ----------
+    hits : int
+        the number of times a plan was successfully loaded from the cache
+    misses : int
+        the number of times a plan was requested but not found in the cache
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, cache_dir=None, limit=100 * 1024 ** 2):
+        self.cache_dir = (os.path.join(DATA_DIR, "plan_cache")
+                          if cache_dir is None else cache_dir)
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, operators, **params):
+        """Compute the cache key for a list of operators.
+
+        Parameters
+        ----------
+        operators : list of :class:`~nengo:nengo.builder.Operator`
+            the operators to be planned (in the order they will be passed
+            to the planner)
+        params : dict
+            any other values that should be included in the key (e.g., dtype
+            or planner settings)
+
+        Returns
+        -------
+        str
+            hex digest uniquely identifying the structure of ``operators``
+            and ``params``
+        """
+
+        h = hashlib.sha1()
+        h.update(("nengo_dl=%s;" % version.version).encode("utf-8"))
+        for k in sorted(params):
+            h.update(("%s=%s;" % (k, params[k])).encode("utf-8"))
+
+        base_idxs = {}
+        for op in operators:
+            h.update(type(op).__name__.encode("utf-8"))
+
+            # operator-specific properties that affect which operators
+            # can be merged (see `graph_optimizer.mergeable`)
+            for attr in ("neurons", "process"):
+                if hasattr(op, attr):
+                    h.update(type(getattr(op, attr)).__name__.encode("utf-8"))
+            for attr in ("mode", "inc"):
+                if hasattr(op, attr):
+                    h.update(str(getattr(op, attr)).encode("utf-8"))
+            if hasattr(op, "t"):
+                h.update(str(op.t is None).encode("utf-8"))
+
+            for group in (op.sets, op.incs, op.reads, op.updates):
+                h.update(b"|")
+                for sig in group:
+                    # note: we identify signals by the order in which their
+                    # base is first accessed, rather than by name, because
+                    # names are not guaranteed to be consistent across builds
+                    base = base_idxs.setdefault(sig.base, len(base_idxs))
+                    h.update(str((
+                        base, sig.shape, sig.base.shape,
+                        getattr(sig, "elemoffset", None),
+                        getattr(sig, "elemstrides", None),
+                        np.dtype(sig.dtype).str,
+                        getattr(sig, "trainable", None),
+                        getattr(sig, "minibatched", None))).encode("utf-8"))
+
+        return h.hexdigest()
+
+    def load(self, key, operators):
+        """Load a cached plan.
+
+        Parameters
+        ----------
+        key : str
+            cache key (see :meth:`.get_key`)
+        operators : list of :class:`~nengo:nengo.builder.Operator`
+            the operators that were used to compute ``key``
+
+        Returns
+        -------
+        sigs : list of :class:`~nengo:nengo.builder.Signal`
+            base signals in the order in which they should be arranged in
+            memory
+        plan : list of tuple of :class:`~nengo:nengo.builder.Operator`
+            operators combined into mergeable groups and in execution order
+
+        Returns None if there is no cached plan for ``key``.
+        """
+
+        path = self._key2path(key)
+
+        try:
+            with np.load(path) as data:
+                group_sizes = data["group_sizes"]
+                op_idxs = data["ops"]
+                sig_idxs = data["sigs"]
+        except (IOError, OSError, KeyError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning("Could not load cached plan %s (%s)", path, e)
+                self._remove(path)
+            self.misses += 1
+            return None
+
+        bases = self._get_bases(operators)
+        if (len(op_idxs) != len(operators) or
+                len(sig_idxs) != len(bases) or
+                np.any(op_idxs >= len(operators)) or
+                np.any(sig_idxs >= len(bases))):
+            logger.warning("Cached plan %s does not match operators", path)
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # mark this entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:  # pragma: no cover
+            pass
+
+        plan = []
+        offset = 0
+        for n in group_sizes:
+            plan.append(tuple(operators[i]
+                              for i in op_idxs[offset:offset + n]))
+            offset += n
+        sigs = [bases[i] for i in sig_idxs]
+
+        self.hits += 1
+        logger.info("Loaded cached plan %s", path)
+
+        return sigs, plan
+
+    def store(self, key, operators, sigs, plan):
+        """Add a plan to the cache.
+
+        Parameters
+        ----------
+        key : str
+            cache key (see :meth:`.get_key`)
+        operators : list of :class:`~nengo:nengo.builder.Operator`
+            the operators that were used to compute ``key``
+        sigs : list of :class:`~nengo:nengo.builder.Signal`
+            base signals in the order in which they should be arranged in
+            memory
+        plan : list of tuple of :class:`~nengo:nengo.builder.Operator`
+            operators combined into mergeable groups and in execution order
+        """
+
+        op_codes = {op: i for i, op in enumerate(operators)}
+        base_codes = {s: i for i, s in enumerate(self._get_bases(operators))}
+
+        if not os.path.isdir(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+            except OSError:  # pragma: no cover
+                # can happen if the directory was created by another process
+                if not os.path.isdir(self.cache_dir):
+                    raise
+
+        path = self._key2path(key)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    group_sizes=np.asarray([len(ops) for ops in plan],
+                                           dtype=np.int64),
+                    ops=np.asarray([op_codes[op] for ops in plan
+                                    for op in ops], dtype=np.int64),
+                    sigs=np.asarray([base_codes[s] for s in sigs],
+                                    dtype=np.int64))
+            if os.path.exists(path):
+                self._remove(path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            logger.warning("Could not write plan cache file %s (%s)", path, e)
+            self._remove(tmp_path)
+            return
+
+        logger.info("Stored plan in cache %s", path)
+
+        self.shrink()
+
+    def get_size(self):
+        """Returns the total size (in bytes) of the cached files."""
+
+        return sum(size for _, size, _ in self._get_files())
+
+    def shrink(self, limit=None):
+        """Reduces the size of the cache to meet a limit, by removing the
+        least recently used entries.
+
+        Parameters
+        ----------
+        limit : int, optional
+            maximum size of the cache in bytes (if None, uses
+            ``self.limit``)
+        """
+
+        if limit is None:
+            limit = self.limit
+
+        files = sorted(self._get_files(), key=lambda x: x[2])
+        size = sum(x[1] for x in files)
+        for path, file_size, _ in files:
+            if size <= limit:
+                break
+            self._remove(path)
+            size -= file_size
+
+    def invalidate(self):
+        """Removes all entries from the cache."""
+
+        for path, _, _ in self._get_files():
+            self._remove(path)
+
+    @staticmethod
+    def _get_bases(operators):
+        """Returns all the unique base signals in ``operators``, in the order
+        in which they are first accessed."""
+
+        bases = []
+        seen = set()
+        for op in operators:
+            for sig in op.all_signals:
+                if sig.base not in seen:
+                    seen.add(sig.base)
+                    bases.append(sig.base)
+        return bases
+
+    def _get_files(self):
+        """Returns ``(path, size, access_time)`` for each cached file."""
+
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:  # pragma: no cover
+                continue
+            files.append((path, stat.st_size,
+                          max(stat.st_atime, stat.st_mtime)))
+
+        return files
+
+    def _key2path(self, key):
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
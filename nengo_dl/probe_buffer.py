@@ -0,0 +1,223 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeBuffer(object):
+    """Stores the output of a probe across simulation runs.
+
+    Data is appended in chunks (one per ``run_steps`` call) into a
+    preallocated array, which is grown as needed (doubling in size each
+    time, so that the cost of resizing is amortized across many appends).
+
+    Parameters
+    ----------
+    shape : tuple of int
+        the shape of the probe data on each timestep
+    dtype : ``np.dtype``
+        data type of the probe values
+
+    Attributes
+    ----------
+    version : int
+        incremented whenever the contents of the buffer change (can be used
+        to check whether previously read data is still up to date)
+    """
+
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.n_steps = 0
+        self.capacity = 0
+        self.version = 0
+        self._array = None
+
+    def append(self, data):
+        """Add new data to the end of the buffer.
+
+        Parameters
+        ----------
+        data : :class:`~numpy:numpy.ndarray`
+            probe data with shape ``(n_steps,) + self.shape``
+        """
+
+        n_steps = self.n_steps + data.shape[0]
+        if n_steps > self.capacity:
+            self._resize(max(n_steps, 2 * self.capacity))
+
+        if data.shape[0] > 0:
+            self._array[self.n_steps:n_steps] = data
+        self.n_steps = n_steps
+        self.version += 1
+
+    def clear(self):
+        """Discard all the data in the buffer.
+
+        Notes
+        -----
+        The underlying array is released rather than reused, so any data
+        that was previously read from the buffer remains valid.
+        """
+
+        self.n_steps = 0
+        self.capacity = 0
+        self.version += 1
+        self._array = None
+
+    def truncate(self, n_steps):
+        """Discard all the data after the first ``n_steps`` timesteps.
+
+        Parameters
+        ----------
+        n_steps : int
+            the number of timesteps to keep (has no effect if the buffer
+            does not contain more than ``n_steps`` timesteps)
+
+        Notes
+        -----
+        The remaining data is moved to a new array, so any data that was
+        previously read from the buffer remains valid.
+        """
+
+        if n_steps >= self.n_steps:
+            return
+
+        self.n_steps = n_steps
+        self.version += 1
+        self._resize(self.capacity)
+
+    @property
+    def data(self):
+        """(:class:`~numpy:numpy.ndarray`) A view of all the data stored in
+        the buffer, with shape ``(n_steps,) + self.shape``."""
+
+        if self._array is None:
+            return np.zeros((0,) + self.shape, dtype=self.dtype)
+
+        return self._array[:self.n_steps]
+
+    def _resize(self, capacity):
+        """Grow the buffer so that it can store ``capacity`` timesteps.
+
+        Parameters
+        ----------
+        capacity : int
+            new number of timesteps that can be stored in the buffer
+        """
+
+        array = np.empty((capacity,) + self.shape, dtype=self.dtype)
+        if self._array is not None:
+            array[:self.n_steps] = self._array[:self.n_steps]
+        self._array = array
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.n_steps
+
+
+class MemmapProbeBuffer(ProbeBuffer):
+    """A :class:`.ProbeBuffer` that stores data in a memory-mapped file on
+    disk, so that memory usage is independent of the length of the
+    simulation.
+
+    Parameters
+    ----------
+    path : str
+        location of the file in which data will be stored (will be
+        overwritten if it already exists)
+    shape : tuple of int
+        the shape of the probe data on each timestep
+    dtype : ``np.dtype``
+        data type of the probe values
+
+    Notes
+    -----
+    The arrays returned by :attr:`.data` are views on the underlying file.
+    :meth:`.clear` and :meth:`.truncate` move the buffer to a new file
+    (``path`` with a numbered suffix), so that data that was previously read
+    from the buffer is not overwritten.
+    """
+
+    def __init__(self, path, shape, dtype):
+        super(MemmapProbeBuffer, self).__init__(shape, dtype)
+
+        self.path = path
+        self._base_path = path
+        self._n_files = 0
+
+        # create an empty file
+        open(self.path, "wb").close()
+
+    def clear(self):
+        """Discard all the data in the buffer.
+
+        Notes
+        -----
+        New data is written to a new file, so any data that was previously
+        read from the buffer remains valid.
+        """
+
+        super(MemmapProbeBuffer, self).clear()
+        self._new_file()
+
+    def truncate(self, n_steps):
+        """Discard all the data after the first ``n_steps`` timesteps.
+
+        Parameters
+        ----------
+        n_steps : int
+            the number of timesteps to keep (has no effect if the buffer
+            does not contain more than ``n_steps`` timesteps)
+
+        Notes
+        -----
+        The remaining data is copied to a new file, so any data that was
+        previously read from the buffer remains valid.
+        """
+
+        if n_steps >= self.n_steps:
+            return
+
+        data = self._array[:n_steps]
+        self._array = None
+        self.capacity = 0
+        self.n_steps = 0
+        self._new_file()
+        self.append(data)
+
+    def _new_file(self):
+        """Move the buffer to a new (empty) file."""
+
+        old_path = self.path
+        self._n_files += 1
+        self.path = "%s.%d" % (self._base_path, self._n_files)
+        open(self.path, "wb").close()
+
+        # note: existing memory maps of the old file remain valid after it is
+        # deleted (on platforms that don't allow mapped files to be deleted
+        # it is left on disk instead)
+        try:
+            os.remove(old_path)
+        except OSError:
+            logger.debug("Could not remove probe buffer file %s", old_path)
+
+    def _resize(self, capacity):
+        logger.debug("Resizing probe buffer %s to %d steps", self.path,
+                     capacity)
+
+        if self._array is not None:
+            self._array.flush()
+
+        # note: we don't delete the existing memmap, since other arrays may
+        # still be referencing it (the new map will see the same data, and
+        # growing the file doesn't change the data they refer to)
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * int(np.prod(self.shape)) *
+                       self.dtype.itemsize)
+
+        self._array = np.memmap(self.path, dtype=self.dtype, mode="r+",
+                                shape=(capacity,) + self.shape)
+        self.capacity = capacity
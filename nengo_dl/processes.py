@@ -54,6 +54,10 @@ class SimProcessBuilder(OpBuilder):
     def build_step(self, signals):
         self.built_process.build_step(signals)
 
+    def reseed(self, rng):
+        if isinstance(self.built_process, GenericProcessBuilder):
+            self.built_process.reseed(rng)
+
 
 class GenericProcessBuilder(object):
     """Builds all process types for which there is no custom Tensorflow
@@ -73,14 +77,12 @@ class GenericProcessBuilder(object):
         self.output_shape = self.output_data.shape + (signals.minibatch_size,)
         self.mode = "inc" if ops[0].mode == "inc" else "update"
         self.prev_result = []
+        self.ops = ops
+        self.minibatch_size = signals.minibatch_size
+        self.dt = signals.dt_val
 
         # build the step function for each process
-        step_fs = [
-            [op.process.make_step(
-                op.input.shape if op.input is not None else (0,),
-                op.output.shape, signals.dt_val,
-                op.process.get_rng(rng))
-             for _ in range(signals.minibatch_size)] for op in ops]
+        self.reseed(rng)
 
         # `merged_func` calls the step function for each process and
         # combines the result
@@ -97,7 +99,7 @@ class GenericProcessBuilder(object):
                 mini_out = []
                 for j in range(signals.minibatch_size):
                     x = [] if op.input is None else [func_input[..., j]]
-                    mini_out += [step_fs[i][j](*([time] + x))]
+                    mini_out += [self.step_fs[i][j](*([time] + x))]
                 func_output += [np.stack(mini_out, axis=-1)]
 
             return np.concatenate(func_output, axis=0)
@@ -122,6 +124,25 @@ class GenericProcessBuilder(object):
 
         signals.scatter(self.output_data, result, mode=self.mode)
 
+    def reseed(self, rng):
+        """Recreate the process step functions using a new random number
+        generator.
+
+        This resets the internal state of the processes, without needing to
+        rebuild the graph.
+
+        Parameters
+        ----------
+        rng : :class:`~numpy:numpy.random.RandomState`
+            random number generator instance
+        """
+
+        self.step_fs = [
+            [op.process.make_step(
+                op.input.shape if op.input is not None else (0,),
+                op.output.shape, self.dt, op.process.get_rng(rng))
+             for _ in range(self.minibatch_size)] for op in self.ops]
+
 
 class LowpassBuilder(object):
     """Build a group of :class:`~nengo:nengo.LinearFilter`
@@ -0,0 +1,235 @@
+from collections import OrderedDict
+import csv
+import logging
+import re
+
+from nengo_dl import builder, utils
+
+logger = logging.getLogger(__name__)
+
+# categories used to summarize the profiling data by the kind of
+# computation being performed, independent of which builder created the op
+OP_GROUPS = OrderedDict([
+    ("py_func", ("PyFunc", "PyFuncStateless")),
+    ("scatter", ("ScatterUpdate", "ScatterAdd", "ScatterSub", "ScatterMul",
+                 "ScatterDiv", "ScatterNdUpdate", "ScatterNdAdd",
+                 "ScatterNdSub", "DynamicStitch", "Assign", "AssignAdd",
+                 "AssignSub")),
+    ("gather", ("Gather", "GatherV2", "GatherNd", "Slice", "StridedSlice")),
+    ("matmul", ("MatMul", "BatchMatMul", "SparseTensorDenseMatMul")),
+    ("control_flow", ("Enter", "Exit", "Merge", "Switch", "NextIteration",
+                      "LoopCond", "Identity", "NoOp")),
+    ("tensor_array", ("TensorArrayWriteV3", "TensorArrayReadV3",
+                      "TensorArrayGatherV3", "TensorArrayScatterV3",
+                      "TensorArrayV3", "TensorArraySizeV3")),
+])
+
+OTHER = "other"
+
+
+def op_group(op_type):
+    """Returns the :data:`.OP_GROUPS` category of the given op type.
+
+    Parameters
+    ----------
+    op_type : str
+        the TensorFlow op type (e.g., ``"MatMul"``)
+
+    Returns
+    -------
+    str
+        the name of the group containing ``op_type`` (or ``"other"`` if it is
+        not in any group)
+    """
+
+    for group, types in OP_GROUPS.items():
+        if op_type in types:
+            return group
+    return OTHER
+
+
+class ProfileReport(object):
+    """Aggregated timing information from a profiled simulation run.
+
+    Each op execution recorded in the TensorFlow trace is assigned to the
+    builder that created it (based on the name scope of the op) and to an
+    operator group (see :data:`.OP_GROUPS`), and the results are summed
+    across the whole run.
+
+    Parameters
+    ----------
+    records : list of dict
+        one entry for each op execution in the trace, with keys ``"name"``,
+        ``"op_type"``, ``"builder"``, ``"group"``, ``"device"``, ``"time"``
+        (in microseconds), and ``"bytes"`` (the size of the op outputs)
+
+    Attributes
+    ----------
+    columns : tuple of str
+        the fields in each row of the table returned by :meth:`.summary`
+    """
+
+    columns = ("total_time", "mean_time", "calls", "bytes")
+
+    def __init__(self, records):
+        self.records = records
+
+    @classmethod
+    def from_step_stats(cls, step_stats, graph=None):
+        """Create a report from the statistics collected by TensorFlow.
+
+        Parameters
+        ----------
+        step_stats : ``tf.StepStats``
+            the tracing information collected during a ``Session.run``
+            call (``run_metadata.step_stats``)
+        graph : ``tf.Graph``, optional
+            the graph that was executed (used to look up the op types; if
+            None, they will be parsed from the trace labels)
+
+        Returns
+        -------
+        :class:`.ProfileReport`
+            the aggregated profiling data
+        """
+
+        builder_names = set(
+            utils.sanitize_name(b.__name__)
+            for b in builder.Builder.builders.values())
+
+        records = []
+        for dev in step_stats.dev_stats:
+            # note: on the GPU the kernel times are recorded for each stream
+            # individually and then again in the combined "stream:all"
+            # device, so we skip the latter to avoid double counting
+            if dev.device.endswith("stream:all"):
+                continue
+
+            for node in dev.node_stats:
+                # node names can have extra information appended (e.g.
+                # "name:kernel_name" on the GPU streams)
+                name = node.node_name.split(":")[0]
+                if name in ("_SOURCE", "_SINK", "RecvTensor"):
+                    continue
+
+                records.append(dict(
+                    name=name,
+                    op_type=cls._op_type(name, node, graph),
+                    builder=cls._builder(name, builder_names),
+                    device=dev.device,
+                    time=node.all_end_rel_micros,
+                    bytes=sum(
+                        o.tensor_description.allocation_description.
+                        requested_bytes for o in node.output)))
+
+        for r in records:
+            r["group"] = op_group(r["op_type"])
+
+        logger.debug("Collected %d profiling records", len(records))
+
+        return cls(records)
+
+    def summary(self, by="builder"):
+        """Aggregate the profiling data.
+
+        Parameters
+        ----------
+        by : str or tuple of str, optional
+            the record field(s) used to group the data (e.g., ``"builder"``,
+            ``"group"``, ``"op_type"``, or ``("builder", "group")``)
+
+        Returns
+        -------
+        list of tuple
+            one ``(key, row)`` entry for each unique value of the ``by``
+            field(s), sorted by total time (descending), where ``row`` is a
+            dict with keys given by :attr:`.columns` (times are in seconds)
+        """
+
+        if isinstance(by, str):
+            by = (by,)
+
+        rows = OrderedDict()
+        for r in self.records:
+            key = tuple(r[k] for k in by)
+            row = rows.setdefault(key, dict(total_time=0, calls=0, bytes=0))
+            row["total_time"] += r["time"] * 1e-6
+            row["calls"] += 1
+            row["bytes"] += r["bytes"]
+
+        for row in rows.values():
+            row["mean_time"] = row["total_time"] / row["calls"]
+
+        if len(by) == 1:
+            rows = OrderedDict((k[0], v) for k, v in rows.items())
+
+        return sorted(rows.items(), key=lambda x: -x[1]["total_time"])
+
+    @property
+    def total_time(self):
+        """(float) The total time (in seconds) across all op executions."""
+
+        return sum(r["time"] for r in self.records) * 1e-6
+
+    def to_csv(self, path, by="builder"):
+        """Write the aggregated profiling data to a CSV file.
+
+        Parameters
+        ----------
+        path : str
+            the output file (will be overwritten if it already exists)
+        by : str or tuple of str, optional
+            the record field(s) used to group the data (see
+            :meth:`.summary`)
+        """
+
+        if isinstance(by, str):
+            by = (by,)
+
+        with utils.open_csv(path, "w") as f:
+            writer = csv.writer(f)
+            writer.writerow(by + self.columns)
+            for key, row in self.summary(by):
+                if len(by) == 1:
+                    key = (key,)
+                writer.writerow(key + tuple(row[c] for c in self.columns))
+
+    def __str__(self):
+        lines = ["%-30s %12s %12s %8s %12s" % (
+            "builder", "total (s)", "mean (s)", "calls", "bytes")]
+        for by in ("builder", "group"):
+            if by != "builder":
+                lines += ["", "%-30s" % by]
+            for key, row in self.summary(by):
+                lines += ["%-30s %12.6f %12.6f %8d %12d" % (
+                    key, row["total_time"], row["mean_time"], row["calls"],
+                    row["bytes"])]
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _op_type(name, node, graph):
+        """Look up the type of the op that produced a trace entry."""
+
+        if graph is not None:
+            try:
+                return graph.get_operation_by_name(name).type
+            except (KeyError, ValueError):
+                pass
+
+        # the timeline label has the format "name = OpType(inputs)"
+        match = re.search(r"=\s*([A-Za-z0-9_]+)\(", node.timeline_label)
+        return match.group(1) if match else OTHER
+
+    @staticmethod
+    def _builder(name, builder_names):
+        """Find the builder whose name scope contains the given op."""
+
+        # note: we search from the innermost scope, in case a builder is
+        # nested inside another (e.g., the builders of a merged operator)
+        for scope in reversed(name.split("/")[:-1]):
+            # tensorflow appends "_<n>" to repeated scope names
+            scope = re.sub(r"_\d+$", "", scope)
+            if scope in builder_names:
+                return scope
+        return OTHER
@@ -0,0 +1,428 @@
+from collections import deque
+import logging
+import threading
+import time
+
+from nengo.exceptions import SimulationError, SimulatorClosed, ValidationError
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ServingFuture(object):
+    """The pending result of a request submitted to a :class:`.BatchServer`.
+
+    Parameters
+    ----------
+    inputs : dict of {:class:`~nengo:nengo.Node`: \
+                      :class:`~numpy:numpy.ndarray`}
+        input values for the request, with shape ``(n_steps, node.size_out)``
+    n_steps : int
+        the number of timesteps to simulate
+
+    Attributes
+    ----------
+    submit_time : float
+        the time at which the request was submitted
+    finish_time : float
+        the time at which the result became available (None if the request
+        has not finished)
+    """
+
+    def __init__(self, inputs, n_steps):
+        self.inputs = inputs
+        self.n_steps = n_steps
+        self.submit_time = time.time()
+        self.finish_time = None
+
+        # requests can only be batched together if they run for the same
+        # number of steps and override the same input nodes
+        self.key = (n_steps, frozenset(inputs))
+
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def done(self):
+        """Returns True if the request has finished (successfully or not).
+        """
+
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the request to finish, and return the output.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            the maximum number of seconds to wait (if None, waits until the
+            request finishes)
+
+        Returns
+        -------
+        dict of {:class:`~nengo:nengo.Probe`: :class:`~numpy:numpy.ndarray`}
+            the output of each probe, with shape
+            ``(n_samples, probe.size_in)`` (where ``n_samples`` is
+            ``n_steps``, unless the probe has ``sample_every`` set)
+
+        Raises
+        ------
+        SimulationError
+            if the request did not finish within ``timeout`` seconds
+
+        Notes
+        -----
+        If an error occurred while simulating the request, it is re-raised
+        here.
+        """
+
+        if not self._event.wait(timeout):
+            raise SimulationError("Request did not finish within %s seconds"
+                                  % timeout)
+
+        if self._error is not None:
+            raise self._error
+
+        return self._result
+
+    @property
+    def latency(self):
+        """(float) The time (in seconds) between submitting the request and
+        its result becoming available (None if the request has not
+        finished)."""
+
+        if self.finish_time is None:
+            return None
+        return self.finish_time - self.submit_time
+
+
+class BatchServer(object):
+    """Combines many small, independent inference requests into minibatches
+    that are simulated together.
+
+    Each request occupies a single item of the simulator's minibatch.
+    Incoming requests are queued, and a batch is launched as soon as the
+    minibatch is full, or when the oldest request in the queue has been
+    waiting for ``max_latency`` seconds (in which case the unused minibatch
+    items are filled with zeros).  The results are then split up and
+    returned to each request's :class:`.ServingFuture`.
+
+    Parameters
+    ----------
+    sim : :class:`.Simulator`
+        the simulator used to execute the requests (its current minibatch
+        size determines the maximum number of requests per batch)
+    max_latency : float, optional
+        the maximum time (in seconds) a request will wait in the queue for
+        other requests to fill up the minibatch
+    probes : list of :class:`~nengo:nengo.Probe`, optional
+        the probes whose output is returned for each request (if None, all
+        the probes in the model are used)
+    latency_window : int, optional
+        the number of recent requests (or batches) used to compute the
+        latency (and queue depth/fill ratio) statistics (see
+        :meth:`.metrics`)
+
+    Notes
+    -----
+    The requests are executed in a background thread, so the simulator
+    should not be used directly while the server is running.  Each batch is
+    simulated from the initial network state (as in
+    :meth:`.Simulator.predict`).  The simulation state is saved before each
+    batch and restored afterwards (using the same mechanism as
+    :meth:`.Simulator.snapshot`, so this uses as much device memory as one
+    snapshot), so the state of the ongoing simulation and ``sim.data`` are
+    not affected.
+
+    Requests can only be batched together if they run for the same number
+    of steps and provide values for the same input nodes (input nodes that
+    are not given values compute their output as usual, which is the same
+    for every item in the batch).
+    """
+
+    def __init__(self, sim, max_latency=0.01, probes=None,
+                 latency_window=1000):
+        if sim.closed:
+            raise SimulatorClosed("Cannot serve requests from closed "
+                                  "Simulator.")
+        if max_latency < 0:
+            raise ValidationError("Must be non-negative", "max_latency")
+
+        self.sim = sim
+        self.max_latency = max_latency
+        self.probes = sim.model.probes if probes is None else probes
+        self.closed = False
+
+        self._queue = deque()
+        self._lock = threading.Condition()
+
+        # variables used to save the simulation state during each batch
+        # (note: these come from the same pool as the simulator snapshots)
+        slots = sim.tensor_graph.snapshot_slots
+        self._graph = sim.tensor_graph.graph
+        self._state_slot = (slots.pop() if len(slots) > 0 else
+                            sim.tensor_graph.build_snapshot())
+
+        # metrics (note: we only keep the recent values, so that memory
+        # usage doesn't grow over the lifetime of the server)
+        self._latencies = deque(maxlen=latency_window)
+        self._queue_depths = deque(maxlen=latency_window)
+        self._fill_ratios = deque(maxlen=latency_window)
+        self.n_requests = 0
+        self.n_batches = 0
+
+        self._thread = threading.Thread(target=self._worker,
+                                        name="nengo_dl_serving")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, inputs, n_steps):
+        """Add a request to the queue.
+
+        Parameters
+        ----------
+        inputs : dict of {:class:`~nengo:nengo.Node`: \
+                          :class:`~numpy:numpy.ndarray`}
+            input values for Nodes in the network, with shape
+            ``(n_steps, node.size_out)``
+        n_steps : int
+            the number of timesteps to simulate
+
+        Returns
+        -------
+        :class:`.ServingFuture`
+            the pending result of the request
+        """
+
+        if self.closed:
+            raise SimulationError("Cannot submit requests to closed "
+                                  "BatchServer")
+
+        if n_steps < 1:
+            raise ValidationError("Must be at least 1", "n_steps")
+
+        for n, x in inputs.items():
+            if n not in self.sim.tensor_graph.invariant_inputs:
+                raise ValidationError("%s is not an input Node" % n,
+                                      "inputs")
+            if x.shape != (n_steps, n.size_out):
+                raise ValidationError(
+                    "Shape of input data for %s (%s) does not match expected "
+                    "shape (n_steps, node.size_out) -> %s" % (
+                        n, x.shape, (n_steps, n.size_out)), "inputs")
+
+        future = ServingFuture(inputs, n_steps)
+        with self._lock:
+            self._queue.append(future)
+            self.n_requests += 1
+            self._lock.notify()
+
+        return future
+
+    def run(self, inputs, n_steps):
+        """Submit a request and wait for the result.
+
+        Parameters
+        ----------
+        inputs : dict of {:class:`~nengo:nengo.Node`: \
+                          :class:`~numpy:numpy.ndarray`}
+            input values for Nodes in the network, with shape
+            ``(n_steps, node.size_out)``
+        n_steps : int
+            the number of timesteps to simulate
+
+        Returns
+        -------
+        dict of {:class:`~nengo:nengo.Probe`: :class:`~numpy:numpy.ndarray`}
+            the output of each probe (see :meth:`.ServingFuture.result`)
+        """
+
+        return self.submit(inputs, n_steps).result()
+
+    def metrics(self):
+        """Summary statistics describing the server's performance.
+
+        Returns
+        -------
+        dict
+            ``"n_requests"`` and ``"n_batches"`` (the number of requests
+            submitted and batches executed), ``"queue_depth"`` (the current
+            number of queued requests), ``"mean_queue_depth"`` and
+            ``"max_queue_depth"`` (the number of queued requests when each
+            batch was launched), ``"fill_ratio"`` (the mean fraction of the
+            minibatch filled by requests), and ``"latency_p50"`` and
+            ``"latency_p99"`` (percentiles of the request latency in
+            seconds); all the statistics except the counts are computed over
+            the last ``latency_window`` batches/requests
+        """
+
+        with self._lock:
+            depths = list(self._queue_depths)
+            fills = list(self._fill_ratios)
+            latencies = list(self._latencies)
+            queue_depth = len(self._queue)
+
+        return dict(
+            n_requests=self.n_requests, n_batches=self.n_batches,
+            queue_depth=queue_depth,
+            mean_queue_depth=np.mean(depths) if depths else 0.0,
+            max_queue_depth=max(depths) if depths else 0,
+            fill_ratio=np.mean(fills) if fills else 0.0,
+            latency_p50=(np.percentile(latencies, 50) if latencies else
+                         None),
+            latency_p99=(np.percentile(latencies, 99) if latencies else
+                         None))
+
+    def close(self):
+        """Stop accepting new requests, and wait for the queued requests to
+        finish.
+
+        Notes
+        -----
+        This does not close the simulator.
+        """
+
+        with self._lock:
+            self.closed = True
+            self._lock.notify()
+
+        self._thread.join()
+
+        # return the state variables to the pool
+        if self._state_slot is not None:
+            if self.sim.tensor_graph.graph is self._graph:
+                self.sim.tensor_graph.snapshot_slots.append(self._state_slot)
+            self._state_slot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_batch(self):
+        """Wait for the next batch of requests to be ready.
+
+        Returns
+        -------
+        list of :class:`.ServingFuture`
+            the requests in the batch (empty if the server has been closed
+            and all the requests have been processed)
+        """
+
+        minibatch_size = self.sim.minibatch_size
+
+        with self._lock:
+            while len(self._queue) == 0:
+                if self.closed:
+                    return []
+                self._lock.wait()
+
+            # wait until the minibatch is full, or the oldest request has
+            # reached its deadline (we don't wait once the server is closed)
+            key = self._queue[0].key
+            deadline = self._queue[0].submit_time + self.max_latency
+            while not self.closed:
+                n_ready = sum(1 for f in self._queue if f.key == key)
+                remaining = deadline - time.time()
+                if n_ready >= minibatch_size or remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+
+            self._queue_depths.append(len(self._queue))
+
+            batch = []
+            waiting = deque()
+            while len(self._queue) > 0:
+                f = self._queue.popleft()
+                if f.key == key and len(batch) < minibatch_size:
+                    batch.append(f)
+                else:
+                    waiting.append(f)
+            self._queue = waiting
+
+        return batch
+
+    def _run_batch(self, batch):
+        """Simulate a batch of requests.
+
+        Parameters
+        ----------
+        batch : list of :class:`.ServingFuture`
+            the requests (all with the same ``key``)
+
+        Returns
+        -------
+        list of dict
+            the probe outputs for each request
+        """
+
+        sim = self.sim
+        n_steps = batch[0].n_steps
+
+        # combine the request inputs into minibatch arrays (padded with
+        # zeros)
+        inputs = {}
+        for n in batch[0].inputs:
+            inputs[n] = np.zeros((sim.minibatch_size, n_steps, n.size_out),
+                                 dtype=sim.tensor_graph.dtype.as_numpy_dtype)
+            for i, f in enumerate(batch):
+                inputs[n][i] = f.inputs[n]
+
+        probe_arrays = [
+            sim.tensor_graph.probe_arrays[sim.model.probes.index(p)]
+            for p in self.probes]
+
+        # note: the input functions are recreated for each batch, so that
+        # stateful input Nodes (e.g., with Process outputs) do not carry
+        # state from one batch of requests to the next
+        with sim._initial_input_funcs():
+            feed = sim._fill_feed(n_steps, inputs)
+
+        # note: the batch is simulated from the initial state, and then the
+        # state of the ongoing simulation is restored
+        sim.sess.run(self._state_slot[0])
+        try:
+            sim.soft_reset()
+            probe_data = sim.sess.run(probe_arrays, feed_dict=feed)
+        finally:
+            sim.sess.run(self._state_slot[1])
+
+        return [{p: (data[..., i] if sim.model.sig[p]["in"].minibatched else
+                     data) for p, data in zip(self.probes, probe_data)}
+                for i in range(len(batch))]
+
+    def _worker(self):
+        """Executes batches of requests until the server is closed."""
+
+        while True:
+            batch = self._next_batch()
+            if len(batch) == 0:
+                break
+
+            try:
+                results = self._run_batch(batch)
+                error = None
+            except Exception as e:
+                logger.exception("Error executing batch")
+                results = [None] * len(batch)
+                error = e
+
+            finish_time = time.time()
+            for f, result in zip(batch, results):
+                f._result = result
+                f._error = error
+                f.finish_time = finish_time
+
+            # note: we update the metrics before the results are released, so
+            # that they include all the finished requests
+            with self._lock:
+                self.n_batches += 1
+                self._fill_ratios.append(
+                    len(batch) / float(self.sim.minibatch_size))
+                self._latencies.extend(f.latency for f in batch)
+
+            for f in batch:
+                f._event.set()
+
+            logger.debug("Executed batch of %d requests", len(batch))
@@ -187,7 +187,8 @@ class SignalDict(object):
                        :class:`.TensorSignal`}
         mapping from ``nengo`` signals to ``nengo_dl`` signals
     dtype : ``tf.DType``
-        floating point precision used in signals
+        floating point precision used in signals (base arrays stored at a
+        different precision are cast to this type when they are read)
     minibatch_size : int
         number of items in each minibatch
     """
@@ -223,6 +224,12 @@ class SignalDict(object):
             raise BuildError("Tensor detected with wrong dtype (%s), should "
                              "be %s." % (val.dtype.base_dtype, self.dtype))
 
+        # the base array may be stored at a different precision than the
+        # simulation (e.g. trainable parameters with float16 simulation)
+        base_dtype = self.bases[dst.key].dtype.base_dtype
+        if val.dtype.is_floating and base_dtype != self.dtype:
+            val = tf.cast(val, base_dtype)
+
         # align val shape with dst base shape
         self.bases[dst.key].get_shape().assert_is_fully_defined()
         val.get_shape().assert_is_fully_defined()
@@ -345,6 +352,12 @@ class SignalDict(object):
         # the read)
         self.mark_gather(src)
 
+        # convert values stored at a different precision (e.g. trainable
+        # parameters with float16 simulation) to the simulation precision
+        if (result.dtype.is_floating and
+                result.dtype.base_dtype != self.dtype):
+            result = tf.cast(result, self.dtype)
+
         return result
 
     def mark_gather(self, src):
@@ -1,22 +1,29 @@
 from __future__ import print_function, division
 
 from collections import Mapping
+import contextlib
 import datetime
 import logging
 import os
+import pickle
+import shutil
+import tempfile
 import time
 import warnings
 
 from nengo import Process
 from nengo.builder import Model
+from nengo.builder.signal import Signal
 from nengo.exceptions import (ReadonlyError, SimulatorClosed, NengoWarning,
-                              SimulationError)
+                              SimulationError, BuildError, ValidationError)
 import numpy as np
 import tensorflow as tf
 from tensorflow.python.client.timeline import Timeline
 from tensorflow.python.ops import gradient_checker
 
-from nengo_dl import utils, DATA_DIR
+from nengo_dl import utils, version, DATA_DIR
+from nengo_dl.probe_buffer import ProbeBuffer, MemmapProbeBuffer
+from nengo_dl.profiling import ProfileReport
 from nengo_dl.tensor_graph import TensorGraph
 from nengo_dl.utils import print_and_flush
 
@@ -38,7 +45,9 @@ class Simulator(object):
     model : :class:`~nengo:nengo.builder.Model`, optional
         pre-built model object
     dtype : ``tf.DType``, optional
-        floating point precision to use for simulation
+        floating point precision to use for simulation (if ``tf.float16``,
+        trainable parameters are stored at ``tf.float32`` precision, and loss
+        scaling is used during training)
     device : None or ``"/cpu:0"`` or ``"/gpu:[0-n]"``, optional
         device on which to execute computations (if None then uses the
         default device as determined by Tensorflow)
@@ -46,12 +55,39 @@ class Simulator(object):
         unroll simulation loop by explicitly building the given number of
         iterations into the computation graph (improves simulation speed
         but increases build time)
-    minibatch_size : int, optional
+    minibatch_size : int or list of int, optional
         the number of simultaneous inputs that will be passed through the
-        network
+        network; if a list is given, the simulator can be switched between
+        those minibatch sizes without rebuilding the model (see
+        :meth:`.set_minibatch_size`), starting with the smallest
     tensorboard : bool, optional
         if True, save network output in the Tensorflow summary format,
         which can be loaded into Tensorboard
+    plan_cache : :class:`.plan_cache.PlanCache`, optional
+        if not None, the optimized operator plan will be loaded from (or
+        saved to) the given cache, which avoids repeating the graph
+        optimization steps when the same model is simulated again
+    probe_dir : str, optional
+        if not None, probe data will be stored in memory-mapped files in
+        this directory rather than in memory (so that memory usage does not
+        grow with the length of the simulation); the files are deleted when
+        the simulator is closed
+    jit : bool, optional
+        if True, compile the simulation step with XLA (operators that cannot
+        be compiled are reported in a warning, and executed normally)
+    build_callback : callable, optional
+        function that will be called with ``(phase, stats)`` as each phase
+        of the build process completes (see :class:`.utils.BuildStats`)
+    inference_only : bool, optional
+        if True, build a forward-only graph, in which the trainable
+        parameters are constants and no values are kept for backpropagation
+        (the simulator cannot be trained, see :meth:`.freeze`)
+
+    Attributes
+    ----------
+    build_stats : :class:`.utils.BuildStats`
+        the time, memory usage, and operator/array counts for each phase of
+        the build process
     """
 
     # unsupported unit tests
@@ -72,11 +108,6 @@ class Simulator(object):
          "time is passed as np.float32, not a float (see "
          "tests/test_nengo_tests.py:test_args"),
 
-        ("nengo/tests/test_node.py:test_unconnected_node",
-         "need to set `unroll_simulation` to ensure node runs the correct "
-         "number of times (see "
-         "tests/test_nengo_tests.py:test_unconnected_node"),
-
         # TODO: put this test back in when we bump nengo version
         ("nengo/utils/tests/test_ensemble.py:test_tuning_curves[*",
          "this test is not compatible with numpy>=1.13"),
@@ -84,13 +115,12 @@ class Simulator(object):
 
     def __init__(self, network, dt=0.001, seed=None, model=None,
                  dtype=tf.float32, device=None, unroll_simulation=1,
-                 minibatch_size=None, tensorboard=False,
+                 minibatch_size=None, tensorboard=False, plan_cache=None,
+                 probe_dir=None, jit=False,
+                 build_callback=None, inference_only=False,
                  step_blocks="deprecated"):
-        self.closed = None
-        self.sess = None
-        self.tensorboard = tensorboard
-        self.unroll = unroll_simulation
-        self.minibatch_size = 1 if minibatch_size is None else minibatch_size
+        self._init_attributes(unroll_simulation, minibatch_size, tensorboard,
+                              probe_dir, build_callback)
 
         if step_blocks != "deprecated" or isinstance(unroll_simulation, bool):
             # TODO: remove this in 0.5
@@ -116,25 +146,93 @@ class Simulator(object):
         if network is not None:
             print_and_flush("Building network", end="")
             start = time.time()
-            self.model.build(network, progress_bar=False)
+            with self.build_stats.phase("model_build") as counts:
+                self.model.build(network, progress_bar=False)
+                counts["n_ops"] = len(self.model.operators)
             print("\rBuilding completed in %s " %
                   datetime.timedelta(seconds=int(time.time() - start)))
 
         # set up tensorflow graph plan
-        self.tensor_graph = TensorGraph(
+        tensor_graph = TensorGraph(
             self.model, self.dt, unroll_simulation, dtype, self.minibatch_size,
-            device)
+            device, plan_cache=plan_cache, jit=jit,
+            build_stats=self.build_stats, inference_only=inference_only)
+
+        self._init_graphs(
+            tensor_graph,
+            {p: ((None if minibatch_size is None else self.minibatch_size)
+                 if self.model.sig[p]["in"].minibatched else -1)
+             for p in self.model.probes}, seed)
+
+    def _init_attributes(self, unroll_simulation, minibatch_size,
+                         tensorboard, probe_dir, build_callback):
+        """Sets up the simulator attributes that don't depend on the model
+        (shared by ``__init__`` and :meth:`.load`).
+
+        Parameters
+        ----------
+        unroll_simulation : int
+            the number of simulation steps unrolled in the graph
+        minibatch_size : int or list of int
+            the supported minibatch size(s) (the smallest is the initial
+            size)
+        tensorboard : bool
+            if True, save network output in the Tensorflow summary format
+        probe_dir : str
+            if not None, store probe data in memory-mapped files in this
+            directory
+        build_callback : callable
+            function called as each phase of the build process completes
+        """
+
+        self.closed = None
+        self.sess = None
+        self.build_stats = utils.BuildStats(callback=build_callback)
+        self.probe_dir = (None if probe_dir is None else
+                          tempfile.mkdtemp(prefix="nengo_dl_", dir=probe_dir))
+        self.tensorboard = tensorboard
+        self.unroll = unroll_simulation
+        if isinstance(minibatch_size, (list, tuple)):
+            if len(minibatch_size) == 0:
+                raise ValidationError("Must specify at least one minibatch "
+                                      "size", "minibatch_size")
+            self.minibatch_sizes = sorted(set(minibatch_size))
+        else:
+            self.minibatch_sizes = [
+                1 if minibatch_size is None else minibatch_size]
+        self.minibatch_size = self.minibatch_sizes[0]
+
+    def _init_graphs(self, tensor_graph, minibatches, seed):
+        """Sets up the TensorGraphs and probe data for ``self.model``, and
+        initializes the simulation (shared by ``__init__`` and
+        :meth:`.load`).
+
+        Parameters
+        ----------
+        tensor_graph : :class:`.TensorGraph`
+            the graph for the initial minibatch size
+        minibatches : dict of {:class:`~nengo:nengo.Probe`: int}
+            the minibatch size of the data for each probe (see
+            :class:`.ProbeDict`)
+        seed : int
+            the simulator seed (if None, a random seed is chosen)
+        """
+
+        self.tensor_graph = tensor_graph
 
-        self.data = ProbeDict(
-            self.model.params,
-            {p: (minibatch_size if self.model.sig[p]["in"].minibatched
-                 else -1) for p in self.model.probes})
+        # create tensorgraphs for the other minibatch sizes (these reuse the
+        # optimized plan, and their graphs are built on demand)
+        self.tensor_graphs = {self.minibatch_size: self.tensor_graph}
+        for mb in self.minibatch_sizes[1:]:
+            self.tensor_graphs[mb] = self.tensor_graph.with_minibatch_size(mb)
+
+        self.data = ProbeDict(self.model.params, minibatches)
 
         if seed is None:
             seed = np.random.randint(np.iinfo(np.int32).max)
         self.reset(seed=seed)
 
-    def reset(self, seed=None):
+    def reset(self, seed=None, rebuild=False):
         """Resets the simulator to initial conditions.
 
         Parameters
@@ -142,15 +240,22 @@ class Simulator(object):
         seed : int, optional
             if not None, overwrite the default simulator seed with this value
             (note: this becomes the new default simulator seed)
+        rebuild : bool, optional
+            if True, construct a new Tensorflow graph and session rather than
+            reinitializing the existing ones
+
+        Notes
+        -----
+        The structure of the graph does not depend on the seed, so by default
+        the existing graph is reused and only the state variables and random
+        number generators are reinitialized (which is much faster than
+        rebuilding the graph).  Note that random ops created inside
+        :class:`.TensorNode` functions are not affected by the seed.
         """
 
         if self.closed:
             raise SimulatorClosed("Cannot reset closed Simulator.")
 
-        # close old session
-        if self.sess is not None:
-            self.close()
-
         if seed is not None:
             self.seed = seed
 
@@ -160,17 +265,69 @@ class Simulator(object):
         tf.set_random_seed(self.seed)
 
         self.input_funcs = {}
+        self.input_func_states = {}
+
+        rebuild = rebuild or self.tensor_graph.graph is None
+        if not rebuild:
+            try:
+                self.tensor_graph.reseed(self.rng)
+            except BuildError as e:
+                # fall back to a full rebuild (with a fresh rng, since it may
+                # have been partially consumed)
+                logger.info("Rebuilding graph (%s)", e)
+                self.rng = np.random.RandomState(self.seed)
+                rebuild = True
+
+        if rebuild:
+            if self.sess is not None:
+                self.sess.close()
+                self.sess = None
+            self._build_graph()
+
+        with self.build_stats.phase("init_session"):
+            if self.sess is None:
+                self._open_session()
+
+            # initialize variables
+            self.soft_reset(include_trainable=True, include_probes=True)
+
+        self.n_steps = 0
+        self.time = 0.0
+        self.final_bases = [
+            x[0] for x in self.tensor_graph.base_arrays_init.values()]
+
+        # the random state from which the input functions are created (see
+        # `_initial_input_funcs`)
+        self._input_rng_state = self.rng.get_state()
+
+    def _build_graph(self):
+        """Constructs the Tensorflow graph for the current minibatch size."""
 
         # (re)build graph
-        # TODO: do we need to rebuild the graph?
         print_and_flush("Constructing graph", end="")
         start = time.time()
         self.tensor_graph.build(self.rng)
         print("\rConstruction completed in %s " %
               datetime.timedelta(seconds=int(time.time() - start)))
 
+        if self.tensor_graph.jit:
+            blockers = self.tensor_graph.jit_diagnostics()
+            for reason, ops in blockers.items():
+                logger.info("Operators blocking XLA compilation (%s): %s",
+                            reason, [op.name for op in ops])
+            if len(blockers) > 0:
+                warnings.warn(
+                    "Some operators in the simulation step cannot be "
+                    "compiled by XLA (%s); they will be executed outside "
+                    "the compiled clusters" % ", ".join(
+                        "%d %s" % (len(ops), reason)
+                        for reason, ops in sorted(blockers.items())),
+                    RuntimeWarning)
+
         # output graph description to tensorboard summary
         if self.tensorboard:
+            if getattr(self, "summary", None) is not None:
+                self.summary.close()
             directory = "%s/%s" % (DATA_DIR, self.model.toplevel.label)
             if os.path.isdir(directory):
                 run_number = max(
@@ -182,6 +339,9 @@ class Simulator(object):
                 "%s/run_%d" % (directory, run_number),
                 graph=self.tensor_graph.graph)
 
+    def _open_session(self):
+        """Starts a new session for the current graph."""
+
         # start session
         # note: we need to allow soft placement when using tf.while_loop,
         # because tensorflow pins loop variables to the CPU
@@ -191,22 +351,16 @@ class Simulator(object):
             allow_soft_placement=True,
             log_device_placement=False,
         )
-        # TODO: XLA compiling doesn't seem to provide any benefit at the
-        # moment, revisit later after tensorflow has developed it further
-        # config.graph_options.optimizer_options.global_jit_level = (
-        #     tf.OptimizerOptions.ON_1)
+        if self.tensor_graph.jit:
+            # note: this enables XLA compilation on the GPU; on the CPU only
+            # the operators in the simulation step (marked in
+            # `TensorGraph.build_loop`) are compiled
+            config.graph_options.optimizer_options.global_jit_level = (
+                tf.OptimizerOptions.ON_1)
 
         self.sess = tf.Session(graph=self.tensor_graph.graph, config=config)
         self.closed = False
 
-        # initialize variables
-        self.soft_reset(include_trainable=True, include_probes=True)
-
-        self.n_steps = 0
-        self.time = 0.0
-        self.final_bases = [
-            x[0] for x in self.tensor_graph.base_arrays_init.values()]
-
     def soft_reset(self, include_trainable=False, include_probes=False):
         """Resets the internal state of the simulation, but doesn't
         rebuild the graph.
@@ -227,10 +381,287 @@ class Simulator(object):
         self.sess.run(init_ops)
 
         if include_probes:
-            for p in self.model.probes:
-                self.model.params[p] = []
+            for i, p in enumerate(self.model.probes):
+                tensor_sig = self.tensor_graph.sig_map[self.model.sig[p]["in"]]
+                shape = tensor_sig.shape + ((self.minibatch_size,) if
+                                            tensor_sig.minibatched else ())
+                dtype = self.tensor_graph.dtype.as_numpy_dtype
+
+                buffer = self.model.params[p]
+                if (isinstance(buffer, MemmapProbeBuffer) and
+                        os.path.dirname(buffer.path) == self.probe_dir and
+                        buffer.shape == shape):
+                    # reuse the existing buffer (note: clearing moves it to
+                    # a new file, so previously read data isn't overwritten)
+                    buffer.clear()
+                    continue
+
+                if self.probe_dir is None:
+                    self.model.params[p] = ProbeBuffer(shape, dtype)
+                else:
+                    # note: the minibatch size is included in the filename
+                    # so that we don't overwrite a file with a different
+                    # shape that may still be memory-mapped
+                    self.model.params[p] = MemmapProbeBuffer(
+                        os.path.join(self.probe_dir, "probe_%d_%d.dat" % (
+                            i, self.minibatch_size)),
+                        shape, dtype)
             self.n_steps = 0
 
+    def freeze(self):
+        """Convert the simulator to a forward-only (inference) graph, with
+        the current values of the trainable parameters built into the graph
+        as constants.
+
+        This removes the overhead of reading the parameters from variables
+        and of keeping track of the values needed for backpropagation on
+        each timestep, as well as any optimizer/loss elements that were added
+        to the graph by :meth:`.train`.
+
+        Notes
+        -----
+        The graph is rebuilt, so the simulation is reset (as with
+        ``reset(rebuild=True)``).  After calling this function the simulator
+        cannot be trained.
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot freeze closed Simulator.")
+
+        if self.tensor_graph.inference_only:
+            return
+
+        # look up the current values of the trainable parameters
+        keys = [k for k, (_, trainable) in
+                self.tensor_graph.base_arrays_init.items() if trainable]
+        vals = self.sess.run([
+            v for v, (_, trainable) in zip(
+                self.tensor_graph.base_vars,
+                self.tensor_graph.base_arrays_init.values()) if trainable])
+
+        for tensor_graph in self.tensor_graphs.values():
+            tensor_graph.inference_only = True
+            for k, v in zip(keys, vals):
+                tensor_graph.base_arrays_init[k] = (v, True)
+
+            # note: the graphs for the other minibatch sizes will be rebuilt
+            # when they are next used
+            tensor_graph.graph = None
+
+        self.reset(rebuild=True)
+
+    def snapshot(self):
+        """Save a copy of the current simulation state.
+
+        The simulation can be returned to this state at any point in the
+        future by calling :meth:`.restore`, so many different continuations
+        can be simulated from the same starting point without repeating the
+        simulation up to that point.
+
+        Returns
+        -------
+        :class:`.SimulatorSnapshot`
+            the saved simulation state
+
+        Notes
+        -----
+        The snapshot includes the values of all the variables in the
+        simulation (including trainable parameters and variables created
+        inside TensorNodes), and is stored on the simulation device.  Each
+        snapshot uses as much memory as the simulation state, which is
+        released (for reuse by future snapshots) when the snapshot object is
+        deleted.
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot take snapshot of closed Simulator.")
+
+        slots = self.tensor_graph.snapshot_slots
+        slot = slots.pop() if len(slots) > 0 else (
+            self.tensor_graph.build_snapshot())
+        self.sess.run(slot[0])
+
+        return SimulatorSnapshot(
+            self.tensor_graph, slot, self.n_steps, self.rng.get_state(),
+            {p: len(self.model.params[p]) for p in self.model.probes},
+            dict(self.input_funcs), dict(self.input_func_states))
+
+    def restore(self, snapshot):
+        """Return the simulation to a previously saved state.
+
+        Parameters
+        ----------
+        snapshot : :class:`.SimulatorSnapshot`
+            simulation state saved with :meth:`.snapshot`
+
+        Notes
+        -----
+        Any probe data recorded after the snapshot was taken is discarded.
+
+        The internal state of Process step functions (e.g. in input Nodes
+        with ``output=nengo.processes.WhiteNoise()``) cannot be copied, so
+        instead those functions are recreated and advanced to the time of
+        the snapshot.
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot restore closed Simulator.")
+
+        if snapshot.graph is not self.tensor_graph.graph:
+            raise SimulationError(
+                "Snapshot was not created from the current simulation graph "
+                "(it may have been rebuilt, or the minibatch size changed)")
+
+        self.sess.run(snapshot.slot[1])
+
+        for p in self.model.probes:
+            self.model.params[p].truncate(snapshot.probe_steps[p])
+
+        self.rng.set_state(snapshot.rng_state)
+
+        self.input_funcs = dict(snapshot.input_funcs)
+        self.input_func_states = dict(snapshot.input_func_states)
+        for output, (node, rng_state, start) in (
+                snapshot.input_func_states.items()):
+            rng = np.random.RandomState()
+            rng.set_state(rng_state)
+            func = self._make_input_func(node, rng)
+            if snapshot.n_steps > start:
+                self._call_input_func(func, snapshot.n_steps - start, start)
+            self.input_funcs[output] = func
+
+        self.n_steps = snapshot.n_steps
+        self.time = self.n_steps * self.dt
+
+    def set_minibatch_size(self, minibatch_size):
+        """Switch the simulator to a different minibatch size.
+
+        The graph for each minibatch size is built the first time it is
+        used, after which switching is cheap (no new graph needs to be
+        constructed).  Only the session for the current minibatch size is
+        kept open, so memory usage scales with the current minibatch size.
+
+        Parameters
+        ----------
+        minibatch_size : int
+            the new minibatch size (must be one of the sizes passed to
+            ``Simulator(..., minibatch_size=[...])``)
+
+        Notes
+        -----
+        Trainable parameters (e.g., the results of :meth:`.train`) are
+        carried over to the new minibatch size, but the simulation state and
+        probe data are reset (as with :meth:`.reset`).
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot change minibatch size of closed "
+                                  "Simulator.")
+
+        if minibatch_size not in self.tensor_graphs:
+            raise SimulationError(
+                "Minibatch size %s is not supported by this Simulator (valid "
+                "sizes are %s)" % (minibatch_size, self.minibatch_sizes))
+
+        if minibatch_size == self.minibatch_size:
+            return
+
+        # save the trainable parameters
+        param_vals = self._get_trainable_params()
+
+        self.sess.close()
+        self.sess = None
+        self.minibatch_size = minibatch_size
+        self.tensor_graph = self.tensor_graphs[minibatch_size]
+        self.data.minibatches = {
+            p: minibatch_size if mb != -1 else -1
+            for p, mb in self.data.minibatches.items()}
+        self.data.cache = {}
+
+        self.reset()
+
+        # restore the trainable parameters
+        self._load_trainable_params(param_vals)
+
+    @contextlib.contextmanager
+    def _temporary_minibatch_size(self, minibatch_size):
+        """Context manager in which the simulator runs with a different
+        minibatch size.
+
+        Unlike :meth:`.set_minibatch_size`, the session for the current
+        minibatch size is kept open, so its simulation state and probe data
+        are not affected.  The other minibatch size is simulated in a new
+        session (starting from the initial state, with the current values of
+        the trainable parameters), which is closed on exit.
+
+        Parameters
+        ----------
+        minibatch_size : int
+            the minibatch size to use inside the context (must be one of the
+            sizes passed to ``Simulator(..., minibatch_size=[...])``)
+        """
+
+        if minibatch_size not in self.tensor_graphs:
+            raise SimulationError(
+                "Minibatch size %s is not supported by this Simulator (valid "
+                "sizes are %s)" % (minibatch_size, self.minibatch_sizes))
+
+        if minibatch_size == self.minibatch_size:
+            yield
+            return
+
+        param_vals = self._get_trainable_params()
+
+        saved = {k: getattr(self, k) for k in (
+            "sess", "tensor_graph", "minibatch_size", "rng", "input_funcs",
+            "input_func_states", "n_steps", "time", "final_bases",
+            "_input_rng_state")}
+        buffers = {p: self.model.params[p] for p in self.model.probes}
+
+        self.sess = None
+        self.minibatch_size = minibatch_size
+        self.tensor_graph = self.tensor_graphs[minibatch_size]
+        try:
+            self.reset()
+            self._load_trainable_params(param_vals)
+
+            yield
+        finally:
+            if self.sess is not None:
+                self.sess.close()
+
+            for k, v in saved.items():
+                setattr(self, k, v)
+            self.model.params.update(buffers)
+
+    def _get_trainable_params(self):
+        """Returns the current values of the trainable parameters.
+
+        Returns
+        -------
+        dict of {str: :class:`~numpy:numpy.ndarray`}
+            the value of each trainable variable, keyed by variable name
+        """
+
+        with self.tensor_graph.graph.as_default():
+            params = {v.name: v for v in tf.trainable_variables()}
+        return self.sess.run(params)
+
+    def _load_trainable_params(self, param_vals):
+        """Sets the values of the trainable parameters.
+
+        Parameters
+        ----------
+        param_vals : dict of {str: :class:`~numpy:numpy.ndarray`}
+            parameter values, keyed by variable name (as returned by
+            :meth:`._get_trainable_params`)
+        """
+
+        with self.tensor_graph.graph.as_default():
+            for v in tf.trainable_variables():
+                if v.name in param_vals:
+                    v.load(param_vals[v.name], self.sess)
+
     def step(self, **kwargs):
         """Run the simulation for one time step.
 
@@ -238,10 +669,46 @@ class Simulator(object):
         ----------
         kwargs : dict
             see :meth:`.run_steps`
+
+        Notes
+        -----
+        This goes through :meth:`.run_steps`, so it has the same overhead as
+        running a full simulation loop; see :meth:`.stepper` for executing
+        many individual steps with low latency.
         """
 
         self.run_steps(1, **kwargs)
 
+    def stepper(self, probes=None):
+        """Create an object that executes one simulation timestep at a time
+        with minimal overhead (e.g., for closed-loop control).
+
+        Parameters
+        ----------
+        probes : list of :class:`~nengo:nengo.Probe`, optional
+            the probes whose values are returned on each step (if None, all
+            the probes in the model are used)
+
+        Returns
+        -------
+        :class:`.SimulatorStepper`
+            executes individual simulation steps (see
+            :meth:`.SimulatorStepper.step`)
+
+        Notes
+        -----
+        The first call adds a subgraph for executing a single timestep
+        (without the simulation loop) to the graph, which takes about as long
+        as building the simulation loop with ``unroll_simulation=1``.
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot create stepper for closed "
+                                  "Simulator.")
+
+        return SimulatorStepper(
+            self, self.model.probes if probes is None else probes)
+
     def run(self, time_in_seconds, **kwargs):
         """Simulate for the given length of time.
 
@@ -271,26 +738,43 @@ class Simulator(object):
             if True, collect TensorFlow profiling information while the
             simulation is running (this will slow down the simulation)
 
+        Returns
+        -------
+        :class:`.ProfileReport`
+            if ``profile=True``, the profiling data aggregated by builder
+            type and operator group (otherwise None)
+
         Notes
         -----
         If ``unroll_simulation=x`` is specified, and ``n_steps > x``, this will
-        repeatedly execute ``x`` timesteps until the the number of steps
-        executed is >= ``n_steps``.
+        repeatedly execute ``x`` timesteps, and then execute any remaining
+        steps (if ``n_steps`` is not a multiple of ``x``) one at a time, so
+        that exactly ``n_steps`` steps are executed.
+
+        If the simulator was created with multiple minibatch sizes, the
+        first dimension of ``input_feeds`` must match the current minibatch
+        size; use :meth:`.set_minibatch_size` to switch to a different size
+        (which resets the simulation state).
         """
 
         if self.closed:
             raise SimulatorClosed("Simulator cannot run because it is closed.")
 
-        actual_steps = self.unroll * int(np.ceil(n_steps / self.unroll))
-
-        if actual_steps != n_steps:
-            warnings.warn(
-                "Number of steps (%d) is not an even multiple of "
-                "`unroll_simulation` (%d).  Simulation will run for %d steps, "
-                "which may have unintended side effects." %
-                (n_steps, self.unroll, actual_steps), RuntimeWarning)
-
         if input_feeds is not None:
+            if len(self.minibatch_sizes) > 1 and len(input_feeds) > 0:
+                shape = np.shape(next(iter(input_feeds.values())))
+                if (len(shape) > 0 and shape[0] != self.minibatch_size and
+                        shape[0] in self.tensor_graphs):
+                    # note: we don't switch automatically, because that
+                    # would silently discard the simulation state and
+                    # probe data
+                    raise SimulationError(
+                        "Input data has minibatch size %d, but the simulator "
+                        "is using minibatch size %d; call "
+                        "`sim.set_minibatch_size(%d)` to switch sizes (this "
+                        "resets the simulation state)" % (
+                            shape[0], self.minibatch_size, shape[0]))
+
             self._check_data(input_feeds, mode="out", check_mini=True,
                              n_steps=n_steps)
 
@@ -308,7 +792,7 @@ class Simulator(object):
         try:
             steps_run, probe_data = self.sess.run(
                 [self.tensor_graph.steps_run, self.tensor_graph.probe_arrays],
-                feed_dict=self._fill_feed(actual_steps, input_feeds,
+                feed_dict=self._fill_feed(n_steps, input_feeds,
                                           start=self.n_steps),
                 options=run_options, run_metadata=run_metadata)
         except (tf.errors.InternalError, tf.errors.UnknownError) as e:
@@ -323,10 +807,7 @@ class Simulator(object):
         self._update_probe_data(probe_data, self.n_steps, n_steps)
 
         # update n_steps
-        # note: we update n_steps according to the number of steps that the
-        # user asked for, not the number of steps that were actually run (
-        # in the case of uneven unroll_simulation)
-        assert steps_run == actual_steps
+        assert steps_run == n_steps
         self.n_steps += n_steps
         self.time = self.n_steps * self.dt
 
@@ -335,11 +816,21 @@ class Simulator(object):
             with open("%s/nengo_dl_profile.json" % DATA_DIR, "w") as f:
                 f.write(timeline.generate_chrome_trace_format())
 
+            report = ProfileReport.from_step_stats(
+                run_metadata.step_stats, graph=self.tensor_graph.graph)
+            logger.info("Profiling results:\n%s", report)
+        else:
+            report = None
+
         print("\rSimulation completed in %s" %
               datetime.timedelta(seconds=int(time.time() - start)))
 
+        return report
+
     def train(self, inputs, targets, optimizer, n_epochs=1, objective="mse",
-              shuffle=True):
+              shuffle=True, prefetch=2, truncation=None,
+              checkpoint_steps=None, accumulate_steps=1, validation=None,
+              eval_every=1, patience=None, restore_best=False):
         """Optimize the trainable parameters of the network using the given
         optimization method, minimizing the objective value over the given
         inputs and targets.
@@ -370,9 +861,66 @@ class Simulator(object):
             that Probe (loss will be averaged across Probes).
         shuffle : bool, optional
             if True, randomize the data into different minibatches each epoch
+        prefetch : int, optional
+            the number of minibatches to prepare in advance (in a background
+            thread, while the optimizer is running); if 0, each minibatch
+            is prepared when it is needed
+        truncation : int, optional
+            if not None, use truncated backpropagation through time: each
+            sequence is split into windows of ``truncation`` steps, and an
+            optimization step is applied after each window (the simulation
+            state is carried over from one window to the next, but gradients
+            are only propagated within a window)
+        checkpoint_steps : int, optional
+            if not None, each sequence is split into segments of
+            ``checkpoint_steps`` steps, and only the simulation state at the
+            start of each segment is stored during the forward pass; the
+            segments are then simulated again, in reverse order, to compute
+            the gradients (so, unlike ``truncation``, the gradients are
+            propagated through the whole sequence and the update is applied
+            once per sequence)
+        accumulate_steps : int, optional
+            if greater than 1, the gradients are accumulated over this many
+            minibatches (or ``truncation`` windows), and then the average is
+            applied as a single update; this allows training with an
+            effective batch size of ``accumulate_steps * minibatch_size``
+        validation : tuple of (dict, dict), optional
+            if not None, ``(inputs, targets)`` for a held-out dataset (with
+            the same structure as ``inputs``/``targets``) on which the
+            ``objective`` will be evaluated during training
+        eval_every : int, optional
+            evaluate the objective on the ``validation`` data after every
+            ``eval_every`` epochs
+        patience : int, optional
+            if not None, training will stop early if the validation loss has
+            not improved for this many evaluations
+        restore_best : bool, optional
+            if True, the trainable parameters are set to the values that had
+            the lowest validation loss at the end of training
+
+        Returns
+        -------
+        list of float
+            the validation loss after each evaluation (or None if
+            ``validation`` is None)
 
         Notes
         -----
+        With ``truncation``, memory usage depends on the window length
+        rather than the full sequence length, so this can be used to train
+        on sequences that are too long to fit in memory.
+        ``checkpoint_steps`` reduces the memory usage in the same way, without
+        truncating the gradients, at the cost of simulating every step twice.
+        The memory usage is lowest when ``checkpoint_steps`` is about
+        ``sqrt(n_steps)``.  Note that the loss of each segment is weighted by
+        the fraction of the sequence it covers, which matches the loss for the
+        whole sequence when the objective is an average over time (as with
+        ``"mse"``).
+
+        The validation loss is computed with the same loss ops as
+        :meth:`.loss` (so no gradients are computed), and a copy of the best
+        parameter values (for ``restore_best``) is kept in host memory.
+
         Most deep learning methods require the network to be differentiable,
         which means that trying to train a network with non-differentiable
         elements will result in an error.  Examples of common
@@ -393,39 +941,260 @@ class Simulator(object):
         if self.closed:
             raise SimulatorClosed("Simulator cannot be trained because it is "
                                   "closed.")
+        if self.tensor_graph.inference_only:
+            raise SimulationError("Simulator cannot be trained because it is "
+                                  "in inference-only mode.")
         self._check_data(inputs, mode="out", n_steps=n_steps)
         self._check_data(targets, mode="in", n_steps=n_steps)
 
+        if truncation is None:
+            truncation = n_steps
+        elif truncation <= 0:
+            raise SimulationError(
+                "Truncation length (%d) must be positive" % truncation)
+        elif checkpoint_steps is not None:
+            raise SimulationError(
+                "Cannot use truncation and checkpoint_steps at the same time")
+
+        checkpoint = checkpoint_steps is not None
+        if checkpoint:
+            if checkpoint_steps <= 0:
+                raise SimulationError(
+                    "Checkpoint length (%d) must be positive" %
+                    checkpoint_steps)
+
+            # note: the sequences are split into segments in the same way as
+            # the truncation windows
+            truncation = checkpoint_steps
+
         # check for non-differentiable elements in graph
         # utils.find_non_differentiable(
         #     [self.tensor_graph.invariant_ph[n] for n in inputs],
         #     [self.tensor_graph.probe_arrays[self.model.probes.index(p)]
         #      for p in targets])
 
+        if accumulate_steps < 1:
+            raise SimulationError("accumulate_steps (%d) must be >= 1" %
+                                  accumulate_steps)
+
+        if validation is not None:
+            val_inputs, val_targets = validation
+            val_steps = next(iter(val_inputs.values())).shape[1]
+            self._check_data(val_inputs, mode="out", n_steps=val_steps)
+            self._check_data(val_targets, mode="in", n_steps=val_steps)
+
+            if next(iter(val_inputs.values())).shape[0] < self.minibatch_size:
+                raise SimulationError(
+                    "Validation data must contain at least minibatch_size "
+                    "(%d) items" % self.minibatch_size)
+            if set(val_targets) != set(targets):
+                raise SimulationError(
+                    "Validation targets must be given for the same Probes "
+                    "as the training targets")
+            if eval_every < 1:
+                raise SimulationError("eval_every (%d) must be >= 1" %
+                                      eval_every)
+
         # build optimizer op
         opt_op, opt_slots_init = self.tensor_graph.build_optimizer(
-            optimizer, tuple(targets.keys()), objective)
+            optimizer, tuple(targets.keys()), objective,
+            accumulate_steps=accumulate_steps, checkpoint=checkpoint)
+        if checkpoint:
+            accumulate_op, opt_op, reset_op, state_grads = opt_op
+        elif accumulate_steps > 1:
+            accumulate_op, opt_op, reset_op = opt_op
 
         # initialize any variables that were created by the optimizer
         self.sess.run(opt_slots_init)
 
-        progress = utils.ProgressBar(
-            n_epochs * batch_size // self.minibatch_size, "Training")
+        if accumulate_steps > 1 or checkpoint:
+            # the accumulators are shared by all the calls to `train` with
+            # this optimizer, so we make sure that gradients left over from
+            # a previous call (an incomplete group of minibatches, or
+            # training that stopped early) are not added to the first update
+            self.sess.run(reset_op)
+
+        if validation is not None:
+            # note: the validation loss uses the same ops as the training
+            # loss, but it is run without the optimizer (so it is a
+            # forward pass only)
+            val_loss = self.tensor_graph.build_loss(
+                objective, tuple(targets.keys()))
+
+            # note: the validation feeds are computed once in advance, so
+            # that they don't interfere with the training minibatches being
+            # generated in the prefetch thread
+            val_feeds = [
+                self._fill_feed(val_steps, inp, tar)
+                for inp, tar in utils.minibatch_generator(
+                    val_inputs, val_targets, self.minibatch_size,
+                    shuffle=False)]
+
+            with self.tensor_graph.graph.as_default():
+                params = tf.trainable_variables()
+
+            val_losses = []
+            best_loss = np.inf
+            best_params = None
+            n_bad = 0
+        else:
+            val_losses = None
+            best_params = None
+
+        def feeds():
+            for _ in range(n_epochs):
+                for inp, tar in utils.minibatch_generator(
+                        inputs, targets, self.minibatch_size, rng=self.rng,
+                        shuffle=shuffle):
+                    segments = []
+                    for start in range(0, n_steps, truncation):
+                        # note: we make the arrays contiguous here, so that
+                        # the copy happens in the prefetch thread rather than
+                        # when tensorflow converts the feed values
+                        length = min(truncation, n_steps - start)
+                        feed = self._fill_feed(
+                            length,
+                            {n: x[:, start:start + truncation]
+                             for n, x in inp.items()},
+                            {p: x[:, start:start + truncation]
+                             for p, x in tar.items()},
+                            start=start)
+                        feed = {k: (np.ascontiguousarray(v)
+                                    if isinstance(v, np.ndarray) else v)
+                                for k, v in feed.items()}
+
+                        if checkpoint:
+                            feed[self.tensor_graph.segment_weight] = (
+                                float(length) / n_steps)
+                            segments.append(feed)
+                        else:
+                            yield start, feed
+
+                    if checkpoint:
+                        # all the segments of a sequence are processed
+                        # together
+                        yield 0, segments
+
+        n_windows = 1 if checkpoint else int(np.ceil(n_steps / truncation))
+        n_batches = n_epochs * (batch_size // self.minibatch_size)
+        progress = utils.ProgressBar(n_batches * n_windows, "Training")
+
+        if (n_batches * n_windows) % accumulate_steps != 0:
+            warnings.warn(
+                "Number of minibatches (%d) is not an even multiple of "
+                "accumulate_steps (%d); the gradients from the last "
+                "minibatches will be discarded" % (
+                    n_batches * n_windows, accumulate_steps), RuntimeWarning)
+
+        epoch_items = n_batches // n_epochs * n_windows
+        n_run = 0
+        start_time = time.time()
+        batches = utils.prefetch(feeds(), prefetch)
+        for start, feed in batches:
+            n_run += 1
+
+            # note: the simulation state is only reset at the start of each
+            # sequence, so that it carries over between truncation windows
+            if start == 0:
+                self.soft_reset()
 
-        for n in range(n_epochs):
-            for inp, tar in utils.minibatch_generator(
-                    inputs, targets, self.minibatch_size, rng=self.rng,
-                    shuffle=shuffle):
-                # TODO: set up queue to feed in data more efficiently
+            if checkpoint:
+                self._run_segments(feed, accumulate_op, state_grads,
+                                   opt_op if n_run % accumulate_steps == 0
+                                   else accumulate_op)
+            elif n_run % accumulate_steps == 0:
+                self.sess.run([opt_op], feed_dict=feed)
+            else:
+                self.sess.run([accumulate_op], feed_dict=feed)
+
+            progress.step()
+
+            epoch = n_run // epoch_items
+            if (validation is None or n_run % epoch_items != 0 or
+                    epoch % eval_every != 0):
+                continue
+
+            # evaluate the loss on the validation data
+            loss_val = 0
+            for val_feed in val_feeds:
                 self.soft_reset()
+                loss_val += self.sess.run(val_loss, feed_dict=val_feed)
+            loss_val /= len(val_feeds)
+            val_losses += [loss_val]
+            logger.info("Epoch %d validation loss: %f", epoch, loss_val)
+
+            if loss_val < best_loss:
+                best_loss = loss_val
+                n_bad = 0
+                if restore_best:
+                    best_params = self.sess.run(params)
+            else:
+                n_bad += 1
+
+            if patience is not None and n_bad >= patience:
+                logger.info("Stopping early after epoch %d (best validation "
+                            "loss: %f)", epoch, best_loss)
+                progress.stop()
+                break
+        batches.close()
 
-                self.sess.run([opt_op], feed_dict=self._fill_feed(
-                    n_steps, inp, tar))
+        logger.info("Training rate: %.2f steps/s",
+                    n_run / n_windows * n_steps / (time.time() - start_time))
 
-                progress.step()
+        if best_params is not None:
+            for v, val in zip(params, best_params):
+                v.load(val, self.sess)
 
         self.soft_reset()
 
+        return val_losses
+
+    def _run_segments(self, feeds, accumulate_op, state_grads, last_op):
+        """Computes the gradients for one sequence, split into segments
+        (see ``checkpoint_steps`` in :meth:`.train`).
+
+        Parameters
+        ----------
+        feeds : list of dict
+            the feed values for each segment of the sequence
+        accumulate_op : ``tf.Operation``
+            adds the gradients of a segment to the accumulators
+        state_grads : list of ``tf.Tensor``
+            the gradients with respect to the state at the start of a segment
+        last_op : ``tf.Operation``
+            the operator run for the first segment (which is the last one to
+            be processed), i.e. ``accumulate_op`` or the op that also applies
+            the accumulated update
+        """
+
+        tensor_graph = self.tensor_graph
+
+        # forward pass, storing the state at the start of each segment
+        # (note: the state from the last segment isn't needed)
+        checkpoints = []
+        for feed in feeds[:-1]:
+            checkpoints.append(self.sess.run(tensor_graph.segment_vars))
+            self.sess.run(tensor_graph.steps_run, feed_dict=feed)
+
+        # backward pass, recomputing each segment starting from its
+        # checkpoint. the gradient with respect to the state at the start of
+        # each segment is passed back to the previous segment.
+        adjoints = [
+            np.zeros(v.shape.as_list(), v.dtype.base_dtype.as_numpy_dtype)
+            for v in tensor_graph.segment_vars]
+        for i in range(len(feeds) - 1, -1, -1):
+            if i < len(checkpoints):
+                for v, val in zip(tensor_graph.segment_vars, checkpoints[i]):
+                    v.load(val, self.sess)
+
+            feed = dict(zip(tensor_graph.segment_adjoints, adjoints))
+            feed.update(feeds[i])
+            if i > 0:
+                _, adjoints = self.sess.run([accumulate_op, state_grads],
+                                            feed_dict=feed)
+            else:
+                self.sess.run(last_op, feed_dict=feed)
+
     def loss(self, inputs, targets, objective):
         """Compute the loss value for the given objective and inputs/targets.
 
@@ -478,6 +1247,150 @@ class Simulator(object):
 
         return loss_val
 
+    def predict(self, inputs, probes=None, minibatch_size=None, prefetch=2):
+        """Compute the output of the network for a (possibly large) set of
+        inputs.
+
+        The inputs are divided into minibatches, and each minibatch is
+        simulated from the initial network state (including the state of
+        input Nodes that are not given values in ``inputs``).  Unlike
+        :meth:`.run`, the output is not added to ``sim.data``; it is written
+        into preallocated arrays which are returned when all the inputs have
+        been processed.
+
+        Parameters
+        ----------
+        inputs : dict of {:class:`~nengo:nengo.Node`: \
+                          :class:`~numpy:numpy.ndarray`}
+            input values for Nodes in the network; arrays should have shape
+            ``(batch_size, n_steps, node.size_out)``
+        probes : list of :class:`~nengo:nengo.Probe`, optional
+            the probes for which output should be computed (if None, all the
+            probes in the model are used)
+        minibatch_size : int, optional
+            if not None, compute the outputs with this minibatch size (one of
+            the sizes passed to ``Simulator(..., minibatch_size=[...])``).
+            the simulator is not switched to that size: the predictions are
+            computed in a temporary session, so the current minibatch size,
+            simulation state, and probe data are not affected.
+        prefetch : int, optional
+            the number of minibatches to prepare in advance (in a background
+            thread, while the simulation is running); if 0, each minibatch
+            is prepared when it is needed
+
+        Returns
+        -------
+        dict of {:class:`~nengo:nengo.Probe`: :class:`~numpy:numpy.ndarray`}
+            the output of each probe, with shape
+            ``(batch_size, n_samples, probe.size_in)`` (where ``n_samples``
+            is ``n_steps``, unless the probe has ``sample_every`` set)
+
+        Notes
+        -----
+        If the Simulator was created with ``probe_dir``, the output arrays
+        are memory-mapped files in that directory, so that the outputs for
+        large datasets do not need to fit in memory.
+
+        If ``batch_size`` is not an even multiple of the minibatch size, the
+        last minibatch is padded with zeros (and the padded outputs are
+        discarded).
+
+        Calling this function will reset all values in the network (unless
+        ``minibatch_size`` is different from the current minibatch size), so
+        it should not be intermixed with calls to :meth:`.Simulator.run`.
+        """
+
+        if self.closed:
+            raise SimulatorClosed("Cannot compute predictions after simulator "
+                                  "is closed.")
+
+        if minibatch_size is None:
+            minibatch_size = self.minibatch_size
+
+        with self._temporary_minibatch_size(minibatch_size):
+            return self._predict(inputs, probes, prefetch)
+
+    def _predict(self, inputs, probes, prefetch):
+        """Computes the output of the network for the given inputs, with
+        the current minibatch size (see :meth:`.predict`)."""
+
+        if probes is None:
+            probes = self.model.probes
+
+        batch_size, n_steps = next(iter(inputs.values())).shape[:2]
+        self._check_data(inputs, mode="out", n_steps=n_steps)
+
+        # preallocate the output arrays
+        outputs = {}
+        n_samples = {}
+        for p in probes:
+            if p.sample_every is None:
+                n_samples[p] = n_steps
+            else:
+                # note: this mirrors the calculation in `_update_probe_data`
+                period = p.sample_every / self.dt
+                n_samples[p] = np.count_nonzero(
+                    (np.arange(n_steps) + 1) % period < 1)
+
+            shape = ((batch_size, n_samples[p]) +
+                     self.tensor_graph.sig_map[self.model.sig[p]["in"]].shape)
+            dtype = self.tensor_graph.dtype.as_numpy_dtype
+            if self.probe_dir is None:
+                outputs[p] = np.empty(shape, dtype=dtype)
+            else:
+                fd, path = tempfile.mkstemp(prefix="predict_", suffix=".npy",
+                                            dir=self.probe_dir)
+                os.close(fd)
+                outputs[p] = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=dtype, shape=shape)
+
+        def feeds():
+            for start in range(0, batch_size, self.minibatch_size):
+                inp = {n: x[start:start + self.minibatch_size]
+                       for n, x in inputs.items()}
+
+                n_items = next(iter(inp.values())).shape[0]
+                if n_items < self.minibatch_size:
+                    # pad the last minibatch
+                    pad = self.minibatch_size - n_items
+                    inp = {n: np.concatenate(
+                        [x, np.zeros((pad,) + x.shape[1:], dtype=x.dtype)])
+                        for n, x in inp.items()}
+
+                # note: every minibatch is simulated from the initial state,
+                # so the input functions are recreated for each one
+                with self._initial_input_funcs():
+                    feed = self._fill_feed(n_steps, inp)
+                yield start, n_items, {
+                    k: (np.ascontiguousarray(v) if isinstance(v, np.ndarray)
+                        else v) for k, v in feed.items()}
+
+        n_batches = int(np.ceil(batch_size / self.minibatch_size))
+        progress = utils.ProgressBar(n_batches, "Predicting")
+        probe_arrays = [
+            self.tensor_graph.probe_arrays[self.model.probes.index(p)]
+            for p in probes]
+
+        start_time = time.time()
+        for start, n_items, feed in utils.prefetch(feeds(), prefetch):
+            self.soft_reset()
+
+            probe_data = self.sess.run(probe_arrays, feed_dict=feed)
+
+            for p, data in zip(probes, probe_data):
+                if self.model.sig[p]["in"].minibatched:
+                    data = np.moveaxis(data[..., :n_items], -1, 0)
+                outputs[p][start:start + n_items] = data
+
+            progress.step()
+
+        logger.info("Prediction rate: %.2f samples/s",
+                    batch_size / (time.time() - start_time))
+
+        self.soft_reset()
+
+        return outputs
+
     def _fill_feed(self, n_steps, inputs, targets=None, start=0):
         """Create a feed dictionary containing values for all the placeholder
         inputs in the network, which will be passed to ``tf.Session.run``.
@@ -518,7 +1431,7 @@ class Simulator(object):
                 self.final_bases) if k.op.type == "Placeholder"})
 
         # fill in input values
-        tmp = self._generate_inputs(inputs, n_steps)
+        tmp = self._generate_inputs(inputs, n_steps, start=start)
         feed_dict.update(tmp)
 
         # fill in target values
@@ -529,7 +1442,7 @@ class Simulator(object):
 
         return feed_dict
 
-    def _generate_inputs(self, input_feeds, n_steps):
+    def _generate_inputs(self, input_feeds, n_steps, start=None):
         """Generate inputs for the network (the output values of each Node with
         no incoming connections).
 
@@ -541,11 +1454,17 @@ class Simulator(object):
             should have shape ``(sim.minibatch_size, n_steps, node.size_out)``.
         n_steps : int
             number of simulation timesteps for which to generate input data
+        start : int, optional
+            the simulation timestep at which the inputs start (if None, uses
+            the current simulator timestep)
         """
 
         if input_feeds is None:
             input_feeds = {}
 
+        if start is None:
+            start = self.n_steps
+
         feed_vals = {}
         for n in self.tensor_graph.invariant_inputs:
             # if the output signal is not in sig map, that means no operators
@@ -555,79 +1474,199 @@ class Simulator(object):
                 self.model.sig[n]["out"] in self.tensor_graph.sig_map and
                 n.size_out > 0)
 
-            if (not isinstance(n.output, np.ndarray) and
-                    n.output not in self.input_funcs):
-                if isinstance(n.output, Process):
-                    self.input_funcs[n.output] = n.output.make_step(
-                        (n.size_in,), (n.size_out,), self.dt,
-                        n.output.get_rng(self.rng))
-                elif n.size_out > 0:
-                    self.input_funcs[n.output] = utils.align_func(
-                        (n.size_out,), self.tensor_graph.dtype)(n.output)
-                else:
-                    self.input_funcs[n.output] = n.output
+            if not isinstance(n.output, np.ndarray):
+                self._get_input_func(n, start)
 
             if using_output:
                 if n in input_feeds:
                     # move minibatch dimension to the end
                     feed_val = np.moveaxis(input_feeds[n], 0, -1)
-                elif isinstance(n.output, np.ndarray):
-                    feed_val = np.tile(n.output[None, :, None],
-                                       (n_steps, 1, self.minibatch_size))
+                elif (n in self.tensor_graph.const_inputs and
+                      isinstance(n.output, np.ndarray)):
+                    # constant value is built into the graph, so we only
+                    # need to feed it in if it has changed since the build
+                    const_ph, _, const_val = self.tensor_graph.const_inputs[n]
+                    if not np.array_equal(n.output, const_val):
+                        feed_vals[const_ph] = n.output
+                    continue
                 else:
-                    func = self.input_funcs[n.output]
-
-                    feed_val = []
-                    for i in range(self.n_steps + 1,
-                                   self.n_steps + n_steps + 1):
-                        # note: need to copy the output of func, as func
-                        # may mutate its outputs in-place on subsequent calls
-                        feed_val += [np.array(func(i * self.dt))]
-
-                    feed_val = np.stack(feed_val, axis=0)
-                    feed_val = np.tile(feed_val[..., None],
-                                       (1, 1, self.minibatch_size))
+                    if isinstance(n.output, np.ndarray):
+                        feed_val = np.broadcast_to(
+                            n.output, (n_steps, n.size_out))
+                    else:
+                        feed_val = self._call_input_func(
+                            self.input_funcs[n.output], n_steps, start)
+
+                    # note: we broadcast the values across the minibatch
+                    # dimension, rather than copying them
+                    feed_val = np.broadcast_to(
+                        feed_val[..., None],
+                        feed_val.shape + (self.minibatch_size,))
 
                 feed_vals[self.tensor_graph.invariant_ph[n]] = feed_val
             elif not isinstance(n.output, np.ndarray):
                 # note: we still call the function even if the output
                 # is not being used, because it may have side-effects
-                func = self.input_funcs[n.output]
-                for i in range(self.n_steps + 1, self.n_steps + n_steps + 1):
-                    func(i * self.dt)
+                self._call_input_func(self.input_funcs[n.output], n_steps,
+                                      start)
 
         return feed_vals
 
+    def _get_input_func(self, node, start):
+        """Returns the function that computes the output of an input Node
+        (creating it if it does not exist yet).
+
+        Parameters
+        ----------
+        node : :class:`~nengo:nengo.Node`
+            the input node
+        start : int
+            the simulation timestep at which the function will first be
+            evaluated
+
+        Returns
+        -------
+        callable
+            function mapping time to node output
+        """
+
+        if node.output not in self.input_funcs:
+            if isinstance(node.output, Process):
+                # note: we keep track of the initial state of the
+                # process, so that it can be recreated in `restore`
+                rng = node.output.get_rng(self.rng)
+                self.input_func_states[node.output] = (
+                    node, rng.get_state(), start)
+            else:
+                rng = None
+
+            self.input_funcs[node.output] = self._make_input_func(node, rng)
+
+        return self.input_funcs[node.output]
+
+    @contextlib.contextmanager
+    def _initial_input_funcs(self):
+        """Context manager in which the input functions are recreated in
+        their initial state (as after :meth:`.reset`).
+
+        This is used to generate the inputs for simulations that start from
+        the initial network state (e.g., each minibatch in :meth:`.predict`),
+        so that stateful input Nodes (such as Nodes with a ``Process``
+        output) do not carry their state from one simulation to the next.
+        The simulator's own input functions are restored on exit.
+        """
+
+        saved = self.rng, self.input_funcs, self.input_func_states
+
+        self.rng = np.random.RandomState()
+        self.rng.set_state(self._input_rng_state)
+        self.input_funcs = {}
+        self.input_func_states = {}
+
+        try:
+            yield
+        finally:
+            self.rng, self.input_funcs, self.input_func_states = saved
+
+    def _make_input_func(self, node, rng):
+        """Creates the function that computes the output of an input Node.
+
+        Parameters
+        ----------
+        node : :class:`~nengo:nengo.Node`
+            the input node
+        rng : :class:`~numpy:numpy.random.RandomState`
+            random number generator for the node's Process (if the node's
+            output is a Process)
+
+        Returns
+        -------
+        callable
+            function mapping time to node output
+        """
+
+        if isinstance(node.output, Process):
+            func = node.output.make_step(
+                (node.size_in,), (node.size_out,), self.dt, rng)
+        else:
+            func = node.output
+
+        vectorized = getattr(func, "time_vectorized", False)
+        if node.size_out > 0:
+            func = utils.align_func(
+                (-1, node.size_out) if vectorized else (node.size_out,),
+                self.tensor_graph.dtype)(func)
+            func.time_vectorized = vectorized
+
+        return func
+
+    def _call_input_func(self, func, n_steps, start):
+        """Evaluates an input function over ``n_steps`` simulation
+        timesteps.
+
+        Functions marked with :func:`.utils.time_vectorized` are called once
+        with a vector of times, otherwise the function is called once per
+        timestep.
+
+        Parameters
+        ----------
+        func : callable
+            the input function (a Node output function or Process step
+            function)
+        n_steps : int
+            number of simulation timesteps
+        start : int
+            the timestep after which the evaluation starts
+
+        Returns
+        -------
+        :class:`~numpy:numpy.ndarray`
+            the output of ``func`` on each timestep, with shape
+            ``(n_steps, ...)``
+        """
+
+        times = np.arange(start + 1, start + n_steps + 1)
+
+        if getattr(func, "time_vectorized", False):
+            return np.array(func(times * self.dt))
+
+        # note: need to copy the output of func, as func
+        # may mutate its outputs in-place on subsequent calls
+        return np.stack([np.array(func(i * self.dt)) for i in times], axis=0)
+
     def _update_probe_data(self, probe_data, start, n_steps):
         """Updates the stored probe data (since the last reset) with the data
         from the latest run.
 
-        Downsamples the probe data returned from tensorflow (from every
-        simulation timestep) according to probe `sample_every` and the number
-        of steps run.
+        Probes with ``sample_every`` set are downsampled inside the
+        simulation graph, so the data returned from tensorflow only contains
+        the sampled timesteps.
 
         Parameters
         ----------
         probe_data : list of `np.ndarray`
-            probe data from every timestep
+            probe data from every (sampled) timestep
         start : int
             the simulation timestep at which probe data starts
         n_steps : int
             the number of timesteps over which we want to collect data
         """
 
-        # remove any extra timesteps (due to `unroll_simulation` mismatch)
-        probe_data = [p[:n_steps] for p in probe_data]
-
         for i, p in enumerate(self.model.probes):
-            if p.sample_every is not None:
-                # downsample probe according to `sample_every`
+            if p.sample_every is None:
+                n_samples = n_steps
+            else:
+                # count the number of samples within the steps we want
+                # note: this mirrors the calculation in
+                # `TensorGraph.write_sampled_probe`
                 period = p.sample_every / self.dt
                 steps = np.arange(start, start + n_steps)
-                probe_data[i] = probe_data[i][(steps + 1) % period < 1]
+                n_samples = np.count_nonzero((steps + 1) % period < 1)
+
+            assert probe_data[i].shape[0] == n_samples
 
             # update stored probe data
-            self.model.params[p] += [probe_data[i]]
+            self.model.params[p].append(probe_data[i])
 
     def save_params(self, path, include_local=False):
         """Save network parameters to the given ``path``.
@@ -675,6 +1714,138 @@ class Simulator(object):
 
         logger.info("Model parameters loaded from %s", path)
 
+    def export(self, path):
+        """Save the built simulation graph to the given directory, so that
+        it can be reloaded (with :meth:`.load`) without repeating the model
+        build, graph optimization, or graph construction steps.
+
+        The current values of the trainable parameters are saved as well
+        (and will be the initial values of the loaded simulator).
+
+        Parameters
+        ----------
+        path : str
+            the output directory (will be created if it does not exist)
+
+        Notes
+        -----
+        The random seeds used inside the graph are fixed at the time the
+        graph is exported (so reseeding the loaded simulator only affects
+        the input nodes).  Networks containing :class:`.TensorNode`
+        functions implemented in Python (or other operators executed with
+        ``tf.py_func``) cannot be exported.
+        """
+
+        if self.closed:
+            raise SimulationError("Simulation has been closed, cannot "
+                                  "export graph")
+
+        if self.model.toplevel is None:
+            raise SimulationError(
+                "Cannot export a Simulator that was not built from a "
+                "Network")
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        network = self.model.toplevel
+        state = dict(
+            graph_state=self.tensor_graph.export(
+                os.path.join(path, "graph"), self.sess),
+            probes=[network.all_probes.index(p) for p in self.model.probes],
+            probe_sizes=[p.size_in for p in self.model.probes],
+            inputs=[network.all_nodes.index(n) for n in
+                    self.tensor_graph.invariant_inputs],
+            input_sizes=[n.size_out for n in
+                         self.tensor_graph.invariant_inputs],
+            minibatches=[self.data.minibatches[p] for p in self.model.probes],
+            seed=self.seed, version=version.version)
+
+        with open(os.path.join(path, "simulator.pkl"), "wb") as f:
+            pickle.dump(state, f, protocol=2)
+
+        logger.info("Simulator exported to %s", path)
+
+    @classmethod
+    def load(cls, path, network, seed=None, probe_dir=None):
+        """Create a Simulator from a graph saved with :meth:`.export`.
+
+        Parameters
+        ----------
+        path : str
+            the directory containing the exported graph
+        network : :class:`~nengo:nengo.Network`
+            the network that was simulated when the graph was exported (used
+            to look up the probes and input nodes, which are matched by their
+            position in the network)
+        seed : int, optional
+            seed for the input nodes (if None, uses the seed of the exported
+            simulator)
+        probe_dir : str, optional
+            if not None, probe data will be stored in memory-mapped files in
+            this directory (see :class:`.Simulator`)
+
+        Returns
+        -------
+        :class:`.Simulator`
+            a simulator executing the loaded graph (which cannot be rebuilt,
+            e.g. by :meth:`.freeze` or ``reset(rebuild=True)``, and only
+            supports the exported minibatch size)
+        """
+
+        with open(os.path.join(path, "simulator.pkl"), "rb") as f:
+            state = pickle.load(f)
+
+        if state["version"] != version.version:
+            warnings.warn(
+                "Graph was exported with nengo_dl version %s, but the "
+                "current version is %s" % (state["version"],
+                                           version.version), NengoWarning)
+
+        graph_state = state["graph_state"]
+
+        try:
+            probes = [network.all_probes[i] for i in state["probes"]]
+            nodes = [network.all_nodes[i] for i in state["inputs"]]
+        except IndexError:
+            raise SimulationError("Network does not match the exported "
+                                  "network")
+        if ([p.size_in for p in probes] != state["probe_sizes"] or
+                [n.size_out for n in nodes] != state["input_sizes"]):
+            raise SimulationError("Network does not match the exported "
+                                  "network")
+
+        # create a model containing the probe/input signals (the model does
+        # not need to be built, since the operators are already in the graph)
+        model = Model(dt=graph_state["dt"], label="%s, dt=%f" % (
+            network, graph_state["dt"]))
+        model.toplevel = network
+        for p, (_, _, _, shape, minibatched) in zip(
+                probes, graph_state["probes"]):
+            model.probes.append(p)
+            model.sig[p]["in"] = Signal(np.zeros(shape))
+            model.sig[p]["in"].minibatched = minibatched
+        for n in nodes:
+            model.sig[n]["out"] = Signal(np.zeros(n.size_out))
+
+        # note: the loaded graph replaces the model build and graph
+        # optimization steps in __init__, the rest of the setup is the same
+        self = cls.__new__(cls)
+        self._init_attributes(graph_state["unroll"],
+                              graph_state["minibatch_size"], False,
+                              probe_dir, None)
+        self.model = model
+
+        with self.build_stats.phase("load"):
+            tensor_graph = TensorGraph.load(
+                os.path.join(path, "graph"), graph_state, model, nodes)
+
+        self._init_graphs(tensor_graph,
+                          dict(zip(probes, state["minibatches"])),
+                          state["seed"] if seed is None else seed)
+
+        return self
+
     def print_params(self, msg=None):
         """Print current values of trainable network parameters.
 
@@ -691,7 +1862,7 @@ class Simulator(object):
 
         param_sigs = {k: v for k, v in self.tensor_graph.sig_map.items()
                       if k.trainable}
-        keys = list(self.tensor_graph.signals.bases.keys())
+        keys = list(self.tensor_graph.base_arrays_init.keys())
         params = {v.key: self.tensor_graph.base_vars[keys.index(v.key)]
                   for v in param_sigs.values()}
 
@@ -723,6 +1894,11 @@ class Simulator(object):
             if getattr(self, "summary", None) is not None:
                 self.summary.close()
 
+            # note: memory-mapped probe data can still be accessed after
+            # the files are removed (on platforms that allow it)
+            if self.probe_dir is not None:
+                shutil.rmtree(self.probe_dir, ignore_errors=True)
+
     def __enter__(self):
         return self
 
@@ -791,6 +1967,10 @@ class Simulator(object):
         should not be intermixed with calls to :meth:`.Simulator.run`.
         """
 
+        if self.tensor_graph.inference_only:
+            raise SimulationError("Cannot compute gradients because the "
+                                  "Simulator is in inference-only mode.")
+
         delta = 1e-3
         n_steps = self.unroll * 2
 
@@ -819,8 +1999,11 @@ class Simulator(object):
             feed[inp_tens] = np.ascontiguousarray(feed[inp_tens])
             inp_val = np.ravel(feed[inp_tens])
             for out in outputs:
-                out_shape = out.get_shape().as_list()
-                out_shape = [n_steps if x is None else x for x in out_shape]
+                # note: we get the output shape by running the graph, since
+                # the number of timesteps isn't known statically (and may
+                # not be equal to n_steps, e.g. for probes with sample_every)
+                self.soft_reset()
+                out_shape = list(self.sess.run(out, feed_dict=feed).shape)
 
                 # we need to compute the numeric jacobian manually, to
                 # correctly handle variables (tensorflow doesn't expect
@@ -899,21 +2082,223 @@ class Simulator(object):
                      n, mode, shape))
 
 
+class SimulatorSnapshot(object):
+    """A saved copy of the simulation state (see :meth:`.Simulator.snapshot`).
+
+    Parameters
+    ----------
+    tensor_graph : :class:`.TensorGraph`
+        the graph the snapshot was created from
+    slot : tuple of ``tf.Operation``
+        the ops for saving and restoring the snapshot variables
+    n_steps : int
+        the simulator timestep when the snapshot was taken
+    rng_state : tuple
+        state of the simulator's random number generator
+    probe_steps : dict of {:class:`~nengo:nengo.Probe`: int}
+        the amount of data stored for each probe
+    input_funcs : dict of {object: callable}
+        the functions used to compute the output of input Nodes
+    input_func_states : dict of {:class:`~nengo:nengo.Process`: tuple}
+        the node, initial random state, and starting timestep for each
+        input function created from a Process
+
+    Notes
+    -----
+    SimulatorSnapshot should never be created directly by the user, but
+    rather via :meth:`.Simulator.snapshot`.
+    """
+
+    def __init__(self, tensor_graph, slot, n_steps, rng_state, probe_steps,
+                 input_funcs, input_func_states):
+        self.tensor_graph = tensor_graph
+        self.graph = tensor_graph.graph
+        self.slot = slot
+        self.n_steps = n_steps
+        self.rng_state = rng_state
+        self.probe_steps = probe_steps
+        self.input_funcs = input_funcs
+        self.input_func_states = input_func_states
+
+    def __del__(self):
+        # return the snapshot variables to the pool, so that they can be
+        # reused by other snapshots
+        if self.tensor_graph.graph is self.graph:
+            self.tensor_graph.snapshot_slots.append(self.slot)
+
+
+class SimulatorStepper(object):
+    """Executes a simulation one timestep at a time (see
+    :meth:`.Simulator.stepper`).
+
+    Each step is executed by a subgraph that contains a single timestep
+    (rather than the simulation loop), and the input values are written into
+    preallocated feed arrays, so that the overhead of each step is as low as
+    possible.  The probe values are returned directly, rather than being
+    added to ``sim.data``.
+
+    Parameters
+    ----------
+    sim : :class:`.Simulator`
+        the simulator being stepped
+    probes : list of :class:`~nengo:nengo.Probe`
+        the probes whose values are returned on each step
+
+    Notes
+    -----
+    SimulatorStepper should never be created directly by the user, but
+    rather via :meth:`.Simulator.stepper`.  The stepper is tied to the
+    current graph, so a new one has to be created if the simulator's graph
+    is rebuilt or its minibatch size is changed.
+    """
+
+    def __init__(self, sim, probes):
+        self.sim = sim
+        self.probes = probes
+        self.tensor_graph = sim.tensor_graph
+        self.graph = sim.tensor_graph.graph
+
+        step_ph, input_phs, probe_tensors, step_op = (
+            self.tensor_graph.build_single_step())
+        self.fetches = ([probe_tensors[sim.model.probes.index(p)]
+                         for p in probes], step_op)
+        self.minibatches = [sim.data.minibatches[p] for p in probes]
+
+        # the feed values are written into these arrays on each step (rather
+        # than creating new arrays)
+        dtype = self.tensor_graph.dtype.as_numpy_dtype
+        self.buffers = {n: np.zeros((n.size_out, sim.minibatch_size),
+                                    dtype=dtype) for n in input_phs}
+        self.input_phs = input_phs
+        self.feed = {step_ph: 0}
+        self.step_ph = step_ph
+
+        # nodes with constant outputs are built into the graph, so they only
+        # need to be fed if they are overridden; the other input functions
+        # are evaluated on each step (even if the output isn't used, in case
+        # they have side effects)
+        self.func_nodes = [
+            n for n in self.tensor_graph.invariant_inputs
+            if not isinstance(n.output, np.ndarray)]
+        for n in self.func_nodes:
+            if n in input_phs:
+                self.feed[input_phs[n]] = self.buffers[n]
+
+    def step(self, inputs=None):
+        """Execute one simulation timestep.
+
+        Parameters
+        ----------
+        inputs : dict of {:class:`~nengo:nengo.Node`: \
+                          :class:`~numpy:numpy.ndarray`}, optional
+            override the output of input Nodes on this step; arrays should
+            have shape ``(sim.minibatch_size, node.size_out)``
+
+        Returns
+        -------
+        dict of {:class:`~nengo:nengo.Probe`: :class:`~numpy:numpy.ndarray`}
+            the value of each probe at the end of the step (with the same
+            minibatch dimension as ``sim.data``)
+
+        Notes
+        -----
+        The ``sample_every`` setting of probes is ignored (every step
+        returns the current probe values).
+        """
+
+        sim = self.sim
+        if sim.closed:
+            raise SimulatorClosed("Simulator cannot run because it is closed.")
+        if sim.tensor_graph is not self.tensor_graph or (
+                self.tensor_graph.graph is not self.graph):
+            raise SimulationError("Simulator graph has changed since the "
+                                  "stepper was created")
+
+        if inputs is None:
+            inputs = {}
+
+        feed = self.feed
+        feed[self.step_ph] = sim.n_steps
+
+        for n in self.func_nodes:
+            if n not in inputs:
+                func = sim._get_input_func(n, sim.n_steps)
+                t = (sim.n_steps + 1) * sim.dt
+                if getattr(func, "time_vectorized", False):
+                    val = func(np.array([t]))[0]
+                else:
+                    val = func(t)
+
+                if n in self.buffers:
+                    # broadcast across the minibatch dimension
+                    self.buffers[n][...] = val[:, None]
+
+        overrides = []
+        for n, x in inputs.items():
+            if n not in self.buffers:
+                continue
+            if x.shape != (sim.minibatch_size, n.size_out):
+                raise ValidationError(
+                    "Shape of input data for %s (%s) does not match "
+                    "expected shape (sim.minibatch_size, node.size_out) -> %s"
+                    % (n, x.shape, (sim.minibatch_size, n.size_out)),
+                    "inputs")
+
+            self.buffers[n][...] = x.T
+            if self.input_phs[n] not in feed:
+                overrides.append(self.input_phs[n])
+                feed[self.input_phs[n]] = self.buffers[n]
+
+        # constant values that were changed since the graph was built
+        for n, (const_ph, _, const_val) in (
+                self.tensor_graph.const_inputs.items()):
+            if not np.array_equal(n.output, const_val):
+                overrides.append(const_ph)
+                feed[const_ph] = n.output
+
+        try:
+            probe_data, _ = sim.sess.run(self.fetches, feed_dict=feed)
+        finally:
+            for ph in overrides:
+                del feed[ph]
+
+        sim.n_steps += 1
+        sim.time = sim.n_steps * sim.dt
+
+        output = {}
+        for p, mb, data in zip(self.probes, self.minibatches, probe_data):
+            if mb is None:
+                # get rid of batch dimension
+                data = data[..., 0]
+            elif mb != -1:
+                # move batch dimension to front
+                data = np.moveaxis(data, -1, 0)
+            output[p] = data
+
+        return output
+
+
 class ProbeDict(Mapping):
     """Map from :class:`~nengo:nengo.Probe` -> :class:`~numpy:numpy.ndarray`,
     used to access output of the model after simulation.
 
     This is more like a view on the dict that the simulator manipulates.
-    However, for speed reasons, the simulator uses Python lists,
-    and we want to return NumPy arrays. Additionally, this mapping
-    is readonly, which is more appropriate for its purpose.
+    However, for speed reasons, the simulator stores the data in
+    :class:`.ProbeBuffer` objects, and we want to return NumPy arrays (with the
+    minibatch dimension moved to the front).  Additionally, this mapping is
+    readonly, which is more appropriate for its purpose.
+
+    The arrays are cached, so repeatedly reading the data for a probe is
+    cheap as long as no new data has been added.
 
     Parameters
     ----------
     raw : dict of {:class:`~nengo:nengo.Probe`: \
+                   :class:`.ProbeBuffer` or \
                    list of :class:`~numpy:numpy.ndarray`}
-        the raw probe output from the simulator (a list of arrays containing
-        the output from each ``run_steps`` execution segment)
+        the raw probe output from the simulator (a buffer containing all the
+        output, or a list of arrays containing the output from each
+        ``run_steps`` execution segment)
     minibatches : dict of {:class:`~nengo:nengo.Probe`: int or None}
         the minibatch size for each probe in the dictionary (or -1 if the
         probed signal does not have a minibatch dimension)
@@ -927,25 +2312,50 @@ class ProbeDict(Mapping):
     def __init__(self, raw, minibatches):
         self.raw = raw
         self.minibatches = minibatches
-
-        # TODO: add cache back in?
+        self.cache = {}
 
     def __getitem__(self, key):
         rval = self.raw[key]
 
-        if isinstance(rval, list):
+        if isinstance(rval, ProbeBuffer):
+            buffer = rval
+
+            # check if the buffer has changed since the last time we read it
+            cached = self.cache.get(key, None)
+            if (cached is not None and cached[0] is buffer and
+                    cached[1] == buffer.version):
+                return cached[2]
+
+            # note: this is a view on the buffer data, not a copy
+            rval = self._format(key, buffer.data)
+            self.cache[key] = (buffer, buffer.version, rval)
+        elif isinstance(rval, list):
             # combine data from run_steps iterations
-            rval = np.concatenate(rval, axis=0)
+            rval = self._format(key, np.concatenate(rval, axis=0))
 
-            if self.minibatches[key] != -1:
-                if self.minibatches[key] is None:
-                    # get rid of batch dimension
-                    rval = rval[..., 0]
-                else:
-                    # move batch dimension to front
-                    rval = np.moveaxis(rval, -1, 0)
+        return rval
+
+    def _format(self, key, rval):
+        """Rearranges the dimensions of the raw probe data, and marks it
+        readonly.
+
+        Parameters
+        ----------
+        key : :class:`~nengo:nengo.Probe`
+            the probe the data belongs to
+        rval : :class:`~numpy:numpy.ndarray`
+            the raw probe data, with shape ``(n_steps, ...)``
+        """
+
+        if self.minibatches[key] != -1:
+            if self.minibatches[key] is None:
+                # get rid of batch dimension
+                rval = rval[..., 0]
+            else:
+                # move batch dimension to front
+                rval = np.moveaxis(rval, -1, 0)
 
-            rval.setflags(write=False)
+        rval.setflags(write=False)
 
         return rval
 
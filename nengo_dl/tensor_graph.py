@@ -1,4 +1,5 @@
 from collections import OrderedDict
+import copy
 import datetime
 import logging
 import time
@@ -8,8 +9,9 @@ from nengo import Connection, Process
 from nengo.builder.operator import TimeUpdate, SimPyFunc
 from nengo.builder.processes import SimProcess
 from nengo.config import Config, ConfigError
-from nengo.exceptions import SimulationError
+from nengo.exceptions import BuildError, SimulationError
 from nengo.neurons import Direct
+import numpy as np
 import tensorflow as tf
 
 from nengo_dl import builder, graph_optimizer, signals, utils, tensor_node
@@ -30,23 +32,54 @@ class TensorGraph(object):
         unroll simulation loop by explicitly building ``unroll_simulation``
         iterations into the computation graph
     dtype : ``tf.DType``
-        floating point precision to use for simulation
+        floating point precision to use for simulation (if ``tf.float16``,
+        trainable parameters are stored in ``tf.float32``)
     minibatch_size : int
         the number of simultaneous inputs that will be passed through the
         network
     device : None or ``"/cpu:0"`` or ``"/gpu:[0-n]"``
         device on which to execute computations (if None then uses the
         default device as determined by Tensorflow)
+    plan_cache : :class:`.plan_cache.PlanCache`, optional
+        if not None, the optimized plan and signal order will be loaded
+        from/saved to this cache
+    jit : bool, optional
+        if True, mark the operators in the simulation step for compilation
+        with XLA
+    build_stats : :class:`.utils.BuildStats`, optional
+        if not None, the time/memory usage of the planning and graph
+        construction phases will be recorded in this object
+    inference_only : bool, optional
+        if True, build a forward-only graph (the simulation loop does not
+        keep the values needed for backpropagation, and trainable
+        parameters are built into the graph as constants)
     """
 
     def __init__(self, model, dt, unroll_simulation, dtype,
-                 minibatch_size, device):
+                 minibatch_size, device, plan_cache=None, jit=False,
+                 build_stats=None, inference_only=False):
+        self.build_stats = (utils.BuildStats() if build_stats is None else
+                            build_stats)
         self.model = model
         self.dt = dt
         self.unroll = unroll_simulation
         self.dtype = dtype
         self.minibatch_size = minibatch_size
         self.device = device
+        self.jit = jit
+        self.inference_only = inference_only
+        self.graph = None
+
+        # with half precision simulation, we store a full precision copy of
+        # the trainable parameters (so that small updates aren't lost to
+        # rounding), and scale up the loss before computing gradients (so
+        # that small gradient values don't underflow)
+        if dtype == tf.float16:
+            self.trainable_dtype = tf.float32
+            self.loss_scale = 128.0
+        else:
+            self.trainable_dtype = dtype
+            self.loss_scale = 1.0
 
         # find invariant inputs (nodes that don't receive any input other
         # than the simulation time). we'll compute these outside the simulation
@@ -72,28 +105,60 @@ class TensorGraph(object):
                  op.process in node_processes))]
 
         # mark trainable signals
-        self.mark_signals()
+        with self.build_stats.phase("mark_signals") as counts:
+            self.mark_signals()
+            counts["n_signals"] = len(self.model.sig)
 
         logger.info("Initial plan length: %d", len(operators))
 
         utils.print_and_flush("Optimizing graph", end="")
         start = time.time()
 
-        # group mergeable operators
-        plan = graph_optimizer.tree_planner(operators)
-
-        # TODO: we could also merge operators sequentially (e.g., combine
-        # a copy and dotinc into one op), as long as the intermediate signal
-        # is only written to by one op and read by one op
-
-        # order signals/operators to promote contiguous reads
-        sigs, self.plan = graph_optimizer.order_signals(plan, n_passes=10)
+        planner = graph_optimizer.tree_planner
+        n_passes = 10
+
+        cached = None
+        if plan_cache is not None:
+            with self.build_stats.phase("plan_cache") as counts:
+                cache_key = plan_cache.get_key(
+                    operators, planner=planner.__name__, n_passes=n_passes,
+                    dtype=dtype.name, minibatch_size=minibatch_size)
+                cached = plan_cache.load(cache_key, operators)
+                counts["hit"] = cached is not None
+
+        if cached is None:
+            # group mergeable operators
+            with self.build_stats.phase(planner.__name__) as counts:
+                plan = planner(operators)
+                counts["n_ops_in"] = len(operators)
+                counts["n_ops_out"] = len(plan)
+
+            # TODO: we could also merge operators sequentially (e.g., combine
+            # a copy and dotinc into one op), as long as the intermediate
+            # signal is only written to by one op and read by one op
+
+            # order signals/operators to promote contiguous reads
+            with self.build_stats.phase("order_signals") as counts:
+                self.sig_order, self.plan = graph_optimizer.order_signals(
+                    plan, n_passes=n_passes)
+                counts["n_base_signals"] = len(self.sig_order)
+
+            if plan_cache is not None:
+                plan_cache.store(cache_key, operators, self.sig_order,
+                                 self.plan)
+        else:
+            self.sig_order, self.plan = cached
 
         # create base arrays and map Signals to TensorSignals (views on those
         # base arrays)
-        self.base_arrays_init, self.sig_map = graph_optimizer.create_signals(
-            sigs, self.plan, float_type=dtype.as_numpy_dtype,
-            minibatch_size=self.minibatch_size)
+        with self.build_stats.phase("create_signals") as counts:
+            self.base_arrays_init, self.sig_map = (
+                graph_optimizer.create_signals(
+                    self.sig_order, self.plan,
+                    float_type=dtype.as_numpy_dtype,
+                    minibatch_size=self.minibatch_size,
+                    trainable_float_type=self.trainable_dtype.as_numpy_dtype))
+            counts["n_base_arrays"] = len(self.base_arrays_init)
 
         print("\rOptimization completed in %s " %
               datetime.timedelta(seconds=int(time.time() - start)))
@@ -101,6 +166,39 @@ class TensorGraph(object):
         logger.info("Optimized plan length: %d", len(self.plan))
         logger.info("Number of base arrays: %d", len(self.base_arrays_init))
 
+    def with_minibatch_size(self, minibatch_size):
+        """Creates a copy of this TensorGraph with a different minibatch
+        size.
+
+        The optimized plan is reused, so this is much faster than creating a
+        new TensorGraph.  The graph of the copy needs to be built separately
+        (see :meth:`.build`).
+
+        Parameters
+        ----------
+        minibatch_size : int
+            the number of simultaneous inputs that will be passed through the
+            network
+
+        Returns
+        -------
+        :class:`.TensorGraph`
+            a new TensorGraph with the given minibatch size
+        """
+
+        tensor_graph = copy.copy(self)
+        tensor_graph.minibatch_size = minibatch_size
+        tensor_graph.graph = None
+
+        tensor_graph.base_arrays_init, tensor_graph.sig_map = (
+            graph_optimizer.create_signals(
+                self.sig_order, self.plan,
+                float_type=self.dtype.as_numpy_dtype,
+                minibatch_size=minibatch_size,
+                trainable_float_type=self.trainable_dtype.as_numpy_dtype))
+
+        return tensor_graph
+
     def build(self, rng):
         """Constructs a new graph to simulate the model.
 
@@ -110,6 +208,10 @@ class TensorGraph(object):
             the Simulator's random number generator
         """
 
+        if self.plan is None:
+            raise BuildError("Cannot rebuild a graph that was loaded from "
+                             "file (see `TensorGraph.load`)")
+
         self.graph = tf.Graph()
         self.signals = signals.SignalDict(self.sig_map, self.dtype,
                                           self.minibatch_size)
@@ -129,9 +231,27 @@ class TensorGraph(object):
             self.signals.dt = tf.constant(self.dt, self.dtype)
             self.signals.dt_val = self.dt  # store the actual value as well
 
+            # in inference mode, the trainable parameters that are not
+            # modified during the simulation (i.e., all of them, unless they
+            # are targeted by an online learning rule) are built as constants
+            if self.inference_only:
+                written = set(
+                    self.sig_map[sig].key for ops in self.plan for op in ops
+                    for sig in op.sets + op.incs + op.updates)
+                folded = set(k for k, (_, trainable) in
+                             self.base_arrays_init.items()
+                             if trainable and k not in written)
+            else:
+                folded = set()
+
             # create base arrays
             self.base_vars = []
             for k, (v, trainable) in self.base_arrays_init.items():
+                if k in folded:
+                    with tf.name_scope("trainable_consts"):
+                        self.base_vars += [tf.constant(v, dtype=v.dtype)]
+                    continue
+
                 unique_idx = 0
                 duplicate = True
                 while duplicate:
@@ -166,13 +286,29 @@ class TensorGraph(object):
             self.build_inputs()
 
             # pre-build stage
-            for ops in self.plan:
-                with self.graph.name_scope(utils.sanitize_name(
-                        builder.Builder.builders[type(ops[0])].__name__)):
-                    builder.Builder.pre_build(ops, self.signals, rng)
+            # note: we keep track of the build classes that use the random
+            # number generator (in the order that they consume it), so that
+            # they can be reseeded without rebuilding the graph
+            # note: the build classes are stored on this TensorGraph, since
+            # the graphs for other minibatch sizes share the same plan
+            self.op_builds = {}
+            self.rng_builds = []
+            with self.build_stats.phase("pre_build") as counts:
+                for ops in self.plan:
+                    build_class = builder.Builder.builders[type(ops[0])]
+                    with self.graph.name_scope(utils.sanitize_name(
+                            build_class.__name__)):
+                        builder.Builder.pre_build(ops, self.signals, rng,
+                                                  self.op_builds)
+
+                    if build_class.pass_rng:
+                        self.rng_builds += [self.op_builds[ops]]
+                counts["n_tf_ops"] = len(self.graph.get_operations())
 
             # build stage
-            self.build_loop()
+            with self.build_stats.phase("build_loop") as counts:
+                self.build_loop()
+                counts["n_tf_ops"] = len(self.graph.get_operations())
 
             # ops for initializing variables (will be called by simulator)
             self.trainable_init_op = tf.variables_initializer(
@@ -184,6 +320,259 @@ class TensorGraph(object):
                 [v for v in tf.global_variables()
                  if v not in tf.trainable_variables()])
 
+            # all the variables that make up the simulation state (note:
+            # this doesn't include variables created later, e.g. by
+            # optimizers)
+            self.state_vars = tf.global_variables() + tf.local_variables()
+            self.snapshot_slots = []
+            self.single_step = None
+
+    def export(self, path, sess):
+        """Saves the graph structure to ``path + ".meta"``, and collects the
+        other information needed to recreate this TensorGraph (see
+        :meth:`.load`).
+
+        Parameters
+        ----------
+        path : str
+            the file (without extension) in which the graph will be saved
+        sess : ``tf.Session``
+            the session in which the graph is being executed (used to look
+            up the current values of the trainable parameters)
+
+        Returns
+        -------
+        dict
+            the state of this TensorGraph (names of the elements of the
+            graph, base array values, and signal mappings for the probes and
+            input nodes)
+
+        Raises
+        ------
+        BuildError
+            if the graph contains Python functions (which can't be
+            serialized)
+        """
+
+        py_funcs = [op.name for op in self.graph.get_operations()
+                    if op.type in ("PyFunc", "PyFuncStateless")]
+        if len(py_funcs) > 0:
+            raise BuildError(
+                "Cannot export a graph containing Python functions (%s)" %
+                py_funcs)
+
+        tf.train.export_meta_graph(filename=path + ".meta", graph=self.graph)
+
+        # note: we save the current values of the trainable parameters, so
+        # that they will be the initial values in the loaded graph
+        trainable = [var for var, (_, t) in zip(
+            self.base_vars, self.base_arrays_init.values())
+            if t and isinstance(var, tf.Variable)]
+        trained = dict(zip(trainable, sess.run(trainable)))
+
+        keys = list(self.base_arrays_init.keys())
+
+        def export_sig(sig):
+            tensor_sig = self.sig_map[sig]
+            return (tensor_sig.indices, keys.index(tensor_sig.key),
+                    tensor_sig.dtype, tensor_sig.shape,
+                    tensor_sig.minibatched)
+
+        inputs = []
+        for n in self.invariant_inputs:
+            if n in self.invariant_ph:
+                const = self.const_inputs.get(n, None)
+                inputs += [(
+                    self.invariant_ph[n].name,
+                    None if const is None else
+                    (const[0].name, const[1].name, const[2]),
+                    export_sig(self.model.sig[n]["out"]))]
+            else:
+                inputs += [None]
+
+        return dict(
+            dt=self.dt, unroll=self.unroll, dtype=self.dtype.name,
+            trainable_dtype=self.trainable_dtype.name,
+            loss_scale=self.loss_scale, minibatch_size=self.minibatch_size,
+            device=self.device, jit=self.jit,
+            inference_only=self.inference_only,
+            base_arrays=[(trained.get(var, v), t) for var, (v, t) in zip(
+                self.base_vars, self.base_arrays_init.values())],
+            base_vars=[x.name for x in self.base_vars],
+            state_vars=[x.name for x in self.state_vars],
+            step_var=self.step_var.name, stop_var=self.stop_var.name,
+            steps_run=self.steps_run.name,
+            probe_arrays=[x.name for x in self.probe_arrays],
+            segment_vars=[x.name for x in self.segment_vars],
+            segment_ends=[x.name for x in self.segment_ends],
+            segment_adjoints=[x.name for x in self.segment_adjoints],
+            segment_weight=self.segment_weight.name,
+            local_init_op=self.local_init_op.name,
+            global_init_op=self.global_init_op.name,
+            probes=[export_sig(self.model.sig[p]["in"])
+                    for p in self.model.probes],
+            inputs=inputs)
+
+    @classmethod
+    def load(cls, path, state, model, invariant_inputs):
+        """Recreates a TensorGraph that was saved with :meth:`.export`.
+
+        The graph is imported directly, so none of the planning or graph
+        construction steps need to be repeated.
+
+        Parameters
+        ----------
+        path : str
+            the file (without extension) in which the graph was saved
+        state : dict
+            the output of :meth:`.export`
+        model : :class:`~nengo:nengo.builder.Model`
+            model containing the probes and the input/probe signals (the
+            model does not need to be built)
+        invariant_inputs : list of :class:`~nengo:nengo.Node`
+            the input nodes, in the same order as when the graph was exported
+
+        Returns
+        -------
+        :class:`.TensorGraph`
+            the loaded TensorGraph (note that this cannot be rebuilt, or
+            copied to a different minibatch size)
+        """
+
+        self = cls.__new__(cls)
+        self.model = model
+        self.dt = state["dt"]
+        self.unroll = state["unroll"]
+        self.dtype = tf.as_dtype(state["dtype"])
+        self.trainable_dtype = tf.as_dtype(state["trainable_dtype"])
+        self.loss_scale = state["loss_scale"]
+        self.minibatch_size = state["minibatch_size"]
+        self.device = state["device"]
+        self.jit = state["jit"]
+        self.inference_only = state["inference_only"]
+        self.build_stats = utils.BuildStats()
+        self.invariant_inputs = invariant_inputs
+        self.sig_order = self.plan = None
+        self.op_builds = {}
+        self.rng_builds = []
+        self.snapshot_slots = []
+        self.single_step = None
+        self.target_phs = {}
+        self.losses = {}
+        self.optimizers = {}
+
+        keys = [object() for _ in state["base_arrays"]]
+        self.base_arrays_init = OrderedDict(zip(keys, state["base_arrays"]))
+
+        self.sig_map = {}
+
+        def load_sig(sig, x):
+            indices, key, dtype, shape, minibatched = x
+            self.sig_map[sig] = signals.TensorSignal(
+                indices, keys[key], dtype, shape, minibatched)
+
+        for p, x in zip(model.probes, state["probes"]):
+            load_sig(model.sig[p]["in"], x)
+
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            tf.train.import_meta_graph(path + ".meta")
+
+            variables = {v.name: v for v in
+                         tf.global_variables() + tf.local_variables()}
+
+            def get(name):
+                if name in variables:
+                    return variables[name]
+                return self.graph.as_graph_element(name)
+
+            self.invariant_ph = {}
+            self.const_inputs = {}
+            for n, x in zip(invariant_inputs, state["inputs"]):
+                if x is None:
+                    continue
+                ph, const, sig = x
+                self.invariant_ph[n] = get(ph)
+                if const is not None:
+                    self.const_inputs[n] = (get(const[0]), get(const[1]),
+                                            const[2])
+                load_sig(model.sig[n]["out"], sig)
+
+            self.base_vars = [get(x) for x in state["base_vars"]]
+            self.state_vars = [get(x) for x in state["state_vars"]]
+            self.step_var = get(state["step_var"])
+            self.stop_var = get(state["stop_var"])
+            self.steps_run = get(state["steps_run"])
+            self.probe_arrays = [get(x) for x in state["probe_arrays"]]
+            self.segment_vars = [get(x) for x in state["segment_vars"]]
+            self.segment_ends = [get(x) for x in state["segment_ends"]]
+            self.segment_adjoints = [
+                get(x) for x in state["segment_adjoints"]]
+            self.segment_weight = get(state["segment_weight"])
+            self.local_init_op = get(state["local_init_op"])
+            self.global_init_op = get(state["global_init_op"])
+
+            # the trainable parameters are initialized to the values they
+            # had when the graph was exported
+            self.trainable_init_op = tf.group(*[
+                var.assign(v) for var, (v, t) in zip(
+                    self.base_vars, self.base_arrays_init.values())
+                if t and isinstance(var, tf.Variable)])
+
+        return self
+
+    def reseed(self, rng):
+        """Reinitialize the random number generation in the graph, without
+        rebuilding it.
+
+        The generator is consumed in the same order as in :meth:`.build`, so
+        the result will be the same as building a new graph with ``rng``.
+
+        Parameters
+        ----------
+        rng : :class:`~numpy:numpy.random.RandomState`
+            the Simulator's random number generator
+
+        Raises
+        ------
+        BuildError
+            if one of the operator build classes does not support reseeding
+        """
+
+        for built_ops in self.rng_builds:
+            built_ops.reseed(rng)
+
+    def build_snapshot(self):
+        """Creates variables that can store a copy of the simulation state,
+        along with the ops to copy the state into and out of them.
+
+        The copies are stored on the simulation device, so saving/restoring
+        the state does not require any data to be transferred to or from
+        the host.
+
+        Returns
+        -------
+        save_op : ``tf.Operation``
+            copies the current simulation state into the snapshot variables
+        restore_op : ``tf.Operation``
+            copies the snapshot variables back into the simulation state
+        """
+
+        with self.graph.as_default(), tf.device(self.device):
+            with tf.name_scope("snapshot"):
+                # note: we set collections=[] so that these variables
+                # are not affected by the simulation initialization ops
+                copies = [tf.Variable(tf.zeros(v.shape, v.dtype.base_dtype),
+                                      trainable=False, collections=[])
+                          for v in self.state_vars]
+
+                save_op = tf.group(*[c.assign(v) for c, v in zip(
+                    copies, self.state_vars)])
+                restore_op = tf.group(*[v.assign(c) for c, v in zip(
+                    copies, self.state_vars)])
+
+        return save_op, restore_op
+
     def build_step(self):
         """Build the operators that execute a single simulation timestep
         into the graph.
@@ -214,7 +603,8 @@ class TensorGraph(object):
         for ops in self.plan:
             with self.graph.name_scope(utils.sanitize_name(
                     builder.Builder.builders[type(ops[0])].__name__)):
-                outputs = builder.Builder.build(ops, self.signals)
+                outputs = builder.Builder.build(ops, self.signals,
+                                                self.op_builds)
 
             if outputs is not None:
                 side_effects += outputs
@@ -244,23 +634,103 @@ class TensorGraph(object):
 
         return probe_tensors, side_effects
 
+    def build_single_step(self):
+        """Builds a subgraph that executes a single simulation timestep
+        directly (outside of the ``tf.while_loop``).
+
+        The subgraph operates on the same variables as the simulation loop,
+        so the two can be used interchangeably.  It is built the first time
+        this function is called, and cached after that.
+
+        Returns
+        -------
+        step_ph : ``tf.Tensor``
+            placeholder for the number of timesteps that have been executed
+            before this step
+        input_phs : dict of {:class:`~nengo:nengo.Node`: ``tf.Tensor``}
+            placeholders for the output of each input node on this step, with
+            shape ``(node.size_out, minibatch_size)`` (for nodes with
+            constant outputs these default to the constant value)
+        probe_tensors : list of ``tf.Tensor``
+            the value of each probe at the end of the step
+        step_op : ``tf.Operation``
+            executes all the updates for the step
+
+        Raises
+        ------
+        BuildError
+            if the graph was loaded from file (see :meth:`.load`)
+        """
+
+        if self.single_step is not None:
+            return self.single_step
+
+        if self.plan is None:
+            raise BuildError("Cannot add a single step subgraph to a graph "
+                             "that was loaded from file")
+
+        with self.graph.as_default(), tf.device(self.device), tf.name_scope(
+                "single_step"):
+            step_ph = tf.placeholder(tf.int32, shape=(), name="step")
+
+            self.signals.bases = OrderedDict(
+                [(k, v._ref() if isinstance(v, tf.Variable) else v)
+                 for k, v in zip(self.base_arrays_init.keys(),
+                                 self.base_vars)])
+            self.signals.gather_bases = []
+            self.signals.step = step_ph + 1
+
+            input_phs = {}
+            for n in self.invariant_ph:
+                shape = (n.size_out, self.minibatch_size)
+                if n in self.const_inputs:
+                    input_phs[n] = tf.placeholder_with_default(
+                        self.const_inputs[n][1], shape)
+                else:
+                    input_phs[n] = tf.placeholder(self.dtype, shape)
+
+                self.signals.scatter(
+                    self.sig_map[self.model.sig[n]["out"]], input_phs[n])
+
+            # note: any variables used in the step were already created in
+            # the simulation loop
+            with tf.variable_scope("", reuse=True):
+                probe_tensors, side_effects = self.build_step()
+
+            step_op = tf.group(*(side_effects +
+                                 list(self.signals.bases.values())))
+
+        self.single_step = (step_ph, input_phs, probe_tensors, step_op)
+
+        return self.single_step
+
     def build_loop(self):
         """Build simulation loop.
 
         Loop can be constructed using the ``tf.while_loop`` architecture, or
         explicitly unrolled.  Unrolling increases graph construction time
         and memory usage, but increases simulation speed.
+
+        If the loop is unrolled, a second (non-unrolled) loop is added after
+        the main loop, which executes any remaining steps when the number of
+        steps is not a multiple of ``unroll_simulation``.
         """
 
         def loop_condition(step, stop, *_):
             return step < stop
 
-        def loop_body(step, stop, loop_i, probe_arrays, base_vars):
+        def unrolled_condition(step, stop, *_):
+            # only execute the unrolled body if there are enough steps
+            # remaining to complete all the iterations
+            return step + self.unroll <= stop
+
+        def loop_body(step, stop, loop_i, probe_arrays, base_vars,
+                      n_iters=self.unroll, reuse=False):
             self.signals.bases = OrderedDict(
                 [(k, v) for k, v in zip(self.base_arrays_init.keys(),
                                         base_vars)])
 
-            for iter in range(self.unroll):
+            for iter in range(n_iters):
                 logger.debug("BUILDING ITERATION %d", iter)
                 with self.graph.name_scope("iteration_%d" % iter):
                     # note: nengo step counter is incremented at the beginning
@@ -270,9 +740,19 @@ class TensorGraph(object):
 
                     # fill in invariant input data
                     for n in self.invariant_ph:
+                        if n in self.const_inputs:
+                            # use the constant value, unless an override
+                            # value has been fed in
+                            override = self.invariant_ph[n]
+                            val = tf.cond(
+                                tf.shape(override)[0] > 0,
+                                lambda: override[loop_i],
+                                lambda: self.const_inputs[n][1])
+                        else:
+                            val = self.invariant_ph[n][loop_i]
+
                         self.signals.scatter(
-                            self.sig_map[self.model.sig[n]["out"]],
-                            self.invariant_ph[n][loop_i])
+                            self.sig_map[self.model.sig[n]["out"]], val)
 
                     # build the operators for a single step
                     # note: we tie things to the `loop_i` variable so that we
@@ -285,12 +765,17 @@ class TensorGraph(object):
                         # aren't accidentally creating new variables for
                         # unrolled iterations (this is really only a concern
                         # with TensorNodes)
-                        with tf.variable_scope("", reuse=iter > 0):
+                        with tf.variable_scope("", reuse=reuse or iter > 0):
                             probe_tensors, side_effects = self.build_step()
 
                     # copy probe data to array
                     for i, p in enumerate(probe_tensors):
-                        probe_arrays[i] = probe_arrays[i].write(loop_i, p)
+                        if self.model.probes[i].sample_every is None:
+                            probe_arrays[i] = probe_arrays[i].write(loop_i, p)
+                        else:
+                            probe_arrays[i] = self.write_sampled_probe(
+                                probe_arrays[i], p, self.model.probes[i],
+                                step)
 
                     # need to make sure that any operators that could have side
                     # effects run each timestep, so we tie them to the loop
@@ -305,6 +790,20 @@ class TensorGraph(object):
 
             return step, stop, loop_i, probe_arrays, base_vars
 
+        def remainder_body(*args):
+            # note: the variables in this loop were already created in the
+            # main loop
+            return loop_body(*args, n_iters=1, reuse=True)
+
+        def jit(body):
+            def jit_body(*args):
+                # note: operators created in this scope will be clustered and
+                # compiled by XLA (where possible)
+                with tf.contrib.compiler.jit.experimental_jit_scope():
+                    return body(*args)
+
+            return jit_body if self.jit else body
+
         self.step_var = tf.placeholder(tf.int32, shape=(), name="step")
         self.stop_var = tf.placeholder(tf.int32, shape=(), name="stop")
         loop_i = tf.constant(0)
@@ -325,8 +824,15 @@ class TensorGraph(object):
         # pretty serial though, so I'm not sure how much benefit we would
         # get (and it seems non-trivial to get working correctly)
         loop_vars = tf.while_loop(
-            loop_condition, loop_body, loop_vars=loop_vars,
-            parallel_iterations=1, back_prop=True)
+            loop_condition if self.unroll == 1 else unrolled_condition,
+            jit(loop_body), loop_vars=loop_vars,
+            parallel_iterations=1, back_prop=not self.inference_only)
+
+        if self.unroll > 1:
+            # execute the remaining (n_steps % unroll) steps one at a time
+            loop_vars = tf.while_loop(
+                loop_condition, jit(remainder_body), loop_vars=loop_vars,
+                parallel_iterations=1, back_prop=not self.inference_only)
 
         self.steps_run = loop_vars[2]
         self.probe_arrays = []
@@ -334,12 +840,108 @@ class TensorGraph(object):
             x = p.stack()
             self.probe_arrays += [x]
 
+        # the simulation state at the end of the loop, and placeholders for
+        # the gradient of the rest of the sequence with respect to that
+        # state (used to backpropagate through a sequence one segment at a
+        # time, see `build_segment_loss`)
+        self.segment_vars = []
+        self.segment_ends = []
+        self.segment_adjoints = []
+        if not self.inference_only:
+            for var, end, (_, trainable) in zip(
+                    self.base_vars, loop_vars[4],
+                    self.base_arrays_init.values()):
+                if (isinstance(var, tf.Variable) and not trainable and
+                        var.dtype.base_dtype.is_floating):
+                    self.segment_vars += [var]
+                    self.segment_ends += [end]
+                    self.segment_adjoints += [
+                        tf.placeholder(var.dtype.base_dtype, var.shape)]
+        self.segment_weight = tf.placeholder_with_default(
+            tf.constant(1, dtype=self.dtype), ())
+
+    def jit_diagnostics(self):
+        """Finds the operators in the simulation step that cannot be compiled
+        by XLA (these will be executed outside the compiled clusters, and
+        will split the step into multiple clusters).
+
+        Returns
+        -------
+        dict of {str: list of ``tf.Operation``}
+            the operators that block compilation, grouped by the reason
+        """
+
+        blockers = {}
+        for op in self.graph.get_operations():
+            if "_XlaCompile" not in op.node_def.attr:
+                continue
+
+            if op.type in ("PyFunc", "PyFuncStateless"):
+                reason = "py_func"
+            elif any(x.dtype._is_ref_dtype for x in
+                     list(op.inputs) + list(op.outputs)):
+                reason = "ref variable access"
+            else:
+                continue
+
+            blockers.setdefault(reason, []).append(op)
+
+        return blockers
+
+    def write_sampled_probe(self, array, value, probe, step):
+        """Add the value of a probe with ``sample_every`` set to the array
+        of probe data.
+
+        The value is only written on the sampled timesteps, so the array will
+        contain one entry per sample (rather than one per timestep), which
+        reduces the amount of memory used and the amount of data that needs
+        to be transferred back from the device.
+
+        Parameters
+        ----------
+        array : ``tf.TensorArray``
+            array containing the data for ``probe``
+        value : ``tf.Tensor``
+            the probed value on the current timestep
+        probe : :class:`~nengo:nengo.Probe`
+            the probe being written
+        step : ``tf.Tensor``
+            the current simulation timestep
+
+        Returns
+        -------
+        ``tf.TensorArray``
+            the updated array
+        """
+
+        # note: this mirrors the calculation in
+        # `Simulator._update_probe_data`
+        period = probe.sample_every / self.dt
+        sample = tf.cast(step, tf.float64) % period < 1
+
+        # note: we pass the flow of the array through the conditional, rather
+        # than the array itself, because TensorArrays can't be returned
+        # from `tf.cond`
+        flow = tf.cond(sample,
+                       lambda: array.write(array.size(), value).flow,
+                       lambda: tf.identity(array.flow))
+
+        return tf.TensorArray(array.dtype, handle=array.handle, flow=flow,
+                              element_shape=value.get_shape())
+
     def build_inputs(self):
         """Sets up the inputs in the model (which will be computed outside of
         Tensorflow and fed in each simulation block).
+
+        Nodes with constant outputs (:class:`~numpy:numpy.ndarray`) are
+        built into the graph, so that they don't need to be fed in.  Their
+        placeholders in ``invariant_ph`` default to an empty array, in which
+        case the constant value will be used.  The constant value can also
+        be changed by feeding a new value to ``const_inputs[node][0]``.
         """
 
         self.invariant_ph = {}
+        self.const_inputs = {}
         for n in self.invariant_inputs:
             if self.model.sig[n]["out"] in self.sig_map:
                 # make sure the indices for this input are loaded into
@@ -347,11 +949,29 @@ class TensorGraph(object):
                 # only read as part of a larger block during the simulation)
                 self.sig_map[self.model.sig[n]["out"]].load_indices()
 
-                # set up a placeholder input for this node
-                self.invariant_ph[n] = tf.placeholder(
-                    self.dtype, (None, n.size_out, self.minibatch_size))
+                shape = (None, n.size_out, self.minibatch_size)
+                if isinstance(n.output, np.ndarray):
+                    # store the value placeholder, the value broadcast
+                    # across the minibatch dimension, and the value that was
+                    # built into the graph
+                    value = tf.placeholder_with_default(
+                        tf.constant(n.output, dtype=self.dtype),
+                        (n.size_out,))
+                    self.const_inputs[n] = (
+                        value, tf.tile(value[:, None],
+                                       (1, self.minibatch_size)),
+                        n.output.copy())
+
+                    # placeholder for (optionally) overriding the constant
+                    # value on each timestep
+                    self.invariant_ph[n] = tf.placeholder_with_default(
+                        tf.zeros((0,) + shape[1:], dtype=self.dtype), shape)
+                else:
+                    # set up a placeholder input for this node
+                    self.invariant_ph[n] = tf.placeholder(self.dtype, shape)
 
-    def build_optimizer(self, optimizer, targets, objective):
+    def build_optimizer(self, optimizer, targets, objective,
+                        accumulate_steps=1, checkpoint=False):
         """Adds elements into the graph to execute the given optimizer.
 
         Parameters
@@ -367,17 +987,53 @@ class TensorGraph(object):
             actual output and target output for a probe in ``targets``
             and returns a ``tf.Tensor`` representing the scalar loss value for
             that Probe (loss will be averaged across Probes).
+        accumulate_steps : int, optional
+            if greater than 1, the gradients are summed over this many
+            minibatches, and then their average is applied in a single
+            update
+        checkpoint : bool, optional
+            if True, the gradients are computed for one segment of a sequence
+            at a time (see :meth:`.build_segment_loss`); the segment
+            gradients are accumulated, and applied after the first segment
+            of every ``accumulate_steps`` sequences
+
+        Returns
+        -------
+        opt_op : ``tf.Operation`` or tuple of ``tf.Operation``
+            operator that computes the gradients and applies the update;
+            if ``accumulate_steps > 1`` this is a tuple
+            ``(accumulate_op, apply_op, reset_op)``, where ``accumulate_op``
+            adds the current gradients to the accumulators, ``apply_op``
+            adds the current gradients, applies the accumulated update, and
+            resets the accumulators, and ``reset_op`` resets the
+            accumulators (discarding any partially accumulated gradients).
+            if ``checkpoint`` is True, the tuple has a fourth element
+            containing the gradients with respect to the state at the start
+            of the segment.
+        opt_slots_init : ``tf.Operation``
+            initializes any variables created by the optimizer
         """
 
         with self.graph.as_default(), tf.device(self.device):
             loss = self.build_loss(objective, targets)
 
-            key = (optimizer, targets, objective)
+            key = (optimizer, targets, objective, accumulate_steps,
+                   checkpoint)
             if key not in self.optimizers:
                 # create optimizer operator
                 try:
-                    opt_op = optimizer.minimize(
-                        loss, var_list=tf.trainable_variables())
+                    if checkpoint:
+                        loss, state_grads = self.build_segment_loss(loss)
+                        opt_op, accumulators = self.build_accumulator(
+                            optimizer, loss, accumulate_steps)
+                        opt_op += (state_grads,)
+                    elif accumulate_steps > 1:
+                        opt_op, accumulators = self.build_accumulator(
+                            optimizer, loss, accumulate_steps)
+                    else:
+                        opt_op = optimizer.apply_gradients(
+                            self.compute_gradients(optimizer, loss))
+                        accumulators = []
                 except ValueError as e:
                     logger.exception(e)
                     raise SimulationError(
@@ -388,12 +1044,169 @@ class TensorGraph(object):
                 opt_slots_init = tf.variables_initializer(
                     [optimizer.get_slot(v, name)
                      for v in tf.trainable_variables()
-                     for name in optimizer.get_slot_names()])
+                     for name in optimizer.get_slot_names()] + accumulators)
 
                 self.optimizers[key] = (opt_op, opt_slots_init)
 
             return self.optimizers[key]
 
+    def compute_gradients(self, optimizer, loss):
+        """Computes the gradient of the loss with respect to the trainable
+        parameters.
+
+        If ``self.loss_scale`` is not 1, the loss is multiplied by that value
+        before the gradients are computed, and the gradients are divided by
+        it afterwards (this avoids underflow in the gradients of reduced
+        precision signals).
+
+        Parameters
+        ----------
+        optimizer : ``tf.train.Optimizer``
+            instance of a Tensorflow optimizer class
+        loss : ``tf.Tensor``
+            the loss value to be minimized
+
+        Returns
+        -------
+        list of tuple of (``tf.Tensor``, ``tf.Variable``)
+            gradient and variable pairs (only including variables that have a
+            gradient)
+
+        Raises
+        ------
+        ValueError
+            if none of the trainable parameters have a gradient
+        """
+
+        if self.loss_scale != 1:
+            loss *= self.loss_scale
+
+        grads = [(g, v) for g, v in optimizer.compute_gradients(
+            loss, var_list=tf.trainable_variables()) if g is not None]
+        if len(grads) == 0:
+            raise ValueError("No gradients for any variable")
+
+        if self.loss_scale != 1:
+            scale = 1 / self.loss_scale
+            grads = [(tf.IndexedSlices(g.values * scale, g.indices,
+                                       g.dense_shape)
+                      if isinstance(g, tf.IndexedSlices) else g * scale, v)
+                     for g, v in grads]
+
+        return grads
+
+    def build_segment_loss(self, loss):
+        """Adds elements into the graph to backpropagate through a sequence
+        one segment at a time.
+
+        Each segment is simulated starting from the state at the end of the
+        previous segment.  The gradient of the rest of the sequence with
+        respect to the state at the end of the segment is fed in to
+        ``segment_adjoints`` (this is the ``state_grads`` value computed for
+        the next segment), so that summing the parameter gradients of all the
+        segments gives the gradient for the whole sequence.
+
+        Parameters
+        ----------
+        loss : ``tf.Tensor``
+            the loss value for the segment
+
+        Returns
+        -------
+        segment_loss : ``tf.Tensor``
+            the loss value weighted by ``segment_weight`` (the fraction of the
+            sequence covered by this segment), plus the contribution of the
+            rest of the sequence
+        state_grads : list of ``tf.Tensor``
+            the gradient of ``segment_loss`` with respect to the state at the
+            start of the segment (one for each of ``segment_vars``)
+        """
+
+        with tf.name_scope("segment_loss"):
+            segment_loss = loss * tf.cast(self.segment_weight, loss.dtype)
+            for end, adjoint in zip(self.segment_ends, self.segment_adjoints):
+                segment_loss += tf.cast(tf.reduce_sum(end * adjoint),
+                                        loss.dtype)
+
+            # note: the loop reads the initial state from the variable
+            # references, so that is what we compute the gradient with
+            # respect to
+            state_grads = tf.gradients(
+                segment_loss * self.loss_scale,
+                [v._ref() for v in self.segment_vars])
+            state_grads = [
+                tf.zeros(v.shape, v.dtype.base_dtype) if g is None else
+                tf.convert_to_tensor(g) / self.loss_scale
+                for g, v in zip(state_grads, self.segment_vars)]
+
+        return segment_loss, state_grads
+
+    def build_accumulator(self, optimizer, loss, accumulate_steps):
+        """Adds elements into the graph to accumulate gradients across
+        several minibatches before applying them.
+
+        Parameters
+        ----------
+        optimizer : ``tf.train.Optimizer``
+            instance of a Tensorflow optimizer class
+        loss : ``tf.Tensor``
+            the loss value to be minimized
+        accumulate_steps : int
+            the number of minibatches over which gradients are accumulated
+
+        Returns
+        -------
+        ops : tuple of ``tf.Operation``
+            ``(accumulate_op, apply_op, reset_op)`` (see
+            :meth:`.build_optimizer`)
+        accumulators : list of ``tf.Variable``
+            the variables storing the accumulated gradients (these need to
+            be initialized before the ops are run)
+        """
+
+        grads = self.compute_gradients(optimizer, loss)
+
+        with tf.name_scope("accumulators"):
+            # note: we set collections=[] so that these variables are not
+            # affected by the simulation initialization ops
+            accumulators = [
+                tf.Variable(tf.zeros(v.shape, v.dtype.base_dtype),
+                            trainable=False, collections=[])
+                for _, v in grads]
+
+        accumulate_ops = []
+        for (g, _), acc in zip(grads, accumulators):
+            if isinstance(g, tf.IndexedSlices):
+                # sparse gradients (e.g., from gathers on the base arrays)
+                # are added in place
+                accumulate_ops.append(
+                    tf.scatter_add(acc, g.indices, g.values))
+            else:
+                accumulate_ops.append(tf.assign_add(acc, g))
+        accumulate_op = tf.group(*accumulate_ops)
+
+        # fused op that adds the current gradients and applies the update,
+        # so the last minibatch only needs one call to `sess.run` (note: this
+        # reuses the accumulation ops, rather than building a second copy)
+        with tf.control_dependencies([accumulate_op]):
+            avg_grads = [tf.identity(acc) / accumulate_steps
+                         for acc in accumulators]
+        # note: this is outside the control dependencies, so that the
+        # initializers of any variables created by the optimizer don't
+        # depend on the gradient computation
+        apply_op = optimizer.apply_gradients(
+            [(g, v) for g, (_, v) in zip(avg_grads, grads)])
+        with tf.control_dependencies([apply_op]):
+            apply_op = tf.group(*[
+                tf.assign(acc, tf.zeros_like(acc)) for acc in accumulators])
+
+        # discards any partially accumulated gradients (e.g., left over from
+        # a previous call to `Simulator.train`)
+        reset_op = tf.group(*[
+            tf.assign(acc, tf.zeros_like(acc)) for acc in accumulators])
+
+        return (accumulate_op, apply_op, reset_op), accumulators
+
     def build_loss(self, objective, targets):
         """Adds elements into the graph to compute the given objective.
 
@@ -424,14 +1237,30 @@ class TensorGraph(object):
                         self.dtype, (None, p.size_in, self.minibatch_size),
                         name="targets")
 
+                target = self.target_phs[p]
+                if p.sample_every is not None:
+                    # the probe output only contains the sampled timesteps,
+                    # so we need to select the matching target values
+                    period = p.sample_every / self.dt
+                    steps = tf.range(self.step_var + 1,
+                                     self.step_var + 1 + tf.shape(target)[0])
+                    target = tf.boolean_mask(
+                        target, tf.cast(steps, tf.float64) % period < 1)
+
+                output = self.probe_arrays[probe_index]
+                if self.dtype != self.trainable_dtype:
+                    # compute the loss at the same precision as the
+                    # trainable parameters
+                    output = tf.cast(output, self.trainable_dtype)
+                    target = tf.cast(target, self.trainable_dtype)
+
                 # compute loss
                 if objective == "mse":
-                    loss += [tf.reduce_mean(tf.square(
-                        self.target_phs[p] - self.probe_arrays[probe_index]))]
+                    loss += [tf.reduce_mean(tf.square(target - output))]
                 elif callable(objective):
                     # move minibatch dimension back to the front
-                    x = tf.transpose(self.probe_arrays[probe_index], (2, 0, 1))
-                    t = tf.transpose(self.target_phs[p], (2, 0, 1))
+                    x = tf.transpose(output, (2, 0, 1))
+                    t = tf.transpose(target, (2, 0, 1))
                     loss += [objective(x, t)]
                 else:
                     raise NotImplementedError
@@ -12,12 +12,13 @@ def test_custom_builder():
         updates = None
 
     ops = (TestOp(),)
+    op_builds = {}
 
     with pytest.raises(BuildError):
-        Builder.pre_build(ops, None, None)
+        Builder.pre_build(ops, None, None, op_builds)
 
     with pytest.raises(BuildError):
-        Builder.build(ops, None)
+        Builder.build(ops, None, op_builds)
 
     with pytest.warns(UserWarning):
         @Builder.register(TestOp)
@@ -39,9 +40,14 @@ def test_custom_builder():
 
                 return 0, 1
 
-    Builder.pre_build(ops, None, True)
+    Builder.pre_build(ops, None, True, op_builds)
+    assert isinstance(op_builds[ops], TestOpBuilder)
 
-    result = Builder.build(ops, None)
+    # build classes are stored per graph, not shared
+    with pytest.raises(BuildError):
+        Builder.build(ops, None, {})
+
+    result = Builder.build(ops, None, op_builds)
 
     assert len(result) == 2
     assert result[0] == 0
@@ -12,7 +12,8 @@ import pytest
 from nengo_dl import builder, nengo_version
 from nengo_dl.graph_optimizer import (
     mergeable, greedy_planner, tree_planner, transitive_planner, noop_planner,
-    order_signals, noop_order_signals, create_signals)
+    order_signals, noop_order_signals, create_signals,
+    operator_dependency_graph)
 from nengo_dl.tensor_node import SimTensorNode
 
 
@@ -265,6 +266,74 @@ def test_planner_size():
     assert len(plan[2]) == 1
 
 
+# plans found by the original (exhaustive) tree_planner search for the
+# random graphs in `test_tree_planner_random` (the operators in each group
+# are identified by their index in the operator list)
+tree_plans = {
+    (0, 1): [(0, 11, 18, 21), (2, 26, 27), (6, 12, 13), (25, 28, 29),
+             (7, 20), (9, 10), (16, 23), (1,), (22,), (3,), (4,), (17,),
+             (24,), (8,), (5,), (15,), (19,), (14,)],
+    (0, 2): [(6, 12, 13), (0, 11, 16, 18, 21), (2, 26, 27), (9, 10),
+             (7, 17, 20), (1, 24), (3, 5), (23,), (8,), (22,), (4,),
+             (15, 25, 28, 29), (19,), (14,)],
+    (0, 3): [(2, 26, 27), (6, 12, 13), (9, 10), (0, 11, 16, 18, 21, 23),
+             (7, 17, 20), (1, 24), (8,), (22,), (3, 5), (4,),
+             (15, 25, 28, 29), (19,), (14,)],
+    (0, 4): [(6, 12, 13), (2, 26, 27), (9, 10), (0, 11, 16, 18, 21, 23),
+             (7, 17, 20), (1, 24), (8,), (22,), (3, 5), (4,),
+             (15, 25, 28, 29), (19,), (14,)],
+    (1, 1): [(11, 12, 21, 29), (7, 8, 10), (13, 26), (1, 19), (2, 25),
+             (14, 24), (0,), (3,), (4,), (18,), (5,), (6,), (28,), (9,),
+             (16,), (22,), (20,), (15,), (23,), (17,), (27,)],
+    (1, 2): [(7, 8, 10), (13, 26), (1, 19), (11, 12, 21, 29), (2, 25), (4,),
+             (3, 18), (5,), (6,), (28,), (9,), (14, 16, 24), (23,), (0,),
+             (17, 22), (20,), (15,), (27,)],
+    (1, 3): [(13, 26), (1, 19), (7, 8, 10), (4,), (3, 18), (11, 12, 21, 29),
+             (2, 25), (14, 16, 24), (0,), (5,), (6,), (28,), (9,), (20,),
+             (15,), (23,), (17, 22), (27,)],
+    (1, 4): [(7, 8, 10), (1, 19), (4,), (3, 18), (11, 12, 21, 29), (2, 25),
+             (14, 16, 24), (0, 13, 26), (5,), (6,), (28,), (9,), (20,),
+             (15,), (23,), (17, 22), (27,)],
+}
+
+
+@pytest.mark.parametrize("seed, max_depth", sorted(tree_plans))
+def test_tree_planner_random(seed, max_depth):
+    # random layered graph, with several different (unmergeable) operator
+    # types at each layer
+    rng = np.random.RandomState(seed)
+    dtypes = (np.float32, np.float64, np.int32)
+    layers = [[DummySignal(dtype=dtypes[rng.randint(3)],
+                           label="%d_%d" % (i, j)) for j in range(6)]
+              for i in range(6)]
+    operators = []
+    for _ in range(30):
+        i = rng.randint(len(layers) - 1)
+        src = layers[i][rng.randint(6)]
+        dst = layers[i + 1 + rng.randint(len(layers) - i - 1)][
+            rng.randint(6)]
+        if rng.rand() < 0.5:
+            operators.append(Copy(src, dst, inc=True))
+        else:
+            operators.append(ElementwiseInc(src, src, dst))
+
+    plan = tree_planner(operators, max_depth=max_depth)
+
+    # the plan matches the original search (with the operators in each
+    # group ordered as in the model)
+    assert [tuple(operators.index(op) for op in group)
+            for group in plan] == tree_plans[(seed, max_depth)]
+
+    # all the operators in a group are mergeable
+    for group in plan:
+        assert all(mergeable(op, group[:1]) for op in group[1:])
+
+    # operators are executed after the operators they depend on
+    group_index = {op: i for i, group in enumerate(plan) for op in group}
+    for op, successors in operator_dependency_graph(operators).items():
+        assert all(group_index[op] < group_index[x] for x in successors)
+
+
 def test_noop_planner():
     inputs = [DummySignal() for _ in range(3)]
     operators = [Copy(inputs[1], inputs[2]), Copy(inputs[0], inputs[1])]
@@ -650,6 +719,14 @@ def test_create_signals():
     assert sig_map[sigs[1]].key != sig_map[sigs[2]].key
     assert sig_map[sigs[2]].key == sig_map[sigs[3]].key
 
+    # check trainable precision
+    bases, sig_map = create_signals(sigs, plan, np.float16, 10,
+                                    trainable_float_type=np.float32)
+    assert bases[sig_map[sigs[0]].key][0].dtype == np.float32
+    assert bases[sig_map[sigs[2]].key][0].dtype == np.float16
+    assert sig_map[sigs[0]].dtype == np.float32
+    assert sig_map[sigs[2]].dtype == np.float16
+
     # check that scalars get upsized
     sigs = [DummySignal(shape=()), DummySignal(shape=(4,))]
     plan = [tuple(DummyOp(reads=[x]) for x in sigs)]
@@ -79,21 +79,3 @@ def test_entry_point():
     sims = [ep.load() for ep in
             pkg_resources.iter_entry_points(group='nengo.backends')]
     assert nengo_dl.Simulator in sims
-
-
-def test_unconnected_node(Simulator):
-    hits = np.array(0)
-    dt = 0.001
-
-    def f(t):
-        hits[...] += 1
-
-    model = nengo.Network()
-    with model:
-        nengo.Node(f, size_in=0, size_out=0)
-    with Simulator(model, unroll_simulation=1) as sim:
-        assert hits == 0
-        sim.run(dt)
-        assert hits == 1
-        sim.run(dt)
-        assert hits == 2
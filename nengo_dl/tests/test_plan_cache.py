@@ -0,0 +1,124 @@
+import os
+
+import nengo
+from nengo.builder.operator import Copy, DotInc
+import numpy as np
+import tensorflow as tf
+
+from nengo_dl import version
+from nengo_dl.graph_optimizer import tree_planner, order_signals
+from nengo_dl.plan_cache import PlanCache
+from nengo_dl.tests.test_graph_optimizer import DummySignal
+
+
+def test_plan_cache(Simulator, tmpdir, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0.5])
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        nengo.Connection(ens, ens, synapse=0.1)
+        p = nengo.Probe(ens)
+
+    cache = PlanCache(cache_dir=str(tmpdir))
+
+    with Simulator(net, plan_cache=cache) as sim:
+        sim.run_steps(10)
+        canonical = sim.data[p]
+
+    assert cache.hits == 0
+    assert cache.misses == 1
+    assert len(os.listdir(str(tmpdir))) == 1
+
+    with Simulator(net, plan_cache=cache) as sim:
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p], canonical)
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # changing the precision creates a new cache entry
+    with Simulator(net, plan_cache=cache, dtype=tf.float64) as sim:
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p], canonical, atol=1e-6)
+
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert len(os.listdir(str(tmpdir))) == 2
+
+
+def test_plan_cache_key(monkeypatch):
+    def ops(dtype=np.float32):
+        a = DummySignal(label="a")
+        b = DummySignal(label="b", dtype=dtype)
+        return [Copy(a, b, inc=True), DotInc(a, b, DummySignal(label="c"))]
+
+    cache = PlanCache(cache_dir=None)
+
+    # key is independent of signal identity/names
+    assert cache.get_key(ops()) == cache.get_key(ops())
+
+    # but does depend on signal properties and the other parameters
+    assert cache.get_key(ops()) != cache.get_key(ops(dtype=np.int32))
+    assert (cache.get_key(ops(), minibatch_size=1) !=
+            cache.get_key(ops(), minibatch_size=2))
+
+    # and on the nengo_dl version (so plans from other releases aren't used)
+    key = cache.get_key(ops())
+    monkeypatch.setattr(version, "version", "0.0.0")
+    assert cache.get_key(ops()) != key
+
+
+def test_plan_cache_store_load(tmpdir):
+    inputs = [DummySignal(label="in%d" % i) for i in range(3)]
+    outputs = [DummySignal(label="out%d" % i) for i in range(3)]
+    operators = [Copy(x, y, inc=True) for x, y in zip(inputs, outputs)]
+    operators += [Copy(outputs[0], DummySignal(label="z"))]
+
+    cache = PlanCache(cache_dir=str(tmpdir))
+    key = cache.get_key(operators)
+    assert cache.load(key, operators) is None
+    assert cache.misses == 1
+
+    sigs, plan = order_signals(tree_planner(operators))
+    cache.store(key, operators, sigs, plan)
+
+    sigs2, plan2 = cache.load(key, operators)
+    assert cache.hits == 1
+    assert sigs2 == sigs
+    assert plan2 == plan
+
+    # corrupted files are treated as a miss (and removed)
+    with open(cache._key2path(key), "w") as f:
+        f.write("garbage")
+    assert cache.load(key, operators) is None
+    assert cache.misses == 2
+    assert cache.get_size() == 0
+
+
+def test_plan_cache_shrink(tmpdir):
+    cache = PlanCache(cache_dir=str(tmpdir))
+
+    operators = [Copy(DummySignal(), DummySignal())]
+    sigs, plan = order_signals(tree_planner(operators))
+    for i in range(3):
+        cache.store(cache.get_key(operators, i=i), operators, sigs, plan)
+        os.utime(cache._key2path(cache.get_key(operators, i=i)),
+                 (i, i))
+
+    size = cache.get_size()
+    assert len(cache._get_files()) == 3
+
+    # least recently used entry is removed first
+    cache.shrink(limit=size - 1)
+    assert len(cache._get_files()) == 2
+    assert not os.path.exists(cache._key2path(cache.get_key(operators, i=0)))
+
+    # size limit is applied automatically when storing new entries
+    cache.limit = 0
+    cache.store(cache.get_key(operators, i=3), operators, sigs, plan)
+    assert len(cache._get_files()) == 0
+
+    cache.limit = size
+    cache.store(cache.get_key(operators, i=4), operators, sigs, plan)
+    cache.invalidate()
+    assert cache.get_size() == 0
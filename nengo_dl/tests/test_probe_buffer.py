@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+
+from nengo_dl.probe_buffer import ProbeBuffer, MemmapProbeBuffer
+
+
+def test_probe_buffer():
+    buffer = ProbeBuffer((3,), np.float64)
+    assert buffer.data.shape == (0, 3)
+
+    data = np.arange(30, dtype=np.float64).reshape((10, 3))
+    buffer.append(data[:3])
+    version = buffer.version
+    view = buffer.data
+    assert buffer.capacity == 3
+
+    # appending within capacity happens in place
+    buffer.append(data[3:4])
+    assert buffer.capacity == 6
+    buffer.append(data[4:6])
+    assert buffer.capacity == 6
+    assert buffer.version == version + 2
+    assert np.allclose(buffer.data, data[:6])
+
+    # previous views are unaffected by new data
+    assert np.allclose(view, data[:3])
+
+    buffer.append(data[6:])
+    assert buffer.capacity == 12
+    assert len(buffer) == 10
+    assert np.allclose(buffer.data, data)
+
+    # clearing doesn't overwrite previously read data
+    view = buffer.data
+    buffer.clear()
+    assert buffer.data.shape == (0, 3)
+    buffer.append(data[:2] + 1)
+    assert np.allclose(buffer.data, data[:2] + 1)
+    assert np.allclose(view, data)
+
+
+def test_probe_buffer_truncate():
+    buffer = ProbeBuffer((2,), np.float32)
+    data = np.arange(20, dtype=np.float32).reshape((10, 2))
+    buffer.append(data)
+    view = buffer.data
+    version = buffer.version
+
+    buffer.truncate(12)
+    assert buffer.version == version
+    assert len(buffer) == 10
+
+    buffer.truncate(4)
+    assert buffer.version == version + 1
+    assert np.allclose(buffer.data, data[:4])
+
+    # new data doesn't overwrite previously read data
+    buffer.append(data[:6] + 1)
+    assert np.allclose(buffer.data[4:], data[:6] + 1)
+    assert np.allclose(view, data)
+
+
+def test_memmap_probe_buffer(tmpdir):
+    path = str(tmpdir.join("probe.dat"))
+    buffer = MemmapProbeBuffer(path, (3, 2), np.float32)
+
+    assert buffer.data.shape == (0, 3, 2)
+    assert len(buffer) == 0
+
+    data = np.arange(60, dtype=np.float32).reshape((10, 3, 2))
+    buffer.append(data[:4])
+    assert buffer.capacity == 4
+    assert np.allclose(buffer.data, data[:4])
+
+    # capacity doubles when the buffer is full
+    buffer.append(data[4:5])
+    assert buffer.capacity == 8
+    buffer.append(data[5:])
+    assert buffer.capacity == 16
+    assert len(buffer) == 10
+    assert np.allclose(buffer.data, data)
+    assert isinstance(buffer.data, np.memmap)
+    assert os.path.getsize(path) == 16 * 3 * 2 * 4
+
+    # empty chunks
+    buffer.append(data[:0])
+    assert np.allclose(buffer.data, data)
+
+    # clearing moves the buffer to a new file, so it doesn't overwrite
+    # previously read data
+    view = buffer.data
+    buffer.clear()
+    assert buffer.data.shape == (0, 3, 2)
+    buffer.append(data[:2] + 1)
+    assert buffer.capacity == 2
+    assert np.allclose(buffer.data, data[:2] + 1)
+    assert np.allclose(view, data)
+    assert buffer.path != path
+    assert not os.path.exists(path)
+    assert os.listdir(str(tmpdir)) == [os.path.basename(buffer.path)]
+
+
+def test_memmap_probe_buffer_truncate(tmpdir):
+    buffer = MemmapProbeBuffer(str(tmpdir.join("probe.dat")), (2,),
+                               np.float32)
+    data = np.arange(20, dtype=np.float32).reshape((10, 2))
+    buffer.append(data)
+    view = buffer.data
+    version = buffer.version
+
+    buffer.truncate(12)
+    assert buffer.version == version
+    assert len(buffer) == 10
+
+    buffer.truncate(4)
+    assert buffer.version == version + 1
+    assert np.allclose(buffer.data, data[:4])
+    assert isinstance(buffer.data, np.memmap)
+
+    # new data doesn't overwrite previously read data
+    buffer.append(data[:6] + 1)
+    assert np.allclose(buffer.data[4:], data[:6] + 1)
+    assert np.allclose(view, data)
+
+    # truncating to zero
+    view = buffer.data
+    buffer.truncate(0)
+    assert buffer.data.shape == (0, 2)
+    buffer.append(data[:3] - 1)
+    assert np.allclose(buffer.data, data[:3] - 1)
+    assert np.allclose(view[4:], data[:6] + 1)
@@ -0,0 +1,79 @@
+import csv
+
+import pytest
+from tensorflow.core.framework.step_stats_pb2 import StepStats
+
+from nengo_dl import utils
+from nengo_dl.profiling import ProfileReport, op_group
+
+
+def make_step_stats(nodes, device="/job:localhost/replica:0/task:0/cpu:0"):
+    step_stats = StepStats()
+    dev = step_stats.dev_stats.add()
+    dev.device = device
+    for name, op_type, micros, n_bytes in nodes:
+        node = dev.node_stats.add()
+        node.node_name = name
+        node.timeline_label = "%s = %s(x)" % (name, op_type)
+        node.all_end_rel_micros = micros
+        out = node.output.add()
+        out.tensor_description.allocation_description.requested_bytes = (
+            n_bytes)
+    return step_stats
+
+
+def test_op_group():
+    assert op_group("MatMul") == "matmul"
+    assert op_group("ScatterAdd") == "scatter"
+    assert op_group("PyFunc") == "py_func"
+    assert op_group("Tanh") == "other"
+
+
+def test_profile_report(tmpdir):
+    step_stats = make_step_stats([
+        ("while/iteration_0/ElementwiseIncBuilder/MatMul", "MatMul", 10, 8),
+        ("while/iteration_1/ElementwiseIncBuilder_1/MatMul", "MatMul", 20, 8),
+        ("while/iteration_0/ElementwiseIncBuilder/ScatterAdd", "ScatterAdd",
+         4, 0),
+        ("while/iteration_0/SimPyFuncBuilder/PyFunc", "PyFunc", 100, 4),
+        ("while/Enter", "Enter", 1, 0),
+        ("_SOURCE", "NoOp", 1000, 0)])
+
+    # duplicate entries on the combined gpu stream should be ignored
+    step_stats.dev_stats.extend(make_step_stats(
+        [("while/iteration_0/SimPyFuncBuilder/PyFunc", "PyFunc", 100, 4)],
+        device="/gpu:0/stream:all").dev_stats)
+
+    report = ProfileReport.from_step_stats(step_stats)
+
+    assert len(report.records) == 5
+    assert report.total_time == pytest.approx(135e-6)
+
+    summary = report.summary("builder")
+    assert [k for k, _ in summary] == [
+        "SimPyFuncBuilder", "ElementwiseIncBuilder", "other"]
+    row = summary[1][1]
+    assert row["calls"] == 3
+    assert row["total_time"] == pytest.approx(34e-6)
+    assert row["mean_time"] == pytest.approx(34e-6 / 3)
+    assert row["bytes"] == 16
+
+    summary = dict(report.summary("group"))
+    assert summary["matmul"]["calls"] == 2
+    assert summary["scatter"]["total_time"] == pytest.approx(4e-6)
+    assert summary["py_func"]["bytes"] == 4
+    assert summary["control_flow"]["calls"] == 1
+
+    summary = dict(report.summary(("builder", "group")))
+    assert summary[("ElementwiseIncBuilder", "matmul")]["calls"] == 2
+
+    assert "ElementwiseIncBuilder" in str(report)
+
+    path = str(tmpdir.join("profile.csv"))
+    report.to_csv(path, by=("builder", "group"))
+    with utils.open_csv(path) as f:
+        rows = list(csv.reader(f))
+    assert all(len(row) > 0 for row in rows)
+    assert rows[0] == ["builder", "group"] + list(ProfileReport.columns)
+    assert rows[1][:2] == ["SimPyFuncBuilder", "py_func"]
+    assert len(rows) == 5
@@ -0,0 +1,116 @@
+import nengo
+from nengo.exceptions import SimulationError, ValidationError
+import numpy as np
+import pytest
+
+from nengo_dl import BatchServer
+
+
+def test_batch_server(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.LIF())
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+        p2 = nengo.Probe(ens, sample_every=0.002)
+
+    x = np.random.uniform(-1, 1, size=(6, 10, 1))
+
+    with Simulator(net, minibatch_size=4, seed=seed) as sim:
+        target = sim.predict({inp: x}, minibatch_size=4)
+
+        with BatchServer(sim, max_latency=0.1) as server:
+            futures = [server.submit({inp: x[i]}, 10) for i in range(6)]
+
+            for i, f in enumerate(futures):
+                output = f.result(timeout=10)
+                assert f.done()
+                assert f.latency >= 0
+                assert np.allclose(output[p], target[p][i])
+                assert np.allclose(output[p2], target[p2][i])
+
+            # requests with different lengths are not batched together
+            f0 = server.submit({inp: x[0]}, 10)
+            f1 = server.submit({inp: x[0, :5]}, 5)
+            assert np.allclose(f0.result(timeout=10)[p], target[p][0])
+            assert np.allclose(f1.result(timeout=10)[p], target[p][0, :5])
+
+            metrics = server.metrics()
+            assert metrics["n_requests"] == 8
+            assert metrics["n_batches"] >= 4
+            assert metrics["queue_depth"] == 0
+            assert 0 < metrics["fill_ratio"] <= 1
+            assert 0 <= metrics["latency_p50"] <= metrics["latency_p99"]
+
+            with pytest.raises(ValidationError):
+                server.submit({inp: x[0]}, 5)
+            with pytest.raises(ValidationError):
+                server.submit({ens: x[0]}, 10)
+
+        # the full minibatch is used without waiting for the deadline
+        with BatchServer(sim, max_latency=100) as server:
+            futures = [server.submit({inp: x[i]}, 10) for i in range(4)]
+            for i, f in enumerate(futures):
+                assert np.allclose(f.result(timeout=10)[p], target[p][i])
+            assert server.metrics()["fill_ratio"] == 1
+
+        with pytest.raises(SimulationError):
+            server.submit({inp: x[0]}, 10)
+
+
+def test_batch_server_process_input(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        noise = nengo.Node(nengo.processes.WhiteNoise())
+        out = nengo.Node(size_in=1)
+        nengo.Connection(inp, out, synapse=None)
+        nengo.Connection(noise, out, synapse=None)
+        p = nengo.Probe(out)
+
+    x = np.random.uniform(-1, 1, size=(2, 10, 1))
+
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        target = sim.predict({inp: x})
+
+        # the process node restarts from its initial state for each batch,
+        # so the results don't depend on the previous requests
+        with BatchServer(sim, max_latency=0, latency_window=2) as server:
+            for _ in range(3):
+                for i in range(2):
+                    output = server.run({inp: x[i]}, 10)
+                    assert np.allclose(output[p], target[p][i])
+
+            # only the recent values are kept for the metrics
+            assert server.metrics()["n_requests"] == 6
+            assert server.metrics()["n_batches"] == 6
+            assert len(server._latencies) == 2
+            assert len(server._queue_depths) == 2
+            assert len(server._fill_ratios) == 2
+
+
+def test_batch_server_state(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0.5])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.LIF())
+        nengo.Connection(inp, ens, synapse=0.01)
+        p = nengo.Probe(ens)
+
+    x = np.random.uniform(-1, 1, size=(2, 10, 1))
+
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        sim.run_steps(20)
+        data = sim.data[p]
+
+        # serving requests in the middle of a simulation doesn't change the
+        # simulation state
+        sim.reset()
+        sim.run_steps(10)
+        with BatchServer(sim, max_latency=0) as server:
+            server.run({inp: x[0]}, 10)
+            server.run({inp: x[1]}, 10)
+        sim.run_steps(10)
+        assert sim.n_steps == 20
+        assert np.allclose(sim.data[p], data)
+
+        # the state variables are returned to the snapshot pool
+        assert len(sim.tensor_graph.snapshot_slots) == 1
@@ -233,6 +233,36 @@ def test_signal_dict_gather():
     sess.close()
 
 
+def test_signal_dict_mixed_precision():
+    signals = SignalDict(None, tf.float16, 1)
+
+    sess = tf.InteractiveSession()
+
+    key = object()
+    val = np.random.randn(10)
+    signals.bases = {key: tf.assign(tf.Variable(val, dtype=tf.float32), val)}
+
+    x = TensorSignal([0, 1, 2, 3], key, tf.float32, (4,), False)
+    x.load_indices()
+
+    # reads are converted to the simulation precision
+    y = signals.gather(x)
+    assert y.dtype == tf.float16
+    assert np.allclose(sess.run(y), val[:4], atol=1e-2)
+
+    # writes are converted to the base array precision
+    signals.scatter(x, tf.ones((4,), dtype=tf.float16))
+    assert signals.bases[key].dtype.base_dtype == tf.float32
+    y = sess.run(signals.bases[key])
+    assert np.allclose(y[:4], 1)
+    assert np.allclose(y[4:], val[4:])
+
+    with pytest.raises(BuildError):
+        signals.scatter(x, tf.ones((4,), dtype=tf.float32))
+
+    sess.close()
+
+
 def test_signal_dict_combine():
     minibatch_size = 1
     signals = SignalDict(None, tf.float32, minibatch_size)
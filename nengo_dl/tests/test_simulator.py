@@ -3,12 +3,16 @@ import itertools
 import os
 
 import nengo
-from nengo.exceptions import SimulationError, SimulatorClosed, ReadonlyError
+from nengo.exceptions import (
+    BuildError, SimulationError, SimulatorClosed, ReadonlyError,
+    ValidationError)
 import numpy as np
 import pytest
 import tensorflow as tf
 
-from nengo_dl import configure_trainable, tensor_layer, dists, DATA_DIR
+from nengo_dl import (configure_trainable, tensor_layer, dists,
+                      time_vectorized, PlanCache, DATA_DIR)
+from nengo_dl.probe_buffer import ProbeBuffer
 from nengo_dl.simulator import ProbeDict
 
 
@@ -38,6 +42,88 @@ def test_persistent_state(Simulator, seed):
     assert np.allclose(data2, data3)
 
 
+def test_reset(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(nengo.processes.WhiteNoise())
+        ens = nengo.Ensemble(
+            10, 1, noise=nengo.processes.WhiteNoise(
+                dist=nengo.dists.Gaussian(0, 0.1)))
+        nengo.Connection(inp, ens, synapse=nengo.Alpha(0.01))
+        p = nengo.Probe(ens)
+
+    with Simulator(net, seed=seed) as sim:
+        graph = sim.tensor_graph.graph
+        sim.run_steps(10)
+        data = sim.data[p]
+
+        # fast reset reuses the graph, and reproduces the same output
+        sim.reset()
+        assert sim.tensor_graph.graph is graph
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p], data)
+
+        # changing the seed changes the output
+        sim.reset(seed=seed + 1)
+        assert sim.tensor_graph.graph is graph
+        sim.run_steps(10)
+        assert not np.allclose(sim.data[p], data)
+
+        # full rebuild gives the same result as the fast reset
+        sim.reset(seed=seed)
+        sim.run_steps(10)
+        data2 = sim.data[p]
+        sim.reset(rebuild=True)
+        assert sim.tensor_graph.graph is not graph
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p], data2)
+        assert np.allclose(sim.data[p], data)
+
+
+def test_snapshot(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(nengo.processes.WhiteNoise())
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens, synapse=0.01)
+        p = nengo.Probe(ens)
+        p2 = nengo.Probe(ens, sample_every=0.003)
+
+    with Simulator(net, seed=seed) as sim:
+        sim.run_steps(10)
+        snap = sim.snapshot()
+        data = sim.data[p]
+
+        sim.run_steps(20)
+        data2 = sim.data[p]
+        data3 = sim.data[p2]
+
+        # restoring the snapshot reproduces the same continuation
+        sim.restore(snap)
+        assert sim.n_steps == 10
+        assert np.allclose(sim.data[p], data)
+        sim.run_steps(20)
+        assert np.allclose(sim.data[p], data2)
+        assert np.allclose(sim.data[p2], data3)
+
+        # the same snapshot can be restored multiple times
+        sim.restore(snap)
+        sim.run_steps(20)
+        assert np.allclose(sim.data[p], data2)
+
+        # deleted snapshots are reused
+        slot = snap.slot
+        del snap
+        snap = sim.snapshot()
+        assert snap.slot is slot
+
+        # snapshots can't be restored in a different graph
+        sim.reset(rebuild=True)
+        with pytest.raises(SimulationError):
+            sim.restore(snap)
+
+    with pytest.raises(SimulatorClosed):
+        sim.snapshot()
+
+
 def test_step_blocks(Simulator, seed):
     with nengo.Network(seed=seed) as net:
         inp = nengo.Node(np.sin)
@@ -52,9 +138,34 @@ def test_step_blocks(Simulator, seed):
 
     assert np.allclose(sim1.data[p], sim2.data[p])
 
-    with pytest.warns(RuntimeWarning):
-        with Simulator(net, unroll_simulation=5) as sim:
-            sim.run_steps(2)
+
+@pytest.mark.parametrize("unroll", (1, 5))
+def test_uneven_unroll(Simulator, unroll, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(np.sin)
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+        p2 = nengo.Probe(ens, sample_every=0.003)
+
+    with Simulator(net, unroll_simulation=3) as sim1:
+        sim1.run_steps(12)
+
+    # the remainder steps should be executed exactly, so the state should
+    # be the same as running the steps all at once
+    with Simulator(net, unroll_simulation=unroll) as sim2:
+        for n in (2, 7, 1, 1, 1):
+            sim2.run_steps(n)
+
+        assert sim2.n_steps == 12
+        assert sim2.data[p].shape[0] == 12
+        assert np.allclose(sim1.data[p], sim2.data[p])
+        assert np.allclose(sim1.data[p2], sim2.data[p2])
+
+        # inputs can be fed in for an uneven number of steps
+        x = np.ones((1, 7, 1))
+        sim2.run_steps(7, input_feeds={inp: x})
+        assert sim2.n_steps == 19
 
 
 def test_minibatch(Simulator, seed):
@@ -97,6 +208,91 @@ def test_minibatch(Simulator, seed):
     assert np.allclose(sim.data[ps[2]], probe_data[2], atol=1e-6)
 
 
+def test_variable_minibatch(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    with Simulator(net, minibatch_size=[4, 2]) as sim:
+        assert sim.minibatch_sizes == [2, 4]
+        assert sim.minibatch_size == 2
+
+        # modify a trainable parameter, so we can check that it is carried
+        # across minibatch sizes
+        with sim.tensor_graph.graph.as_default():
+            var = tf.trainable_variables()[0]
+            val = sim.sess.run(var) * 2
+            var.load(val, sim.sess)
+
+        sim.run_steps(10, input_feeds={inp: np.ones((2, 10, 1))})
+        assert sim.data[p].shape == (2, 10, 1)
+        data = sim.data[p][0]
+
+        # input feeds with a different batch size raise an error, rather
+        # than discarding the simulation state
+        with pytest.raises(SimulationError):
+            sim.run_steps(10, input_feeds={inp: np.ones((4, 10, 1))})
+        assert sim.minibatch_size == 2
+        assert sim.n_steps == 10
+        assert sim.data[p].shape == (2, 10, 1)
+        assert np.allclose(sim.data[p][0], data)
+
+        # predicting with a different minibatch size doesn't switch the
+        # simulator, or affect its state or probe data
+        outputs = sim.predict({inp: np.ones((4, 10, 1))}, minibatch_size=4)
+        assert np.allclose(outputs[p], data)
+        assert sim.minibatch_size == 2
+        assert sim.tensor_graph is sim.tensor_graphs[2]
+        assert sim.n_steps == 10
+        assert np.allclose(sim.data[p][0], data)
+        sim.run_steps(10, input_feeds={inp: np.ones((2, 10, 1))})
+        data2 = sim.data[p]
+        sim.soft_reset(include_probes=True)
+        sim.run_steps(20, input_feeds={inp: np.ones((2, 20, 1))})
+        assert np.allclose(sim.data[p], data2)
+
+        with pytest.raises(SimulationError):
+            sim.predict({inp: np.ones((3, 10, 1))}, minibatch_size=3)
+
+        sim.set_minibatch_size(4)
+        sim.run_steps(10, input_feeds={inp: np.ones((4, 10, 1))})
+        assert sim.minibatch_size == 4
+        assert sim.data[p].shape == (4, 10, 1)
+        assert np.allclose(sim.data[p], data)
+        with sim.tensor_graph.graph.as_default():
+            assert np.allclose(
+                sim.sess.run(tf.trainable_variables()[0]), val)
+
+        # switching back reuses the existing graph
+        graph = sim.tensor_graphs[2].graph
+        sim.set_minibatch_size(2)
+        assert sim.tensor_graph.graph is graph
+        sim.run_steps(10, input_feeds={inp: np.ones((2, 10, 1))})
+        assert np.allclose(sim.data[p], data)
+
+        # each graph keeps its own build classes (the graphs share the same
+        # operator groups), so more steps can still be built on the first
+        # graph after the second one was built
+        op_builds = [sim.tensor_graphs[mb].op_builds for mb in (2, 4)]
+        assert set(op_builds[0]) == set(op_builds[1])
+        assert all(op_builds[0][ops] is not op_builds[1][ops]
+                   for ops in op_builds[0])
+        probe_tensors = sim.tensor_graph.build_single_step()[2]
+        assert all(x.graph is graph for x in probe_tensors)
+        assert probe_tensors[0].get_shape().as_list()[-1] == 2
+
+        with pytest.raises(SimulationError):
+            sim.set_minibatch_size(3)
+
+        with pytest.raises(SimulationError):
+            sim.run_steps(10, input_feeds={inp: np.ones((3, 10, 1))})
+
+    with pytest.raises(SimulatorClosed):
+        sim.set_minibatch_size(4)
+
+
 def test_input_feeds(Simulator):
     minibatch_size = 10
 
@@ -265,6 +461,440 @@ def test_train_sparse(Simulator, seed):
         assert np.allclose(sim.data[p], y, atol=1e-3)
 
 
+def test_train_truncation(Simulator, seed):
+    batch_size = 100
+    minibatch_size = 100
+    n_hidden = 30
+    n_steps = 10
+
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(
+            n_hidden, 1, neuron_type=nengo.RectifiedLinear(),
+            gain=np.ones(n_hidden), bias=np.linspace(-1, 1, n_hidden))
+        out = nengo.Node(size_in=1)
+
+        nengo.Connection(inp, ens, synapse=None)
+        nengo.Connection(ens, ens, synapse=0)
+        nengo.Connection(ens, out, synapse=None)
+
+        p = nengo.Probe(out)
+
+    with Simulator(net, minibatch_size=minibatch_size, seed=seed,
+                   unroll_simulation=2) as sim:
+        x = np.outer(np.linspace(0, 1, batch_size),
+                     np.ones(n_steps))[:, :, None]
+        y = np.outer(np.linspace(0, 1, batch_size),
+                     np.linspace(0, 1, n_steps))[:, :, None]
+
+        # note: the targets depend on the state accumulated in the previous
+        # windows, so this only works if the state is carried over
+        sim.train({inp: x}, {p: y}, tf.train.RMSPropOptimizer(1e-3),
+                  n_epochs=200, truncation=4)
+
+        sim.run_steps(n_steps, input_feeds={inp: x[:minibatch_size]})
+
+        assert np.sqrt(np.mean((sim.data[p] - y[:minibatch_size]) ** 2)) < 0.05
+
+        # the truncation length doesn't need to be a multiple of the unroll
+        sim.train({inp: x}, {p: y}, tf.train.RMSPropOptimizer(1e-3),
+                  truncation=3)
+
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y}, tf.train.RMSPropOptimizer(1e-3),
+                      truncation=0)
+
+
+@pytest.mark.parametrize("unroll", (1, 2))
+def test_train_checkpoint(Simulator, unroll, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.RectifiedLinear())
+        nengo.Connection(inp, ens, synapse=0.01)
+        nengo.Connection(ens, ens, synapse=0.01)
+        p = nengo.Probe(ens, synapse=0.01)
+
+    n_steps = 10
+    x = np.random.uniform(-1, 1, size=(4, n_steps, 1))
+    y = np.random.uniform(-1, 1, size=(4, n_steps, 1))
+
+    # recomputing the gradients one segment at a time gives the same update
+    # as backpropagating through the whole sequence (note: the segment length
+    # doesn't need to be a multiple of the sequence length or the unroll)
+    params = []
+    for minibatch_size, checkpoint_steps, accumulate_steps in (
+            (4, None, 1), (4, 3, 1), (2, 3, 2)):
+        with Simulator(net, minibatch_size=minibatch_size,
+                       unroll_simulation=unroll, seed=seed) as sim:
+            with sim.tensor_graph.graph.as_default():
+                init = sim.sess.run(tf.trainable_variables())
+
+            sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(
+                1e-1), n_epochs=2, shuffle=False,
+                checkpoint_steps=checkpoint_steps,
+                accumulate_steps=accumulate_steps)
+
+            with sim.tensor_graph.graph.as_default():
+                params.append(sim.sess.run(tf.trainable_variables()))
+
+            assert not all(np.allclose(a, b)
+                           for a, b in zip(init, params[-1]))
+
+    for ps in params[1:]:
+        for a, b in zip(params[0], ps):
+            assert np.allclose(a, b, atol=1e-6)
+
+    with Simulator(net, minibatch_size=4) as sim:
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(
+                1e-1), checkpoint_steps=0)
+
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(
+                1e-1), truncation=3, checkpoint_steps=3)
+
+
+def test_train_accumulate(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.RectifiedLinear())
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    n_steps = 5
+    x = np.random.uniform(-1, 1, size=(8, n_steps, 1))
+    y = np.random.uniform(-1, 1, size=(8, n_steps, 1))
+
+    # accumulating the gradients over 4 minibatches of size 2 is the same as
+    # one update with a minibatch of size 8
+    params = []
+    for minibatch_size, accumulate_steps in ((8, 1), (2, 4)):
+        with Simulator(net, minibatch_size=minibatch_size, seed=seed) as sim:
+            sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(
+                1e-1), n_epochs=2, shuffle=False,
+                accumulate_steps=accumulate_steps)
+
+            with sim.tensor_graph.graph.as_default():
+                params.append(sim.sess.run(tf.trainable_variables()))
+
+            # each accumulator is updated by a single op (shared by the
+            # accumulate and apply steps)
+            ops = sim.tensor_graph.graph.get_operations()
+            accumulators = [op for op in ops
+                            if op.type in ("Variable", "VariableV2") and
+                            "accumulators/" in op.name]
+            updates = [op for op in ops
+                       if op.type in ("AssignAdd", "ScatterAdd") and
+                       "accumulators/" in op.inputs[0].name]
+            assert len(updates) == len(accumulators)
+            assert (len(accumulators) > 0) == (accumulate_steps > 1)
+
+    for a, b in zip(*params):
+        assert np.allclose(a, b, atol=1e-6)
+
+    # gradients left over from an incomplete group of minibatches are
+    # discarded, rather than being added to the next call to `train`
+    params = []
+    for n_items in (6, 8):
+        with Simulator(net, minibatch_size=2, seed=seed) as sim:
+            opt = tf.train.GradientDescentOptimizer(1e-1)
+            with pytest.warns(None) as w:
+                sim.train({inp: x[:n_items]}, {p: y[:n_items]}, opt,
+                          shuffle=False, accumulate_steps=3)
+            assert (n_items == 8) == any(
+                issubclass(r.category, RuntimeWarning) for r in w)
+
+            sim.train({inp: x[:6]}, {p: y[:6]}, opt, shuffle=False,
+                      accumulate_steps=3)
+
+            with sim.tensor_graph.graph.as_default():
+                params.append(sim.sess.run(tf.trainable_variables()))
+
+    for a, b in zip(*params):
+        assert np.allclose(a, b, atol=1e-6)
+
+    with Simulator(net, minibatch_size=2) as sim:
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(
+                1e-1), accumulate_steps=0)
+
+
+def test_train_validation(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.RectifiedLinear())
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    n_steps = 5
+    x = np.random.uniform(-1, 1, size=(4, n_steps, 1))
+    y = np.random.uniform(-1, 1, size=(4, n_steps, 1))
+    val_x = np.random.uniform(-1, 1, size=(4, n_steps, 1))
+
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        assert sim.train({inp: x}, {p: y},
+                         tf.train.GradientDescentOptimizer(1e-2)) is None
+
+        # validation loss is computed every `eval_every` epochs
+        val_losses = sim.train(
+            {inp: x}, {p: y}, tf.train.GradientDescentOptimizer(1e-2),
+            n_epochs=4, validation=({inp: val_x}, {p: val_x}), eval_every=2)
+        assert len(val_losses) == 2
+        assert np.allclose(val_losses[-1],
+                           sim.loss({inp: val_x}, {p: val_x}, "mse"))
+
+        # training stops if the validation loss doesn't improve
+        val_losses = sim.train(
+            {inp: x}, {p: y}, tf.train.GradientDescentOptimizer(0),
+            n_epochs=10, validation=({inp: val_x}, {p: val_x}), patience=2)
+        assert len(val_losses) == 3
+        assert np.allclose(val_losses, val_losses[0])
+
+        # training on the targets makes the loss on the negated targets
+        # worse, so the best parameters are the ones from the first epoch
+        val_losses = sim.train(
+            {inp: x}, {p: y}, tf.train.GradientDescentOptimizer(1e-1),
+            n_epochs=5, validation=({inp: x}, {p: -y}), restore_best=True)
+        assert val_losses[-1] > val_losses[0]
+        assert np.allclose(sim.loss({inp: x}, {p: -y}, "mse"),
+                           min(val_losses))
+
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y},
+                      tf.train.GradientDescentOptimizer(1e-2),
+                      validation=({inp: val_x[:1]}, {p: val_x[:1]}))
+
+
+def test_freeze(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(np.sin)
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.RectifiedLinear())
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    x = np.random.uniform(-1, 1, size=(4, 5, 1))
+    y = np.random.uniform(-1, 1, size=(4, 5, 1))
+
+    with Simulator(net, minibatch_size=[2, 4], seed=seed) as sim:
+        sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(1e-1))
+        sim.run_steps(5, input_feeds={inp: x[:2]})
+        data = sim.data[p]
+
+        sim.freeze()
+        assert sim.tensor_graph.inference_only
+
+        # trained parameters are stored as constants
+        with sim.tensor_graph.graph.as_default():
+            assert len(tf.trainable_variables()) == 0
+        assert sim.n_steps == 0
+
+        sim.run_steps(5, input_feeds={inp: x[:2]})
+        assert np.allclose(sim.data[p], data)
+
+        # the parameters are also frozen for the other minibatch sizes
+        sim.set_minibatch_size(4)
+        sim.run_steps(5, input_feeds={inp: x})
+        assert np.allclose(sim.data[p][:2], data)
+
+        with pytest.raises(SimulationError):
+            sim.train({inp: x}, {p: y},
+                      tf.train.GradientDescentOptimizer(1e-1))
+
+    # building the simulator in inference mode is equivalent to freezing
+    # the untrained parameters
+    with Simulator(net, seed=seed) as sim:
+        sim.run_steps(5)
+        data = sim.data[p]
+
+    with Simulator(net, seed=seed, inference_only=True) as sim:
+        sim.run_steps(5)
+        assert np.allclose(sim.data[p], data)
+
+        with pytest.raises(SimulationError):
+            sim.check_gradients()
+
+
+def test_export_load(Simulator, seed, tmpdir):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(np.sin)
+        const = nengo.Node([0.5])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.LIF())
+        nengo.Connection(inp, ens)
+        nengo.Connection(const, ens)
+        p = nengo.Probe(ens, synapse=0.1)
+
+    x = np.random.uniform(-1, 1, size=(2, 5, 1))
+    y = np.random.uniform(-1, 1, size=(2, 5, 1))
+
+    path = str(tmpdir.join("export"))
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        attributes = set(vars(sim))
+        sim.train({inp: x}, {p: y}, tf.train.GradientDescentOptimizer(1e-1))
+        sim.export(path)
+        sim.run_steps(10)
+        data = sim.data[p]
+
+    with Simulator.load(path, net) as sim:
+        # the loaded simulator goes through the same setup as a new one
+        assert set(vars(sim)) == attributes
+        assert sim.minibatch_size == 2
+        assert list(sim.build_stats.phases.keys()) == ["load", "init_session"]
+
+        # the trained parameters and the graph seeds are restored
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p], data)
+
+        sim.reset()
+        sim.run_steps(5)
+        sim.run_steps(5)
+        assert np.allclose(sim.data[p], data)
+
+        # constant inputs can still be changed
+        const.output = np.ones(1)
+        sim.reset()
+        sim.run_steps(10)
+        assert not np.allclose(sim.data[p], data)
+        const.output = np.ones(1) * 0.5
+
+        # the graph can't be rebuilt
+        with pytest.raises(BuildError):
+            sim.reset(rebuild=True)
+
+    # networks must match
+    with nengo.Network() as net2:
+        nengo.Node([0])
+    with pytest.raises(SimulationError):
+        Simulator.load(path, net2)
+
+    # python functions can't be exported
+    with nengo.Network() as net3:
+        a = nengo.Node([0])
+        b = nengo.Node(lambda t, x: x, size_in=1)
+        nengo.Connection(a, b)
+        nengo.Probe(b)
+
+    with Simulator(net3) as sim:
+        with pytest.raises(BuildError):
+            sim.export(str(tmpdir.join("export3")))
+
+
+def test_stepper(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(nengo.processes.WhiteNoise())
+        const = nengo.Node([0.5])
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens, synapse=0.01)
+        nengo.Connection(const, ens)
+        p = nengo.Probe(ens)
+        p2 = nengo.Probe(ens.neurons)
+
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        sim.run_steps(10)
+        data = sim.data[p]
+
+        sim.reset()
+        stepper = sim.stepper(probes=[p])
+        for i in range(10):
+            output = stepper.step()
+            assert list(output.keys()) == [p]
+            assert np.allclose(output[p], data[:, i])
+        assert sim.n_steps == 10
+
+        # stepping continues from the same state as run_steps
+        sim.run_steps(5)
+        output = sim.stepper().step()
+        assert output[p2].shape == (2, 10)
+
+        # input overrides
+        x = np.random.uniform(-1, 1, size=(2, 10, 1))
+        sim.reset()
+        sim.run_steps(10, input_feeds={inp: x})
+        data = sim.data[p]
+
+        sim.reset()
+        for i in range(10):
+            output = stepper.step({inp: x[:, i]})
+            assert np.allclose(output[p], data[:, i])
+
+        # changed constant inputs
+        const.output = np.ones(1)
+        sim.reset()
+        sim.run_steps(10)
+        data = sim.data[p]
+
+        sim.reset()
+        for i in range(10):
+            assert np.allclose(stepper.step()[p], data[:, i])
+        const.output = np.ones(1) * 0.5
+
+        with pytest.raises(ValidationError):
+            stepper.step({inp: np.zeros((1, 1))})
+
+        # stepper is invalidated when the graph changes
+        sim.reset(rebuild=True)
+        with pytest.raises(SimulationError):
+            stepper.step()
+
+    # the stepper works after switching minibatch sizes (i.e., when the
+    # single step is built after the graphs for other sizes)
+    with Simulator(net, minibatch_size=[2, 4], seed=seed) as sim:
+        sim.set_minibatch_size(4)
+        sim.set_minibatch_size(2)
+        sim.run_steps(10)
+        data = sim.data[p]
+
+        sim.reset()
+        stepper = sim.stepper()
+        for i in range(10):
+            output = stepper.step()
+            assert output[p2].shape == (2, 10)
+            assert np.allclose(output[p], data[:, i])
+
+        sim.set_minibatch_size(4)
+        sim.run_steps(10)
+        data = sim.data[p]
+
+        sim.reset()
+        stepper = sim.stepper()
+        for i in range(10):
+            output = stepper.step()
+            assert output[p2].shape == (4, 10)
+            assert np.allclose(output[p], data[:, i])
+
+
+def test_mixed_precision(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0.5])
+        ens = nengo.Ensemble(10, 1, neuron_type=nengo.RectifiedLinear())
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    n_steps = 20
+    with Simulator(net, seed=seed) as sim:
+        sim.run_steps(n_steps)
+        data = sim.data[p]
+
+    with Simulator(net, dtype=tf.float16, seed=seed) as sim:
+        sim.run_steps(n_steps)
+        assert sim.data[p].dtype == np.float16
+        assert np.allclose(sim.data[p], data, atol=1e-2)
+
+        # trainable parameters are stored in full precision
+        with sim.tensor_graph.graph.as_default():
+            params = tf.trainable_variables()
+        assert len(params) > 0
+        assert all(x.dtype.base_dtype == tf.float32 for x in params)
+
+        param_vals = sim.sess.run(params)
+        sim.train({inp: np.ones((1, n_steps, 1))},
+                  {p: np.zeros((1, n_steps, 1))},
+                  tf.train.GradientDescentOptimizer(1e-2))
+        new_vals = sim.sess.run(params)
+        assert all(np.all(np.isfinite(x)) for x in new_vals)
+        assert not all(np.allclose(x, y)
+                       for x, y in zip(param_vals, new_vals))
+
+
 def test_train_errors(Simulator):
     with nengo.Network() as net:
         a = nengo.Node([0])
@@ -333,6 +963,119 @@ def test_loss(Simulator):
         sim.loss({None: np.zeros((1, 1))}, None, None)
 
 
+@pytest.mark.parametrize("probe_dir", (False, True))
+def test_predict(Simulator, probe_dir, tmpdir, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+        p2 = nengo.Probe(ens, sample_every=0.003)
+
+    n_steps = 20
+    inputs = np.random.uniform(-1, 1, size=(7, n_steps, 1))
+    with Simulator(net, minibatch_size=3, unroll_simulation=3,
+                   probe_dir=str(tmpdir) if probe_dir else None) as sim:
+        outputs = sim.predict({inp: inputs})
+
+        # check the output against a regular run
+        sim.run_steps(n_steps, input_feeds={inp: inputs[:3]})
+        assert outputs[p].shape == (7, n_steps, 1)
+        assert outputs[p2].shape == (7, 6, 1)
+        assert np.allclose(outputs[p][:3], sim.data[p])
+        assert np.allclose(outputs[p2][:3], sim.data[p2])
+
+        # last minibatch is padded
+        sim.reset()
+        sim.run_steps(n_steps, input_feeds={
+            inp: np.concatenate([inputs[6:], np.zeros((2, n_steps, 1))])})
+        assert np.allclose(outputs[p][6:], sim.data[p][:1])
+
+        # predict doesn't modify the probe data
+        data = sim.data[p]
+        outputs = sim.predict({inp: inputs}, probes=[p2], prefetch=0)
+        assert list(outputs.keys()) == [p2]
+        assert np.allclose(sim.data[p], data)
+
+        with pytest.raises(SimulationError):
+            sim.predict({inp: np.ones((3, n_steps, 2))})
+
+    with pytest.raises(SimulatorClosed):
+        sim.predict({inp: inputs})
+
+
+def test_predict_process_input(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node([0])
+        noise = nengo.Node(nengo.processes.WhiteNoise())
+        out = nengo.Node(size_in=1)
+        nengo.Connection(inp, out, synapse=None)
+        nengo.Connection(noise, out, synapse=None)
+        p = nengo.Probe(out)
+
+    n_steps = 10
+    inputs = np.random.uniform(-1, 1, size=(2, n_steps, 1))
+    with Simulator(net, minibatch_size=2, seed=seed) as sim:
+        # the same inputs are split across several minibatches
+        outputs = sim.predict({inp: np.tile(inputs, (3, 1, 1))})
+
+        # the process node restarts from its initial state in each
+        # minibatch
+        for i in range(3):
+            assert np.allclose(outputs[p][2 * i:2 * (i + 1)],
+                               outputs[p][:2])
+
+        # which matches a regular run from the initial state
+        sim.run_steps(n_steps, input_feeds={inp: inputs})
+        assert np.allclose(outputs[p][:2], sim.data[p])
+
+        # and predict doesn't affect the state of the process in the
+        # ongoing simulation
+        sim.predict({inp: inputs})
+        sim.run_steps(n_steps, input_feeds={inp: inputs})
+        data = sim.data[p]
+        sim.reset()
+        sim.run_steps(2 * n_steps, input_feeds={
+            inp: np.concatenate([inputs, inputs], axis=1)})
+        assert np.allclose(sim.data[p], data)
+
+
+@pytest.mark.parametrize("unroll", (1, 3))
+def test_probe_sample_every(Simulator, unroll, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(np.sin)
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        probes = [nengo.Probe(ens, sample_every=x)
+                  for x in (None, 0.001, 0.002, 0.0025, 0.01)]
+
+    with nengo.Simulator(net) as ref:
+        ref.run_steps(21)
+
+    with Simulator(net, unroll_simulation=unroll) as sim:
+        sim.run_steps(9)
+        sim.run_steps(12)
+
+        for p in probes:
+            assert np.allclose(sim.data[p], ref.data[p], atol=1e-5)
+
+        # only the sampled timesteps are returned from the graph
+        sim.soft_reset()
+        probe_data = sim.sess.run(sim.tensor_graph.probe_arrays,
+                                  feed_dict=sim._fill_feed(12, None))
+        assert [x.shape[0] for x in probe_data] == [12, 12, 6, 4, 1]
+
+        # loss is computed using the targets on the sampled timesteps
+        x = np.ones((1, 20, 1))
+        targets = np.arange(20, dtype=np.float32)[None, :, None]
+        sim.reset()
+        sim.run_steps(20, input_feeds={inp: x})
+        sampled = np.arange(1, 21) % 2.5 < 1
+        assert np.allclose(
+            sim.loss({inp: x}, {probes[3]: targets}, "mse"),
+            np.mean((sim.data[probes[3]] - targets[0, sampled]) ** 2))
+
+
 def test_generate_inputs(Simulator, seed):
     with nengo.Network() as net:
         proc = nengo.processes.WhiteNoise(seed=seed)
@@ -347,7 +1090,12 @@ def test_generate_inputs(Simulator, seed):
         ph = [sim.tensor_graph.invariant_ph[x] for x in inp]
 
         assert len(sim.tensor_graph.invariant_inputs) == len(inp)
-        assert len(feed) == len(inp)
+
+        # constant inputs are built into the graph, so they aren't fed in
+        # (unless they are overridden)
+        assert len(feed) == len(inp) - 1
+        assert ph[3] not in feed
+        assert set(sim.tensor_graph.const_inputs) == {inp[0], inp[3]}
 
         sim.reset()
         sim.run_steps(3, input_feeds={inp[0]: np.zeros((2, 3, 1))})
@@ -357,9 +1105,56 @@ def test_generate_inputs(Simulator, seed):
                 np.tile(proc.run_steps(3)[:, :, None], (1, 1, 2)),
                 np.ones((3, 1, 2)) * 2]
         for i, x in enumerate(vals):
-            assert np.allclose(feed[ph[i]], x)
+            if i < 3:
+                assert np.allclose(feed[ph[i]], x)
             assert np.allclose(sim.data[p[i]], x.transpose(2, 0, 1))
 
+        # changing the constant value feeds in the new value (but not the
+        # full array of values on each timestep)
+        inp[3].output = np.ones(1) * 3
+        feed = sim._generate_inputs({}, 3)
+        assert ph[3] not in feed
+        assert np.allclose(feed[sim.tensor_graph.const_inputs[inp[3]][0]], 3)
+
+        sim.reset()
+        sim.run_steps(3)
+        assert np.allclose(sim.data[p[0]], 1)
+        assert np.allclose(sim.data[p[3]], 3)
+
+
+def test_time_vectorized(Simulator):
+    calls = []
+
+    @time_vectorized
+    def func(t):
+        calls.append(np.shape(t))
+        return np.stack([np.sin(t), np.cos(t)], axis=-1)
+
+    class VectorizedProcess(nengo.Process):
+        def make_step(self, shape_in, shape_out, dt, rng):
+            @time_vectorized
+            def step(t):
+                return t[:, None] * np.arange(shape_out[0])
+
+            return step
+
+    with nengo.Network() as net:
+        inp = [nengo.Node(func), nengo.Node(VectorizedProcess(), size_out=3)]
+        p = [nengo.Probe(x) for x in inp]
+
+    # note: function is called with a scalar during the nengo build process
+    del calls[:]
+
+    with Simulator(net, minibatch_size=2, unroll_simulation=5) as sim:
+        sim.run_steps(10)
+
+        assert calls == [(10,)]
+
+        t = sim.trange()
+        assert np.allclose(sim.data[p[0]],
+                           np.stack([np.sin(t), np.cos(t)], axis=-1))
+        assert np.allclose(sim.data[p[1]], t[:, None] * np.arange(3))
+
 
 def test_save_load_params(Simulator, tmpdir):
     with nengo.Network(seed=0) as net:
@@ -494,6 +1289,62 @@ def test_side_effects(Simulator):
     assert func.x == 11
 
 
+def test_jit(Simulator, seed):
+    with nengo.Network(seed=seed) as net:
+        inp = nengo.Node(np.sin)
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        p = nengo.Probe(ens)
+
+    with Simulator(net, unroll_simulation=5) as sim:
+        sim.run_steps(10)
+        data = sim.data[p]
+
+    # the scatters on the base variables can't be compiled, so we should
+    # get a diagnostic warning
+    with pytest.warns(RuntimeWarning):
+        with Simulator(net, unroll_simulation=5, jit=True) as sim:
+            blockers = sim.tensor_graph.jit_diagnostics()
+            assert "ref variable access" in blockers
+
+            sim.run_steps(10)
+            assert np.allclose(sim.data[p], data)
+
+
+def test_build_stats(Simulator, tmpdir):
+    with nengo.Network() as net:
+        inp = nengo.Node([0])
+        ens = nengo.Ensemble(10, 1)
+        nengo.Connection(inp, ens)
+        nengo.Probe(ens)
+
+    phases = []
+    with Simulator(net, build_callback=lambda name, stats: phases.append(
+            name)) as sim:
+        stats = sim.build_stats
+
+        assert phases == list(stats.phases.keys()) == [
+            "model_build", "mark_signals", "tree_planner", "order_signals",
+            "create_signals", "pre_build", "build_loop", "init_session"]
+        assert stats["model_build"]["n_ops"] == len(sim.model.operators)
+        assert (stats["tree_planner"]["n_ops_out"] ==
+                len(sim.tensor_graph.plan) <=
+                stats["tree_planner"]["n_ops_in"])
+        assert (stats["create_signals"]["n_base_arrays"] ==
+                len(sim.tensor_graph.base_arrays_init))
+        assert (0 < stats["pre_build"]["n_tf_ops"] <
+                stats["build_loop"]["n_tf_ops"])
+        assert all(s["time"] >= 0 for s in stats.phases.values())
+
+    # with a cached plan, the planning phases are skipped
+    cache = PlanCache(cache_dir=str(tmpdir))
+    with Simulator(net, plan_cache=cache):
+        pass
+    with Simulator(net, plan_cache=cache) as sim:
+        assert sim.build_stats["plan_cache"]["hit"]
+        assert "tree_planner" not in sim.build_stats
+
+
 def test_tensorboard(Simulator):
     with nengo.Network() as net:
         a = nengo.Node([0])
@@ -517,10 +1368,15 @@ def test_profile(Simulator):
         nengo.Probe(a)
 
     with Simulator(net) as sim:
-        sim.run_steps(5, profile=True)
+        report = sim.run_steps(5, profile=True)
 
         assert os.path.exists("%s/nengo_dl_profile.json" % DATA_DIR)
 
+        assert len(report.records) > 0
+        assert report.total_time > 0
+
+        assert sim.run_steps(5) is None
+
 
 def test_dt_readonly(Simulator):
     with nengo.Network() as net:
@@ -549,6 +1405,28 @@ def test_probe_dict():
         assert x == y
 
 
+def test_probe_dict_cache():
+    buffer = ProbeBuffer((3, 5), np.float32)
+    a = ProbeDict({0: buffer}, {0: 5})
+
+    buffer.append(np.zeros((2, 3, 5)))
+    data = a[0]
+    assert data.shape == (5, 2, 3)
+    assert not data.flags.writeable
+
+    # data is cached until the buffer changes
+    assert a[0] is data
+    buffer.append(np.ones((1, 3, 5)))
+    data2 = a[0]
+    assert data2 is not data
+    assert data2.shape == (5, 3, 3)
+    assert np.all(data2[:, 2] == 1)
+    assert a[0] is data2
+
+    buffer.clear()
+    assert a[0].shape == (5, 0, 3)
+
+
 def test_deprecation(Simulator):
     with pytest.warns(DeprecationWarning):
         Simulator(None, step_blocks=1)
@@ -606,3 +1484,34 @@ def test_check_gradients_error(Simulator):
     with Simulator(net) as sim:
         with pytest.raises(SimulationError):
             sim.check_gradients()
+
+
+def test_probe_dir(Simulator, tmpdir):
+    with nengo.Network() as net:
+        inp = nengo.Node(np.sin)
+        p = nengo.Probe(inp)
+        p2 = nengo.Probe(inp, sample_every=0.003)
+
+    with Simulator(net) as sim:
+        sim.run_steps(10)
+        sim.run_steps(10)
+        data = sim.data[p]
+        data2 = sim.data[p2]
+
+    with Simulator(net, probe_dir=str(tmpdir), minibatch_size=2) as sim:
+        probe_dir = sim.probe_dir
+        assert os.path.dirname(probe_dir) == str(tmpdir)
+
+        sim.run_steps(10)
+        sim.run_steps(10)
+        assert sim.data[p].shape == (2, 20, 1)
+        assert isinstance(sim.data[p], np.memmap)
+        assert np.allclose(sim.data[p][0], data)
+        assert np.allclose(sim.data[p2][1], data2)
+
+        sim.reset()
+        sim.run_steps(10)
+        assert np.allclose(sim.data[p][1], data[:10])
+
+    assert np.allclose(sim.data[p][1], data[:10])
+    assert not os.path.exists(probe_dir)
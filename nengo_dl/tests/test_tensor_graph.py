@@ -78,6 +78,20 @@ def test_build_optimizer(Simulator):
         assert (sim.tensor_graph.build_optimizer(opt, (p,), "mse") is
                 sim.tensor_graph.build_optimizer(opt, (p,), "mse"))
 
+        # accumulating optimizers are cached separately
+        opt_op, _ = sim.tensor_graph.build_optimizer(
+            opt, (p,), "mse", accumulate_steps=2)
+        assert len(opt_op) == 3
+        assert (sim.tensor_graph.build_optimizer(
+            opt, (p,), "mse", accumulate_steps=2)[0] is opt_op)
+
+        # checkpointed optimizers also return the state gradients
+        opt_op, _ = sim.tensor_graph.build_optimizer(
+            opt, (p,), "mse", checkpoint=True)
+        assert len(opt_op) == 4
+        assert (len(opt_op[3]) ==
+                len(sim.tensor_graph.segment_vars) > 0)
+
     # error when no trainable elements
     with nengo.Network() as net:
         inp = nengo.Node([0])
@@ -1,3 +1,5 @@
+import threading
+
 from nengo import ensemble, config, Network, Connection, Ensemble
 from nengo.exceptions import SimulationError, ValidationError
 import numpy as np
@@ -95,6 +97,29 @@ def test_minibatch_generator(shuffle):
         assert np.allclose(y_all, np.arange(96) + 1)
 
 
+@pytest.mark.parametrize("n_prefetch", (0, 1, 3))
+def test_prefetch(n_prefetch):
+    assert list(utils.prefetch(iter(range(10)), n_prefetch)) == list(
+        range(10))
+
+    # errors are passed to the calling thread
+    def error_gen():
+        yield 0
+        raise ValueError("test error")
+
+    gen = utils.prefetch(error_gen(), n_prefetch)
+    assert next(gen) == 0
+    with pytest.raises(ValueError):
+        next(gen)
+
+    # background thread exits if consumer stops early
+    gen = utils.prefetch(iter(range(100)), n_prefetch)
+    assert next(gen) == 0
+    gen.close()
+    assert not any(t.name == "nengo_dl_prefetch"
+                   for t in threading.enumerate())
+
+
 def test_print_and_flush(capsys):
     utils.print_and_flush("hello", end="")
     utils.print_and_flush("world")
@@ -158,3 +183,39 @@ def test_configure_trainable():
     utils.configure_trainable(conf, default=False)
 
     assert conf[Ensemble].trainable is False
+
+
+def test_build_stats():
+    calls = []
+    stats = utils.BuildStats(
+        callback=lambda name, x: calls.append((name, dict(x))))
+
+    with stats.phase("a") as counts:
+        counts["n"] = 3
+
+    with stats.phase("b"):
+        x = np.ones(10 ** 6)
+    del x
+
+    assert list(stats.phases.keys()) == ["a", "b"]
+    assert "a" in stats
+    assert stats["a"]["n"] == 3
+    assert stats["a"]["time"] >= 0
+    assert stats.total_time == stats["a"]["time"] + stats["b"]["time"]
+    if stats["b"]["peak_rss_delta"] is not None:
+        assert stats["b"]["peak_rss_delta"] >= 0
+
+    assert [c[0] for c in calls] == ["a", "b"]
+    assert calls[0][1]["n"] == 3
+
+    # repeated phases overwrite the previous values
+    with stats.phase("a"):
+        pass
+    assert "n" not in stats["a"]
+    assert list(stats.phases.keys()) == ["a", "b"]
+
+    # failed phases are not recorded
+    with pytest.raises(ValueError):
+        with stats.phase("c"):
+            raise ValueError()
+    assert "c" not in stats
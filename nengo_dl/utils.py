@@ -1,9 +1,12 @@
 from __future__ import print_function
 
+from collections import OrderedDict
+import contextlib
 import datetime
 import logging
 import re
 import sys
+import threading
 import time
 import warnings
 
@@ -14,6 +17,16 @@ import numpy as np
 import tensorflow as tf
 from tensorflow.python.framework.ops import get_gradient_function
 
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue  # python 2
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # windows
+
 logger = logging.getLogger(__name__)
 
 if sys.version_info[:2] < (3, 3):
@@ -28,6 +41,36 @@ else:
     def print_and_flush(*args, **kwargs):
         print(*args, flush=True, **kwargs)
 
+if sys.version_info[0] < 3:
+
+    def open_csv(path, mode="r"):
+        """Open a file for use with the ``csv`` module.
+
+        The ``csv`` module handles the line endings itself, so the file
+        needs to be opened in binary mode on Python 2, and with
+        ``newline=""`` on Python 3 (otherwise extra blank lines are written
+        between the rows on Windows).
+
+        Parameters
+        ----------
+        path : str
+            the file to open
+        mode : ``"r"`` or ``"w"``, optional
+            whether to open the file for reading or writing
+
+        Returns
+        -------
+        file
+            the opened file
+        """
+
+        return open(path, mode + "b")
+
+else:
+
+    def open_csv(path, mode="r"):
+        return open(path, mode, newline="")
+
 
 def sanitize_name(name):
     """Remove illegal Tensorflow name characters from string.
@@ -119,6 +162,34 @@ def align_func(output_shape, output_dtype):
     return apply_align
 
 
+def time_vectorized(func):
+    """Decorator that marks a :class:`~nengo:nengo.Node` output function (or
+    the step function returned by :meth:`~nengo:nengo.Process.make_step`) as
+    accepting a vector of times.
+
+    When the output of an input Node (a Node with no incoming connections)
+    is generated for a simulation run, a marked function will be called once
+    with an array containing the time on each simulation step (shape
+    ``(n_steps,)``), and should return an array with shape
+    ``(n_steps, node.size_out)``.  Unmarked functions are called once per
+    timestep.
+
+    Parameters
+    ----------
+    func : callable
+        the function to be marked
+
+    Notes
+    -----
+    The function should still accept a scalar ``t`` as well, since that
+    is how it will be called by other Nengo backends (and by the Nengo
+    build process, to determine the output size of the Node).
+    """
+
+    func.time_vectorized = True
+    return func
+
+
 def print_op(input, message):
     """Inserts a print statement into the tensorflow graph.
 
@@ -287,6 +358,109 @@ class ProgressBar(object):
             self.stop()
 
 
+def peak_rss():
+    """Returns the peak resident set size (in bytes) of the current process.
+
+    Returns
+    -------
+    int
+        the maximum amount of memory that has been used by the process so
+        far (or None if this cannot be determined on the current platform)
+    """
+
+    if resource is None:  # pragma: no cover
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # note: the units are kilobytes on linux, and bytes on mac
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class BuildStats(object):
+    """Records the time, memory usage, and size of the outputs of each phase
+    of the build process.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        function that will be called with ``(phase, stats)`` after each
+        phase completes, where ``stats`` is the dictionary of metrics for
+        that phase (see :meth:`.phase`)
+
+    Attributes
+    ----------
+    phases : ``OrderedDict`` of {str: ``OrderedDict``}
+        the metrics for each completed phase, in the order in which they
+        were first run (if a phase is repeated, e.g. because the graph was
+        rebuilt, the metrics from the most recent run are stored)
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phases = OrderedDict()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager that records the metrics for a build phase.
+
+        The stored metrics are ``"time"`` (wall clock time in seconds),
+        ``"peak_rss_delta"`` (the increase in the peak resident set size of
+        the process, in bytes), plus any counts that are added to the
+        dictionary returned by the context manager.
+
+        Parameters
+        ----------
+        name : str
+            the name of the build phase
+
+        Examples
+        --------
+
+        .. code-block:: python
+
+            with stats.phase("tree_planner") as counts:
+                plan = tree_planner(operators)
+                counts["n_ops"] = len(plan)
+        """
+
+        counts = OrderedDict()
+        start_rss = peak_rss()
+        start = time.time()
+
+        yield counts
+
+        stats = OrderedDict(time=time.time() - start)
+        stats["peak_rss_delta"] = (None if start_rss is None else
+                                   peak_rss() - start_rss)
+        stats.update(counts)
+
+        self.phases[name] = stats
+        logger.info("Build phase %s: %s", name, ", ".join(
+            "%s=%s" % (k, v) for k, v in stats.items()))
+
+        if self.callback is not None:
+            self.callback(name, stats)
+
+    @property
+    def total_time(self):
+        """(float) The total time (in seconds) of all the recorded
+        phases."""
+
+        return sum(s["time"] for s in self.phases.values())
+
+    def __getitem__(self, name):
+        return self.phases[name]
+
+    def __contains__(self, name):
+        return name in self.phases
+
+    def __str__(self):
+        return "\n".join("%s: %s" % (name, ", ".join(
+            "%s=%s" % (k, v) for k, v in stats.items()))
+            for name, stats in self.phases.items())
+
+
 def minibatch_generator(inputs, targets, minibatch_size, shuffle=True,
                         rng=None):
     """Generator to yield ``minibatch_sized`` subsets from ``inputs`` and
@@ -344,6 +518,77 @@ def minibatch_generator(inputs, targets, minibatch_size, shuffle=True,
                {p: targets[p][perm[i:i + minibatch_size]] for p in targets})
 
 
+def prefetch(generator, n_prefetch):
+    """Evaluates a generator in a background thread, so that the next items
+    are being computed while the current item is in use.
+
+    Parameters
+    ----------
+    generator : iterable
+        the generator to be evaluated (note: this will be iterated over in a
+        different thread, so it should not rely on thread-local state)
+    n_prefetch : int
+        the maximum number of items that will be computed ahead of time (if
+        0, the generator will be evaluated in the current thread, as normal)
+
+    Yields
+    ------
+    object
+        the items from ``generator``, in the same order
+
+    Notes
+    -----
+    Any exceptions raised in ``generator`` will be re-raised in the calling
+    thread.
+    """
+
+    if n_prefetch <= 0:
+        for x in generator:
+            yield x
+        return
+
+    items = queue.Queue(maxsize=n_prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # note: we use a timeout so that the thread can exit if the consumer
+        # stops iterating before the generator is exhausted
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def worker():
+        try:
+            for x in generator:
+                if not put((x, None)):
+                    return
+        except Exception as e:
+            put((done, e))
+        else:
+            put((done, None))
+
+    thread = threading.Thread(target=worker, name="nengo_dl_prefetch")
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            x, error = items.get()
+            if x is done:
+                if error is not None:
+                    raise error
+                break
+            yield x
+    finally:
+        stop.set()
+        thread.join()
+
+
 def configure_trainable(config, default=None):
     """Adds a configurable attribute called ``trainable`` to trainable objects.
 